@@ -2,7 +2,7 @@ import os, sys
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' 
 
 from simulationClasses import MDPPathAdviceInterface, MDPActionAdviceInterface, MDPStateScoreInterface, MDPExecutionEngine
-from stormMdpClasses import MDPState, MDPOperations, MDPAction
+from stormMdpClasses import MDPState, MDPOperations, MDPAction, MDPPredicate, MDPPredicatesMask
 
 import numpy as np
 import tensorflow as tf
@@ -23,6 +23,7 @@ class MDPStateScore(MDPStateScoreInterface):
 
 # selection advice
 class MDPFullActionAdvice( MDPActionAdviceInterface):
+	allowsAllActions = True
 
 	def getMDPActionAdvice(self, mdpState : MDPState, mdpOperations: MDPOperations, quietInfoStr: bool) -> tuple[list[MDPAction]]:
 		choices = mdpOperations.getLegalActions(mdpState)
@@ -165,13 +166,13 @@ class MDPStormActionAdvice( MDPActionAdviceInterface ):
 
 # path advice
 class MDPNonLossPathAdvice(MDPPathAdviceInterface):
+	def __init__(self) -> None:
+		self.lossMask = MDPPredicatesMask([MDPPredicate("Loss")])
 
 	def isValidPath(self, mdpExecutionEngine : MDPExecutionEngine) -> bool:
-		mdpPredicatesList = mdpExecutionEngine.mdpOperations.getPredicates(mdpExecutionEngine.mdpEndState())
-		for predicate in mdpPredicatesList:
-			if predicate.name == "Loss":
-				return False
-		return True
+		mdpOperations = mdpExecutionEngine.mdpOperations
+		mdpPredicatesMask = mdpOperations.getPredicatesMask(mdpExecutionEngine.mdpEndState())
+		return not (mdpPredicatesMask & self.lossMask.getMask(mdpOperations))
 	
 # a function to print the states nice
 def niceStr(stateDict : dict) -> str:
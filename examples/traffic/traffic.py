@@ -1,6 +1,6 @@
 from trafficPrism import TaxiEngine
 from simulationClasses import MDPPathAdviceInterface, MDPActionAdviceInterface, MDPStateScoreInterface, MDPExecutionEngine
-from stormMdpClasses import MDPState, MDPOperations, MDPAction
+from stormMdpClasses import MDPState, MDPOperations, MDPAction, MDPPredicate, MDPPredicatesMask
 import math
 import random
 import sys
@@ -114,6 +114,7 @@ class MDPStateScoreDistance(MDPStateScoreInterface):
 
 # selection advice
 class MDPSafeActionAdvice(MDPActionAdviceInterface):
+    allowsAllActions = True
 
     def getMDPActionAdvice(self, mdpState: MDPState, mdpOperations: MDPOperations, quietInfoStr: bool) -> tuple[list[MDPAction]]:
         choices = mdpOperations.getLegalActions(mdpState)
@@ -131,6 +132,7 @@ class MDPFullActionAdvice(MDPActionAdviceInterface[TMDPPredicate, TMDPState, TMD
     """
     TMDPOperations = TypeVar(
         "TMDPOperations", bound=MDPOperationsInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
+    allowsAllActions = True
 
     def getMDPActionAdvice(self, mdpState: TMDPState, mdpOperations: TMDPOperations, quietInfoStr: bool) -> List[TMDPAction]:
         """
@@ -148,14 +150,14 @@ class MDPFullActionAdvice(MDPActionAdviceInterface[TMDPPredicate, TMDPState, TMD
 
 # path advice
 class MDPSafePathAdvice(MDPPathAdviceInterface):
+    def __init__(self) -> None:
+        self.unsafeMask = MDPPredicatesMask([MDPPredicate("Unsafe")])
 
     def isValidPath(self, mdpExecutionEngine: MDPExecutionEngine) -> bool:
-        mdpPredicatesList = mdpExecutionEngine.mdpOperations.getPredicates(
+        mdpOperations = mdpExecutionEngine.mdpOperations
+        mdpPredicatesMask = mdpOperations.getPredicatesMask(
             mdpExecutionEngine.mdpEndState())
-        for predicate in mdpPredicatesList:
-            if predicate.name == "Unsafe":
-                return False
-        return True
+        return not (mdpPredicatesMask & self.unsafeMask.getMask(mdpOperations))
 
 
 class MDPFullPathAdvice(MDPPathAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
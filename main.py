@@ -69,13 +69,56 @@ def readParameters(yamlFile):
     args["numTraces"] = int(params["number of games"])
     args["horizonTrace"] = int(params["number of steps"])
     args["discount"] = float(params["discount factor"])
+    if "state cache size" in params:
+        args["stateCacheSize"] = int(params["state cache size"])
+    if "mdp backend" in params:
+        args["mdpBackend"] = str(params["mdp backend"])
+    if "explicit max states" in params:
+        args["explicitMaxStates"] = int(params["explicit max states"])
+    if "simulator pool" in params:
+        args["simulatorPool"] = bool(params["simulator pool"])
+    if "profile simulator" in params:
+        args["profileSimulator"] = bool(params["profile simulator"])
 
     # mcts parameters
     args["numSims"] = int(params["mcts"]["number of simulations"])
-    args["numMCTSIters"] = int(params["mcts"]["number of iterations"])
+    if "time budget" in params["mcts"]:
+        args["timeBudget"] = float(params["mcts"]["time budget"])
+        args["numMCTSIters"] = params["mcts"].get("number of iterations")
+        if args["numMCTSIters"] is not None:
+            args["numMCTSIters"] = int(args["numMCTSIters"])
+    else:
+        args["numMCTSIters"] = int(params["mcts"]["number of iterations"])
     horizon = int(params["mcts"]["horizon"])
     mctsConstant = float(params["mcts"]["mcts constant"])
     alpha = float(params["mcts"]["alpha"])
+    reuseTree = bool(params["mcts"].get("reuse tree", False))
+    numWorkers = int(params["mcts"].get("number of workers", 1))
+    numTreeWorkers = int(params["mcts"].get("number of tree workers", 0))
+    arrayTree = bool(params["mcts"].get("array tree", False))
+    transpositions = bool(params["mcts"].get("transpositions", False))
+    earlyStopInterval = int(params["mcts"].get("early stop interval", 0))
+    earlyStopConstant = params["mcts"].get("early stop constant")
+    wideningConstant = float(params["mcts"].get("widening constant", 0.0))
+    wideningExponent = float(params["mcts"].get("widening exponent", 0.5))
+    maxNodes = int(params["mcts"].get("node budget", 0))
+    if maxNodes > 0 and arrayTree and numTreeWorkers < 1:
+        raise Exception("node budget cannot be used with array tree")
+    checkpointFile = params["mcts"].get("checkpoint file")
+    checkpointDepth = params["mcts"].get("checkpoint depth")
+    openingBookFile = params["mcts"].get("opening book file")
+    singlePassThreshold = bool(params["mcts"].get("single pass threshold", False))
+    if checkpointDepth is not None:
+        checkpointDepth = int(checkpointDepth)
+    if earlyStopConstant is not None:
+        earlyStopConstant = float(earlyStopConstant)
+    numSimulationWorkers = int(params["mcts"].get("number of simulation workers", 1))
+    if params["mcts"].get("batch simulations", False):
+        simulationEngineClass = MDPBatchSimulationEngine
+    elif numSimulationWorkers > 1:
+        simulationEngineClass = MDPParallelSimulationEngine
+    else:
+        simulationEngineClass = MDPSimulationEngine
 
     # mdp parameters
     pythonFile = params["other parameters"]["python file"]
@@ -123,6 +166,25 @@ def readParameters(yamlFile):
         print("No simulation path advice specified, using default")
         mdpPathAdviceSim = MDPNonLossPathAdvice()
 
+    # threshold advice
+    mdpThresholdActionAdvice = None
+    mdpThresholdPathAdvice = None
+    if "threshold action advice" in otherParameters:
+        mdpThresholdActionAdviceFunction = otherParameters["threshold action advice"]
+        mdpThresholdActionAdvice = getattr(module, mdpThresholdActionAdviceFunction)()
+        print("Using threshold action advice: " + mdpThresholdActionAdviceFunction)
+    if "threshold path advice" in otherParameters:
+        mdpThresholdPathAdviceFunction = otherParameters["threshold path advice"]
+        mdpThresholdPathAdvice = getattr(module, mdpThresholdPathAdviceFunction)()
+        print("Using threshold path advice: " + mdpThresholdPathAdviceFunction)
+    if singlePassThreshold:
+        if mdpThresholdPathAdvice is None:
+            raise Exception("single pass threshold needs a threshold path advice")
+        if not mdpThresholdActionAdvice is None:
+            raise Exception("single pass threshold draws its simulations with the simulation action advice, remove the threshold action advice")
+    elif (mdpThresholdActionAdvice is None) != (mdpThresholdPathAdvice is None):
+        raise Exception("define both the threshold action advice and the threshold path advice, or neither")
+
     # some other parameters
     ignoreNonDecisionStates = True
     mdpActionStrategy = MDPUniformActionStrategy()
@@ -131,10 +193,10 @@ def readParameters(yamlFile):
     printCompact = True
 
     optionsSimulationEngine = OptionsSimulationEngine(horizon=horizon, ignoreNonDecisionStates=ignoreNonDecisionStates, mdpActionStrategy=mdpActionStrategy, mdpActionAdvice=mdpActionAdviceSim,
-                                                      mdpPathAdvice=mdpPathAdviceSim, mdpStateScore=mdpStateScore, alpha=alpha, rejectFactor=rejectFactor, quiet=quiet, quietInfoStr=printEachStepTrace, printEachStep=printEachStep, printCompact=printCompact)
+                                                      mdpPathAdvice=mdpPathAdviceSim, mdpStateScore=mdpStateScore, alpha=alpha, rejectFactor=rejectFactor, quiet=quiet, quietInfoStr=printEachStepTrace, printEachStep=printEachStep, printCompact=printCompact, simulationEngineClass=simulationEngineClass, numWorkers=numSimulationWorkers)
 
     optionsMCTSEngine = OptionsMCTSEngine(horizon=horizon, ignoreNonDecisionStates=ignoreNonDecisionStates, mctsConstant=mctsConstant, mdpActionStrategy=mdpActionStrategy, mdpActionAdvice=mdpActionAdvice,
-                                          mdpActionAdviceRoot=mdpActionAdviceRoot, optionsSimulationEngine=optionsSimulationEngine, mdpThresholdActionAdvice=None, mdpThresholdPathAdvice=None, quiet=quietMCTS, quietInfoStr=quietMCTS)
+                                          mdpActionAdviceRoot=mdpActionAdviceRoot, optionsSimulationEngine=optionsSimulationEngine, mdpThresholdActionAdvice=mdpThresholdActionAdvice, mdpThresholdPathAdvice=mdpThresholdPathAdvice, quiet=quietMCTS, quietInfoStr=quietMCTS, reuseTree=reuseTree, numWorkers=numWorkers, numTreeWorkers=numTreeWorkers, arrayTree=arrayTree, transpositions=transpositions, earlyStopInterval=earlyStopInterval, earlyStopConstant=earlyStopConstant, wideningConstant=wideningConstant, wideningExponent=wideningExponent, maxNodes=maxNodes, checkpointFile=checkpointFile, checkpointDepth=checkpointDepth, openingBookFile=openingBookFile, singlePassThreshold=singlePassThreshold)
 
     args['optionsMCTSEngine'] = optionsMCTSEngine
 
@@ -148,14 +210,34 @@ def readParameters(yamlFile):
     return prismFile, niceStr, args
 
 
+def printStatistics(statistics):
+    if "simulator" in statistics:
+        print("[== simulator calls")
+        print("consumer\toperation\tcalls\tseconds")
+        for consumer, operations in statistics["simulator"].items():
+            for operation, entry in operations.items():
+                print(f"{consumer}\t{operation}\t{entry['calls']}\t{entry['seconds']:.3f}")
+        print("==]")
+    if statistics.get("mcts"):
+        decisions = statistics["mcts"]
+        print("[== MCTS search over " + str(len(decisions)) + " decisions")
+        print("statistic\ttotal\tper decision\tmax")
+        for key in decisions[0]:
+            total = sum(decision[key] for decision in decisions)
+            print(f"{key}\t{total:g}\t{total / len(decisions):.2f}\t{max(decision[key] for decision in decisions):g}")
+        print("==]")
+
+
 def main():
     prismFile, niceStr, args = readParameters(sys.argv[1])
-    results = runGamesWithMCTS(niceStr, prismFile, **args)
+    statistics = {}
+    results = runGamesWithMCTS(niceStr, prismFile, statistics=statistics, **args)
     engineList = [r[0] for r in results]
     prettyConsole = True
     cursesDelay = 0.1
     runResults(engineList, cursesDelay=cursesDelay,
-               quiet=prettyConsole, prettyConsole=prettyConsole)
+               quiet=prettyConsole, prettyConsole=prettyConsole, statistics=statistics)
+    printStatistics(statistics)
 
 
 if __name__ == "__main__":
@@ -30,6 +30,9 @@ class MDPPredicateInterface:
 	def __str__(self) -> str:
 		raiseNotDefined()
 		return "()"
+	# predicates are compared by identity, as objects are by default.
+	# Redefine both __eq__ and __hash__ if equal predicates can be distinct instances (a predicate built again for each state for example),
+	# so that they get the same bit in MDPPredicateTable
 
 	# methods that can be redefined if needed
 	def consoleStr(self) -> str:
@@ -51,6 +54,51 @@ class MDPPredicateInterface:
 			raise Exception("parsing error")
 		return cls()
 
+##
+# Interns predicates: the i-th distinct predicate seen is represented by the bit 1<<i,
+# so that the predicates holding on a state are stored as an int mask
+class MDPPredicateTable(Generic[TMDPPredicate]):
+	def __init__(self) -> None:
+		self.mdpPredicates: List[TMDPPredicate] = [] # predicate of each bit
+		self.bitIndices: Dict[TMDPPredicate, int] = {} # bit of each predicate
+		self.maskPredicates: Dict[int, Tuple[TMDPPredicate, ...]] = {} # predicates of the masks decoded so far
+	def getMask(self, mdpPredicates: Sequence[TMDPPredicate]) -> int:
+		mask = 0
+		for mdpPredicate in mdpPredicates:
+			bitIndex = self.bitIndices.get(mdpPredicate)
+			if bitIndex is None:
+				bitIndex = len(self.mdpPredicates)
+				if type(mdpPredicate).__hash__ is not object.__hash__:
+					mdpPredicate = mdpPredicate.deepCopy() # a predicate compared by value is copied, so that changing the instance given cannot change the key. A predicate compared by identity is its own key
+				self.mdpPredicates.append(mdpPredicate)
+				self.bitIndices[mdpPredicate] = bitIndex
+			mask |= 1 << bitIndex
+		return mask
+	def getPredicates(self, mask: int) -> List[TMDPPredicate]:
+		# the predicates are the interned instances and must not be modified
+		mdpPredicates = self.maskPredicates.get(mask)
+		if mdpPredicates is None:
+			mdpPredicates = tuple(self.mdpPredicates[i] for i in range(mask.bit_length()) if mask >> i & 1)
+			self.maskPredicates[mask] = mdpPredicates
+		return list(mdpPredicates)
+	def __len__(self) -> int:
+		return len(self.mdpPredicates)
+
+##
+# Mask of fixed predicates (the ones tested by a path advice for example) in the predicate table of an MDPOperations instance.
+# The mask is only computed again when it is asked for another table
+class MDPPredicatesMask(Generic[TMDPPredicate]):
+	def __init__(self, mdpPredicates: Sequence[TMDPPredicate]) -> None:
+		self.mdpPredicates = list(mdpPredicates)
+		self.predicateTable: Optional[MDPPredicateTable[TMDPPredicate]] = None # table in which mask was computed
+		self.mask = 0
+	def getMask(self, mdpOperations: "MDPOperationsInterface[TMDPPredicate, Any, Any, Any]") -> int:
+		predicateTable = mdpOperations.getPredicateTable()
+		if not predicateTable is self.predicateTable:
+			self.mask = predicateTable.getMask(self.mdpPredicates)
+			self.predicateTable = predicateTable
+		return self.mask
+
 
 TMDPState = TypeVar("TMDPState",bound="MDPStateInterface")
 ##
@@ -59,6 +107,7 @@ TMDPState = TypeVar("TMDPState",bound="MDPStateInterface")
 # Pacman: position of every agent, etc
 
 class MDPStateInterface:
+	__slots__ = () # lets implementations define __slots__, states being created for every node and path
 
 	# abstract methods that must be redefined
 	def __init__(self) -> None:
@@ -220,51 +269,76 @@ class MDPTransition(Generic[TMDPAction, TMDPStochasticAction]):
 
 ##
 # Abstract class
-# Encodes a path in the MDP, as an initial state and a sequence of transitions. Also contains a sequence of lists of predicates, one for each state visited along the path
+# Encodes a path in the MDP, as an initial state and a sequence of transitions. Also contains a sequence of predicate masks (see MDPPredicateTable), one for each state visited along the path
 class MDPPath(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
 
 	FILE_PREFIX: str = "Initial state:\n"
 	FILE_SEPARATOR: str = "\nTransitions:\n"
 	FILE_LIST_SEPARATOR: str = "\n;\n"
 	FILE_PREDICATE_SEPARATOR: str = "\nPredicates:\n"
-	def __init__(self, mdpInitialState: TMDPState, mdpTransitionsSequence: List[MDPTransition[TMDPAction, TMDPStochasticAction]], mdpPredicatesSequence: List[List[TMDPPredicate]]) -> None:
+	def __init__(self, mdpInitialState: TMDPState, mdpTransitionsSequence: List[MDPTransition[TMDPAction, TMDPStochasticAction]], mdpPredicatesSequence: List[List[TMDPPredicate]], predicateTable: Optional[MDPPredicateTable[TMDPPredicate]] = None) -> None:
+		if predicateTable is None:
+			predicateTable = MDPPredicateTable()
 		self.mdpInitialState = mdpInitialState # an MDPState instance
 		self.mdpTransitionsSequence = mdpTransitionsSequence # a list such that self.mdpTransitionsSequence[i] contains an MDPTransition instance
-		self.mdpPredicatesSequence = mdpPredicatesSequence  # a list such that self.mdpPredicatesSequence[i] contains an mdpPredicates list
+		self.predicateTable = predicateTable # the table of the masks, usually the one of the MDPOperations instance (see MDPOperationsInterface.getPredicateTable)
+		self.mdpPredicatesMasks = [predicateTable.getMask(mdpPredicates) for mdpPredicates in mdpPredicatesSequence] # a list such that self.mdpPredicatesMasks[i] is the mask of the predicates of the ith state
+	@classmethod
+	def fromMasks(cls, mdpInitialState: TMDPState, mdpTransitionsSequence: List[MDPTransition[TMDPAction, TMDPStochasticAction]], mdpPredicatesMasks: List[int], predicateTable: MDPPredicateTable[TMDPPredicate]) -> "MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = cls(mdpInitialState, mdpTransitionsSequence, [], predicateTable)
+		mdpPath.mdpPredicatesMasks = mdpPredicatesMasks
+		return mdpPath
+	@property
+	def mdpPredicatesSequence(self) -> List[List[TMDPPredicate]]:
+		# a list such that mdpPredicatesSequence[i] contains an mdpPredicates list, decoded from the masks
+		return [self.predicateTable.getPredicates(mask) for mask in self.mdpPredicatesMasks]
+	def lastPredicatesMask(self) -> int:
+		return self.mdpPredicatesMasks[-1]
+	def usePredicateTable(self, predicateTable: MDPPredicateTable[TMDPPredicate]) -> None:
+		# encodes the masks in predicateTable, so that they can be compared with the masks of the operations that own it
+		if predicateTable is self.predicateTable:
+			return
+		self.mdpPredicatesMasks = [predicateTable.getMask(self.predicateTable.getPredicates(mask)) for mask in self.mdpPredicatesMasks]
+		self.predicateTable = predicateTable
 	def deepCopy(self) -> "MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
-		return MDPPath(self.mdpInitialState.deepCopy(),[mdpTransition.deepCopy() for mdpTransition in self.mdpTransitionsSequence], [[mdpPredicate.deepCopy() for mdpPredicate in mdpPredicates] for mdpPredicates in self.mdpPredicatesSequence])
+		return MDPPath.fromMasks(self.mdpInitialState.deepCopy(),[mdpTransition.deepCopy() for mdpTransition in self.mdpTransitionsSequence], list(self.mdpPredicatesMasks), self.predicateTable)
+	def _predicatesConsoleStr(self, i: int) -> str:
+		return " ".join([mdpPredicate.consoleStr() for mdpPredicate in self.predicateTable.getPredicates(self.mdpPredicatesMasks[i])])
 	def __str__(self) -> str:
 		return "(mdpInitialState:"+str(self.mdpInitialState)+", mdpTransitionsSequence:" + "["+"\n".join( [str(mdpTransition) for mdpTransition in self.mdpTransitionsSequence] ) +"]"+", mdpPredicatesSequence:" + "["+"\n".join( [" ".join([str(mdpPredicate) for mdpPredicate in mdpPredicates ]) for mdpPredicates in self.mdpPredicatesSequence] ) +"]" + ")"
 	def __getitem__(self, item):
 		return self.mdpTransitionsSequence[item]
 	def consoleStr(self) -> str:
-		if len(self.mdpPredicatesSequence) != len(self.mdpTransitionsSequence)+1:
+		if len(self.mdpPredicatesMasks) != len(self.mdpTransitionsSequence)+1:
 			raise Exception("bad length")
-		r= ["{"+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[0]])+"}"]
+		r= ["{"+self._predicatesConsoleStr(0)+"}"]
 		for i in range(len(self.mdpTransitionsSequence)):
-			r.append(self.mdpTransitionsSequence[i].consoleStr()+' {'+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[i+1]])+'}')
+			r.append(self.mdpTransitionsSequence[i].consoleStr()+' {'+self._predicatesConsoleStr(i+1)+'}')
 		return "state:"+self.mdpInitialState.consoleStr()+"->"+"[\n"+"\n".join(r)+"\n]"
 		# return "state:"+self.mdpInitialState.consoleStr()+"->"+"[\n"+"\n".join( [mdpTransition.consoleStr() for mdpTransition in self.mdpTransitionsSequence] )+"\n]" #+"[\n"+"\n".join( [ " ".join([mdpPredicate.consoleStr() for mdpPredicate in mdpPredicates]) for mdpPredicates in self.mdpPredicatesSequence] )+"\n]"
 
+	def __reduce__(self):
+		# the table is pickled with the masks, the paths pickled together keep sharing it
+		return (self.__class__.fromMasks, (self.mdpInitialState, self.mdpTransitionsSequence, self.mdpPredicatesMasks, self.predicateTable))
 	def transitionsCopy(self) -> "MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
 		"""
 		half-shallow copy of an MDPPath instance. The transitions sequence can be modified independently
 		but not the transitions themselves nor the initial state.
 		"""
-		return MDPPath(self.mdpInitialState,[mdpTransition for mdpTransition in self.mdpTransitionsSequence], [mdpPredicates for mdpPredicates in self.mdpPredicatesSequence])
+		return MDPPath.fromMasks(self.mdpInitialState,[mdpTransition for mdpTransition in self.mdpTransitionsSequence], list(self.mdpPredicatesMasks), self.predicateTable)
 	def lastConsoleStr(self) -> str:
-		if len(self.mdpPredicatesSequence) != len(self.mdpTransitionsSequence)+1:
+		if len(self.mdpPredicatesMasks) != len(self.mdpTransitionsSequence)+1:
 			raise Exception("bad length")
 		if len(self.mdpTransitionsSequence) == 0:
-			return '{'+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[-1]])+'}'
+			return '{'+self._predicatesConsoleStr(-1)+'}'
 		else:
-			return self.mdpTransitionsSequence[-1].consoleStr()+' {'+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[-1]])+'}'
+			return self.mdpTransitionsSequence[-1].consoleStr()+' {'+self._predicatesConsoleStr(-1)+'}'
 	def lastPredicatesConsoleStr(self) -> str:
-		if len(self.mdpPredicatesSequence) != len(self.mdpTransitionsSequence)+1:
+		if len(self.mdpPredicatesMasks) != len(self.mdpTransitionsSequence)+1:
 			raise Exception("bad length")
-		return '{'+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[-1]])+'}'
+		return '{'+self._predicatesConsoleStr(-1)+'}'
 	def _subConsoleStr(self, i: int, j: int) -> str:
-		if len(self.mdpPredicatesSequence) != len(self.mdpTransitionsSequence)+1:
+		if len(self.mdpPredicatesMasks) != len(self.mdpTransitionsSequence)+1:
 			raise Exception("bad length")
 		r1=""
 		if i!=0:
@@ -272,9 +346,9 @@ class MDPPath(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction
 		r2=""
 		if j!=self.length():
 			r2=":"+str(j)
-		r= ["{"+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[i]])+"}"]
+		r= ["{"+self._predicatesConsoleStr(i)+"}"]
 		for x in range(i,j):
-			r.append(self.mdpTransitionsSequence[x].consoleStr()+' {'+" ".join([mdpPredicate.consoleStr() for mdpPredicate in self.mdpPredicatesSequence[x+1]])+"}")
+			r.append(self.mdpTransitionsSequence[x].consoleStr()+' {'+self._predicatesConsoleStr(x+1)+"}")
 		return r1+"["+" | ".join(r)+"]"+r2 #+"\n"+r1+"["+" | ".join( [ " ".join([mdpPredicate.consoleStr() for mdpPredicate in mdpPredicates]) for mdpPredicates in self.mdpPredicatesSequence[i:j+1]] )+"]"+r2
 		# return r1+"["+" | ".join( [mdpTransition.consoleStr() for mdpTransition in self.mdpTransitionsSequence[i:j]] )+"]"+r2 #+"\n"+r1+"["+" | ".join( [ " ".join([mdpPredicate.consoleStr() for mdpPredicate in mdpPredicates]) for mdpPredicates in self.mdpPredicatesSequence[i:j+1]] )+"]"+r2
 	def suffixConsoleStr(self, depth: int) -> str:
@@ -282,13 +356,13 @@ class MDPPath(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction
 
 	def length(self) -> int:
 		return len(self.mdpTransitionsSequence)
-	def append(self, mdpTransition: MDPTransition[TMDPAction, TMDPStochasticAction], mdpPredicates: List[TMDPPredicate]) -> None:
+	def append(self, mdpTransition: MDPTransition[TMDPAction, TMDPStochasticAction], mdpPredicatesMask: int) -> None:
 		self.mdpTransitionsSequence.append(mdpTransition)
-		self.mdpPredicatesSequence.append(mdpPredicates)
+		self.mdpPredicatesMasks.append(mdpPredicatesMask)
 
 	def fastReset(self, i: int) -> None:
 		self.mdpTransitionsSequence=self.mdpTransitionsSequence[:i]
-		self.mdpPredicatesSequence=self.mdpPredicatesSequence[:i+1]
+		self.mdpPredicatesMasks=self.mdpPredicatesMasks[:i+1]
 
 	def fileStr(self) -> str:
 		return MDPPath.FILE_PREFIX+self.mdpInitialState.fileStr()+MDPPath.FILE_SEPARATOR+MDPPath.FILE_LIST_SEPARATOR.join( [mdpTransition.fileStr() for mdpTransition in self.mdpTransitionsSequence])+MDPPath.FILE_PREDICATE_SEPARATOR+MDPPath.FILE_LIST_SEPARATOR.join([ " ".join([mdpPredicate.fileStr() for mdpPredicate in mdpPredicates]) for mdpPredicates in self.mdpPredicatesSequence])
@@ -358,10 +432,12 @@ class MDPExecution(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticA
 
 	def length(self) -> int:
 		return self.mdpPath.length()
-	def append(self, mdpTransition: MDPTransition[TMDPAction, TMDPStochasticAction], mdpPredicates: List[TMDPPredicate]) -> None:
+	def usePredicateTable(self, predicateTable: MDPPredicateTable[TMDPPredicate]) -> None:
+		self.mdpPath.usePredicateTable(predicateTable)
+	def append(self, mdpTransition: MDPTransition[TMDPAction, TMDPStochasticAction], mdpPredicatesMask: int) -> None:
 #		if self.isTerminal:
 #			raise Exception("appending to terminal path")
-		self.mdpPath.append(mdpTransition, mdpPredicates)
+		self.mdpPath.append(mdpTransition, mdpPredicatesMask)
 
 	def fastReset(self, fastResetData: Tuple[int, TMDPState, float, bool, float]) -> None:
 		length,fastResetDataState,mdpPathReward,isTerminal,discountFactor=fastResetData
@@ -375,12 +451,21 @@ class MDPExecution(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticA
 
 TMDPOperations = TypeVar("TMDPOperations",bound="MDPOperationsInterface") 
 
+# consumers of MDPOperations, see MDPOperationsInterface.forConsumer
+CONSUMER_GAME: str = "game" # the execution of the game itself
+CONSUMER_SELECTION: str = "selection" # the selection phase of MCTS
+CONSUMER_SIMULATION: str = "simulation" # the simulations that estimate the value of a node
+CONSUMER_ADVICE: str = "advice" # action and path advice
+CONSUMER_SCORING: str = "scoring" # state scores
+CONSUMER_REPLAY: str = "replay" # the replay of a finished game
+
 ##
 # Abstract class
 # atomic operations of the MDP: draw next state at random, available actions, etc
 # Pacman: contains information about the layout, movement rules, etc
 # abstract methods that must be redefined
 class MDPOperationsInterface(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	predicateTable: Optional[MDPPredicateTable[TMDPPredicate]] = None # see getPredicateTable
 	def __init__(self, discountFactor: float) -> None:
 		raiseNotDefined()
 		self.discountFactor = discountFactor
@@ -413,12 +498,26 @@ class MDPOperationsInterface(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPS
 		legalActions: List[TMDPAction] = []
 		# legalActions.append(MDPActionInterface(""))
 		return legalActions
+	def step(self, mdpState: TMDPState, mdpAction: TMDPAction, quietInfoStr: bool) -> Tuple[TMDPStochasticAction, Optional[int], Optional[bool]]:
+		# Redefine this method if drawing a stochastic action also gives the predicates and the terminal status of the state reached
+		# returns the stochastic action drawn, the mask of the predicates that hold on the state it leads to, and whether an execution ending in that state is terminal
+		# None stands for an unknown value, that is then obtained with getPredicatesMask or isExecutionTerminal
+		mdpStochasticAction = self.drawStochasticAction(mdpState, mdpAction, quietInfoStr)
+		return mdpStochasticAction, None, None
 
 	# methods that can be redefined if needed
 	def consoleStr(self) -> str:
 		return str(self)
 	def replayConsoleStr(self, mdpState: TMDPState) -> str:
 		return str(self)
+	def forConsumer(self: TMDPOperations, consumer: str) -> TMDPOperations:
+		# Redefine this method if the operations keep resources (a simulator, etc) that should not be shared between consumers
+		# returns operations on the same MDP, for the use of consumer (CONSUMER_SELECTION, CONSUMER_SIMULATION, etc)
+		return self
+	def setSeed(self, seed: int) -> None:
+		# Redefine this method if the MDP is drawn from another random generator than the module random
+		# seeds the random generators of the operations, so that processes given different seeds draw different transitions
+		pass
 	def getAllPredicates(self) -> List[TMDPPredicate]:
 		mdpPredicates: List[TMDPPredicate] = []
 		# list all predicates available, true or false
@@ -429,6 +528,15 @@ class MDPOperationsInterface(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPS
 		# list all predicates that hold on mdpState
 		# mdpPredicates.append(MDPPredicateInterface())
 		return mdpPredicates
+	def getPredicateTable(self) -> MDPPredicateTable[TMDPPredicate]:
+		# returns the table in which the masks of the predicates of this MDP are encoded, created on first use.
+		# Copies of the operations (deepCopy, forConsumer) should share it, by copying the attribute predicateTable
+		if self.predicateTable is None:
+			self.predicateTable = MDPPredicateTable()
+		return self.predicateTable
+	def getPredicatesMask(self, mdpState: TMDPState) -> int:
+		# Redefine this method if the mask of the predicates that hold on mdpState can be obtained without building them
+		return self.getPredicateTable().getMask(self.getPredicates(mdpState))
 	def isExecutionTerminal(self, mdpExecution: MDPExecution[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> bool:
 		# Redefine this method if you want a notion of terminal state/path
 		isTerminal = False
@@ -2,8 +2,12 @@
 
 import math
 import random, sys, time, curses
+import multiprocessing, queue, array
+import os, json, importlib
+import numpy as np
+from multiprocessing import shared_memory
 
-from typing import TypeVar, Type, Any, Optional, Sequence, List, Tuple, Dict, Union, Generic, NoReturn
+from typing import TypeVar, Type, Any, Optional, Sequence, Mapping, List, Tuple, Dict, Union, Generic, NoReturn
 
 import util
 from util import raiseNotDefined, NoMoveException
@@ -20,6 +24,8 @@ class MDPExecutionEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoch
 		self.mdpOperations = mdpOperations # an MDPOperations instance
 		self.mdpExecution = mdpExecution # an MDPExecution instance
 		self.nonDecisionLength = nonDecisionLength # counts only non-decision states in the path length
+		self.lastStep: Optional[Tuple[MDPTransition[TMDPAction, TMDPStochasticAction], Optional[int], Optional[bool]]] = None # last transition drawn by drawTransition, with the predicates mask and terminal status returned by mdpOperations.step
+		mdpExecution.usePredicateTable(mdpOperations.getPredicateTable()) # the masks appended come from mdpOperations
 	def deepCopy(self) -> "MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
 		return MDPExecutionEngine(self.mdpOperations.deepCopy(),self.mdpExecution.deepCopy(),self.nonDecisionLength)
 	def __str__(self) -> str:
@@ -28,6 +34,15 @@ class MDPExecutionEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoch
 		return self.mdpExecution[item]
 	def consoleStr(self) -> str:
 		return self.mdpOperations.consoleStr()+"\n"+self.mdpExecution.consoleStr()
+	def forConsumer(self, consumer: str) -> "MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		"""
+		engine on the same execution, with the operations of consumer (see MDPOperationsInterface.forConsumer).
+		The execution is shared, but not the decision length, so the returned engine should be used until the execution is reset.
+		"""
+		mdpOperations = self.mdpOperations.forConsumer(consumer)
+		if mdpOperations is self.mdpOperations:
+			return self
+		return MDPExecutionEngine(mdpOperations,self.mdpExecution,self.nonDecisionLength)
 	def executionCopy(self) -> "MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
 		"""!
 		half-shallow copy of an MDPExecutionEngine instance. Can be used to run independent executions on the same MDP.
@@ -42,6 +57,12 @@ class MDPExecutionEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoch
 		isTerminal = self.mdpExecution.isTerminal
 		if isTerminal:
 			raise Exception("applying transition to terminal execution")
+		# predicates and terminal status given by mdpOperations.step when the transition was drawn by drawTransition
+		mdpPredicatesMaskStep: Optional[int] = None
+		isTerminalStep: Optional[bool] = None
+		if self.lastStep is not None and self.lastStep[0] is mdpTransition:
+			_, mdpPredicatesMaskStep, isTerminalStep = self.lastStep
+		self.lastStep = None
 		mdpState = self.mdpExecution.mdpEndState
 		# make changes to mdpState according to mdpTransition, and set mdpReward accordingly
 		mdpReward = self.mdpOperations.applyTransitionOnState(mdpState, mdpTransition)
@@ -50,11 +71,17 @@ class MDPExecutionEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoch
 		# d : float = mdpOperations.discountFactor
 		self.mdpExecution.discountFactor *= self.mdpOperations.discountFactor
 		self.mdpExecution.mdpPathReward += mdpReward * self.mdpExecution.discountFactor
-		mdpPredicates: List[TMDPPredicate] = self.mdpOperations.getPredicates(mdpState)
-		self.mdpExecution.append(mdpTransition, mdpPredicates)
+		if mdpPredicatesMaskStep is None:
+			mdpPredicatesMask = self.mdpOperations.getPredicatesMask(mdpState)
+		else:
+			mdpPredicatesMask = mdpPredicatesMaskStep
+		self.mdpExecution.append(mdpTransition, mdpPredicatesMask)
 		if not nonDecisionAction:
 			self.nonDecisionLength += 1
-		isTerminal = self.mdpOperations.isExecutionTerminal(self.mdpExecution)
+		if isTerminalStep is None:
+			isTerminal = self.mdpOperations.isExecutionTerminal(self.mdpExecution)
+		else:
+			isTerminal = isTerminalStep
 		self.mdpExecution.isTerminal = isTerminal
 		if isTerminal:
 			self.mdpExecution.mdpPathReward += self.mdpOperations.getTerminalReward(self.mdpExecution)
@@ -64,6 +91,9 @@ class MDPExecutionEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoch
 	# returns a list of lists of predicates where ith list contains all predicates in the ith state of the path
 	def getPredicatesSequence(self) -> List[List[TMDPPredicate]]:
 		return self.mdpExecution.mdpPath.mdpPredicatesSequence
+	# returns the mask (see MDPPredicateTable) of the predicates of the last state of the path
+	def lastPredicatesMask(self) -> int:
+		return self.mdpExecution.mdpPath.lastPredicatesMask()
 	def appendPath(self, mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> None:
 		for i in range(mdpPath.length()):
 			self.append(mdpPath.mdpTransitionsSequence[i])
@@ -95,12 +125,15 @@ class MDPExecutionEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoch
 	def mdpPathReward(self) -> float:
 		return self.mdpExecution.mdpPathReward
 	def result(self) -> List[TMDPPredicate]:
-		return(self.mdpExecution.mdpPath.mdpPredicatesSequence[-1])
+		mdpPath = self.mdpExecution.mdpPath
+		return mdpPath.predicateTable.getPredicates(mdpPath.lastPredicatesMask())
 	def isTerminal(self) -> bool:
 		return self.mdpExecution.isTerminal
 	def drawTransition(self, mdpAction: TMDPAction, quietInfoStr: bool) -> MDPTransition[TMDPAction, TMDPStochasticAction]:
-		mdpStochasticAction: TMDPStochasticAction = self.mdpOperations.drawStochasticAction(self.mdpExecution.mdpEndState,mdpAction, quietInfoStr)
-		return MDPTransition(mdpAction,mdpStochasticAction)
+		mdpStochasticAction, mdpPredicatesMask, isTerminal = self.mdpOperations.step(self.mdpExecution.mdpEndState,mdpAction, quietInfoStr)
+		mdpTransition = MDPTransition(mdpAction,mdpStochasticAction)
+		self.lastStep = (mdpTransition, mdpPredicatesMask, isTerminal) # used by append if mdpTransition is appended next
+		return mdpTransition
 
 
 class OptionsReplayEngine():
@@ -122,12 +155,11 @@ class MDPReplayEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochast
 	def __init__(self, mdpOperations: TMDPOperations, mdpReplayPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsReplayEngine) -> None:
 		isTerminal = (mdpReplayPath.length()==0)
 		initState = mdpReplayPath.mdpInitialState.deepCopy()
-		predicatesSequence = [ [ p.deepCopy() for p in mdpReplayPath.mdpPredicatesSequence[0] ] ]
 		endState = initState.deepCopy()
-		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],predicatesSequence)
+		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath.fromMasks(initState,[],mdpReplayPath.mdpPredicatesMasks[:1],mdpReplayPath.predicateTable)
 		mdpExecution: MDPExecution[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPExecution(mdpPath,endState,0,isTerminal,1)
 
-		self.mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPExecutionEngine(mdpOperations,mdpExecution,0) # an ExecutionEngine instance used to replay the decisions of mdpPath
+		self.mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPExecutionEngine(mdpOperations.forConsumer(CONSUMER_REPLAY),mdpExecution,0) # an ExecutionEngine instance used to replay the decisions of mdpPath
 		self.mdpPath = mdpReplayPath # an MDPPath instance
 
 		self.quiet = options.quiet
@@ -302,6 +334,7 @@ class MDPActionAdviceInterface(Generic[TMDPPredicate, TMDPState, TMDPAction, TMD
 	"""
 	TMDPOperations = TypeVar("TMDPOperations",bound=MDPOperationsInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPActionAdvice = TypeVar("TMDPActionAdvice",bound="MDPActionAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]")
+	allowsAllActions: bool = False # set to True in advices that always return all legal actions, so that engines can skip calling them
 	def __init__(self) -> None:
 		pass
 	def deepCopy(self: TMDPActionAdvice) -> TMDPActionAdvice:
@@ -363,6 +396,7 @@ class MDPFullActionAdvice( MDPActionAdviceInterface[TMDPPredicate, TMDPState, TM
 	A trivial advice that allow everything
 	"""
 	TMDPOperations = TypeVar("TMDPOperations",bound=MDPOperationsInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
+	allowsAllActions: bool = True
 	def getMDPActionAdvice(self, mdpState: TMDPState, mdpOperations: TMDPOperations, quietInfoStr: bool) -> List[TMDPAction]:
 		"""
 		The strategy will receive an MDPOperations instance and
@@ -446,7 +480,7 @@ class OptionsSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDP
 	TMDPActionAdvice = TypeVar("TMDPActionAdvice",bound=MDPActionAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPPathAdvice = TypeVar("TMDPPathAdvice",bound=MDPPathAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPStateScore = TypeVar("TMDPStateScore",bound=MDPStateScoreInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
-	def __init__(self, horizon: int, ignoreNonDecisionStates: bool, mdpActionStrategy: TMDPActionStrategy, mdpActionAdvice: TMDPActionAdvice, mdpPathAdvice: TMDPPathAdvice, mdpStateScore: TMDPStateScore, alpha: float, rejectFactor: int, quiet: bool, quietInfoStr: bool, printEachStep: bool, printCompact: bool) -> None:
+	def __init__(self, horizon: int, ignoreNonDecisionStates: bool, mdpActionStrategy: TMDPActionStrategy, mdpActionAdvice: TMDPActionAdvice, mdpPathAdvice: TMDPPathAdvice, mdpStateScore: TMDPStateScore, alpha: float, rejectFactor: int, quiet: bool, quietInfoStr: bool, printEachStep: bool, printCompact: bool, simulationEngineClass: Optional[type] = None, consumer: str = CONSUMER_SIMULATION, numWorkers: int = 1) -> None:
 		self.horizon = horizon # horizon for the simulations
 		self.ignoreNonDecisionStates = ignoreNonDecisionStates # if true, we only count states with multiple available actions for horizon purposes
 		self.mdpActionStrategy = mdpActionStrategy # an action strategy
@@ -459,8 +493,11 @@ class OptionsSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDP
 		self.quietInfoStr = quietInfoStr
 		self.printEachStep = printEachStep
 		self.printCompact = printCompact
+		self.simulationEngineClass = (simulationEngineClass if not simulationEngineClass is None else MDPSimulationEngine) # the class of the engines that MCTS uses to draw simulations
+		self.consumer = consumer # the consumer of MDPOperations that draws the transitions of the simulations
+		self.numWorkers = numWorkers # number of worker processes of MDPParallelSimulationEngine
 	def deepCopy(self) -> "OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
-		return OptionsSimulationEngine(horizon = self.horizon, ignoreNonDecisionStates = self.ignoreNonDecisionStates, mdpActionStrategy = self.mdpActionStrategy.deepCopy(), mdpActionAdvice = self.mdpActionAdvice.deepCopy(), mdpPathAdvice = self.mdpPathAdvice.deepCopy(), rejectFactor = self.rejectFactor, mdpStateScore = self.mdpStateScore.deepCopy(), alpha = self.alpha, quiet = self.quiet, quietInfoStr = self.quietInfoStr, printEachStep=self.printEachStep, printCompact=self.printCompact)
+		return OptionsSimulationEngine(horizon = self.horizon, ignoreNonDecisionStates = self.ignoreNonDecisionStates, mdpActionStrategy = self.mdpActionStrategy.deepCopy(), mdpActionAdvice = self.mdpActionAdvice.deepCopy(), mdpPathAdvice = self.mdpPathAdvice.deepCopy(), rejectFactor = self.rejectFactor, mdpStateScore = self.mdpStateScore.deepCopy(), alpha = self.alpha, quiet = self.quiet, quietInfoStr = self.quietInfoStr, printEachStep=self.printEachStep, printCompact=self.printCompact, simulationEngineClass=self.simulationEngineClass, consumer=self.consumer, numWorkers=self.numWorkers)
 
 class MDPSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
 	"""!
@@ -469,9 +506,11 @@ class MDPSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoc
 	The execution is sequentially extended and reset after each simulation,
 	Use execution.executionCopy() if running several MDPSimulationEngine instances in parallel
 	to give independent instances to the constructors.
+	Transitions are drawn with the operations of options.consumer, advice and scores get those of CONSUMER_ADVICE and CONSUMER_SCORING.
 	"""
 	def __init__(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> None:
-		self.mdpExecutionEngine = mdpExecutionEngine # an ExecutionEngine instance used to play the new decisions
+		self.mdpExecutionEngine = mdpExecutionEngine.forConsumer(options.consumer) # an ExecutionEngine instance used to play the new decisions
+		self.mdpOperationsAdvice = self.mdpExecutionEngine.mdpOperations.forConsumer(CONSUMER_ADVICE) # operations given to the action advice
 		self.horizon = options.horizon # horizon for the simulations
 		self.ignoreNonDecisionStates = options.ignoreNonDecisionStates # if true, we only count states with multiple available actions for horizon purposes
 		self.mdpActionStrategy = options.mdpActionStrategy # an action strategy
@@ -487,7 +526,7 @@ class MDPSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoc
 
 	def _getMDPAction(self) -> TMDPAction:
 		nonDecisionAction = False
-		mdpActions, mdpActionsFull = self.mdpActionAdvice.getMDPActionAdvice(self.mdpExecutionEngine.mdpEndState(), self.mdpExecutionEngine.mdpOperations,self.quietInfoStr)
+		mdpActions, mdpActionsFull = self.mdpActionAdvice.getMDPActionAdvice(self.mdpExecutionEngine.mdpEndState(), self.mdpOperationsAdvice,self.quietInfoStr)
 		if self.ignoreNonDecisionStates and len(mdpActionsFull) <= 1:
 			nonDecisionAction = True
 		mdpAction = self.mdpActionStrategy.getMDPActionInSubset(mdpActions,self.mdpExecutionEngine.mdpEndState(), self.mdpExecutionEngine.mdpOperations,self.quietInfoStr)
@@ -561,10 +600,10 @@ class MDPSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoc
 				# if not self.quiet: print("running simulation for depth",self.horizon,"from",self.mdpExecutionEngine.stateConsoleStr())
 				self._runSimulation(timeI,timeIReal)
 
-				if self.mdpPathAdvice.isValidPath(self.mdpExecutionEngine):
+				if self.mdpPathAdvice.isValidPath(self.mdpExecutionEngine.forConsumer(CONSUMER_ADVICE)):
 					mdpExecutionEngine = self.mdpExecutionEngine.executionCopy()
 					mdpPathReward=mdpExecutionEngine.mdpPathReward()
-					stateScore=self.mdpStateScore.getScore(mdpExecutionEngine)
+					stateScore=self.mdpStateScore.getScore(mdpExecutionEngine.forConsumer(CONSUMER_SCORING))
 					mdpReward = (1-self.alpha)*mdpPathReward + self.alpha*stateScore
 					results.append((mdpExecutionEngine,mdpReward,1))
 					numResults += 1
@@ -580,7 +619,7 @@ class MDPSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoc
 		else:
 			mdpExecutionEngine = self.mdpExecutionEngine.executionCopy()
 			mdpPathReward=mdpExecutionEngine.mdpPathReward()
-			stateScore=self.mdpStateScore.getScore(mdpExecutionEngine)
+			stateScore=self.mdpStateScore.getScore(mdpExecutionEngine.forConsumer(CONSUMER_SCORING))
 			mdpReward = (1-self.alpha)*mdpPathReward + self.alpha*stateScore
 			results=[(mdpExecutionEngine,mdpReward,numSims)]
 			if not self.quiet: #and not self.printEachStep:
@@ -613,32 +652,94 @@ class MDPSimulationEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStoc
 		return mdpRewardEstimates
 
 
-class MDPMCTSNode(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+_simulationWorkerData: Dict[str, Any] = {} # the operations of a worker process of MDPParallelSimulationEngine
+
+def _initSimulationWorker(mdpOperations: Any) -> None:
+	_simulationWorkerData['mdpOperations'] = mdpOperations
+
+def _runSimulationWorker(mdpExecution: MDPExecution, nonDecisionLength: int, options: OptionsSimulationEngine, numSims: int, seed: int) -> Tuple[float, int]:
 	"""!
-	a node in the mcts tree
+	Draws numSims simulations that extend mdpExecution in a worker process
+	@return the sum of the rewards of the valid simulations, and their number
 	"""
-	def __init__(self, mdpState: TMDPState, mdpParentNode: "Optional[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]", mdpParentTransition: Optional[MDPTransition[TMDPAction, TMDPStochasticAction]], depth: int, legalActions: List[TMDPAction], nonDecisionAction : bool) -> None:
-		self.mdpState = mdpState # a MDPState instance
-		self.mdpParentNode = mdpParentNode # an MDPMCTSNode
-		self.mdpParentTransition = mdpParentTransition # a MDPTransition that leads from mdpParentNode to self
-		self.depth = depth # depth of current node
-		self.legalActions = legalActions # list of available actions from this node
-		self.numVisits = 0 # MCTS counter
-		self.totalScore = 0.0 # MCTS counter
-		self.children: "Dict[TMDPAction, List[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]]"  = {} # maps an action to a list of children MDPMCTSNodes
-		self.actionVisits: Dict[TMDPAction, int] = {}
-		self.actionScore: Dict[TMDPAction, float] = {}
-		self.nonDecisionAction = nonDecisionAction
+	random.seed(seed)
+	mdpOperations = _simulationWorkerData['mdpOperations']
+	mdpOperations.setSeed(seed)
+	simEngine: MDPSimulationEngine = MDPSimulationEngine(MDPExecutionEngine(mdpOperations,mdpExecution,nonDecisionLength), options)
+	rewardSum = 0.0
+	numValid = 0
+	for mdpExecutionEngineS,rewardS,numS in simEngine.getSimulations(numSims):
+		rewardSum += rewardS*numS
+		numValid += numS
+	return rewardSum, numValid
+
+class MDPParallelSimulationEngine(MDPSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	MDPSimulationEngine that splits the simulations of getSimulationReward between options.numWorkers worker processes (leaf parallelization).
+	The execution is pickled to the workers, that extend it with their own simulator and only return reward sums and numbers of valid simulations.
+	Each worker tries rejectFactor times its share of simulations.
+	The workers are started by the first call and kept until closeWorkers().
+	In a worker process itself (for instance a worker of MDPMCTSActionStrategy), simulations are drawn sequentially.
+	"""
+	workerPool: Optional[Any] = None # the worker processes, shared by all the instances
+
+	def __init__(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> None:
+		super().__init__(mdpExecutionEngine, options)
+		self.options = options # sent to the workers
+		self.numWorkers = options.numWorkers
 
 	@classmethod
-	def rootFromExec(cls, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], legalActions: List[TMDPAction], nonDecisionAction : bool) -> "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
-		if mdpExecutionEngine.length(ignoreNonDecisionStates = False)>0:
-			raise Exception("bad MCTS root")
-		mdpState = mdpExecutionEngine.mdpEndState().deepCopy()
-		mdpParentNode = None
-		mdpParentTransition = None
-		depth = 0
-		return cls(mdpState, mdpParentNode, mdpParentTransition, depth, legalActions, nonDecisionAction)
+	def closeWorkers(cls) -> None:
+		if not cls.workerPool is None:
+			cls.workerPool.terminate()
+			cls.workerPool.join()
+			cls.workerPool = None
+
+	def getSimulationReward(self, numSims: int) -> Optional[float]:
+		if self.numWorkers <= 1 or multiprocessing.current_process().daemon:
+			return super().getSimulationReward(numSims)
+		if numSims<=0:
+			raise Exception("zero simulations is not enough")
+		if MDPParallelSimulationEngine.workerPool is None:
+			context = multiprocessing.get_context("spawn")
+			MDPParallelSimulationEngine.workerPool = context.Pool(self.numWorkers, initializer=_initSimulationWorker, initargs=(self.mdpExecutionEngine.mdpOperations,))
+		numTasks = min(self.numWorkers, numSims)
+		tasks = []
+		for i in range(numTasks):
+			numSimsTask = numSims // numTasks + (1 if i < numSims % numTasks else 0)
+			tasks.append((self.mdpExecutionEngine.mdpExecution, self.mdpExecutionEngine.nonDecisionLength, self.options, numSimsTask, random.getrandbits(31)))
+		mdpRewardEstimates = 0.0
+		numSelect = 0
+		for rewardSum, numValid in MDPParallelSimulationEngine.workerPool.starmap(_runSimulationWorker, tasks):
+			mdpRewardEstimates += rewardSum
+			numSelect += numValid
+		if numSelect!=numSims:
+			if not self.quiet: print("found",numSelect,"valid simulations out of",numSims)
+			return None
+		return mdpRewardEstimates / numSelect
+
+
+class MDPMCTSNodeInterface(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	The fields of a node of an mcts tree shared by MDPMCTSNode and MDPMCTSNodeView, for the code that walks trees (reuse, printing, root rewards, checkpoints)
+	"""
+	mdpState: TMDPState # a MDPState instance
+	mdpParentNode: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" # None at the root of the tree
+	mdpParentTransition: Optional[MDPTransition[TMDPAction, TMDPStochasticAction]] # a MDPTransition that leads from mdpParentNode to self
+	depth: int # depth of the node
+	legalActions: List[TMDPAction] # list of available actions from this node
+	numVisits: int # MCTS counter
+	totalScore: float # MCTS counter
+	nonDecisionAction: bool
+	children: "Mapping[TMDPAction, Sequence[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]]" # maps an action to the children it led to
+	actionVisits: Mapping[TMDPAction, int] # MCTS counter of each action played from the node
+	actionScore: Mapping[TMDPAction, float] # MCTS counter of each action played from the node
+
+	def makeRoot(self, legalActions: List[TMDPAction], nonDecisionAction : bool, scoreOffset: float = 0.0, scoreScale: float = 1.0) -> None:
+		"""!
+		Detaches the node from its parent, so that its subtree and statistics can be reused by a new search from its state, see MDPMCTSNode.makeRoot
+		"""
+		raiseNotDefined()
 
 	def __str__(self) -> str:
 		strSelf = '\nNode: '+str(hash(self))
@@ -690,12 +791,580 @@ class MDPMCTSNode(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAc
 		return ('\n'+tab+'================'+strPrint +tab+'================\n')
 
 
+class MDPMCTSNode(MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	a node in the mcts tree
+	"""
+	def __init__(self, mdpState: TMDPState, mdpParentNode: "Optional[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]", mdpParentTransition: Optional[MDPTransition[TMDPAction, TMDPStochasticAction]], depth: int, legalActions: List[TMDPAction], nonDecisionAction : bool) -> None:
+		self.mdpState = mdpState # a MDPState instance
+		self.mdpParentNode = mdpParentNode # an MDPMCTSNode
+		self.mdpParentTransition = mdpParentTransition # a MDPTransition that leads from mdpParentNode to self
+		self.depth = depth # depth of current node
+		self.legalActions = legalActions # list of available actions from this node
+		self.numVisits = 0 # MCTS counter
+		self.totalScore = 0.0 # MCTS counter
+		self.children: "Dict[TMDPAction, List[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]]"  = {} # maps an action to a list of children MDPMCTSNodes
+		self.childIndex: "Dict[MDPTransition[TMDPAction, TMDPStochasticAction], MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" = {} # maps a transition (action and stochastic action) to the child it leads to
+		self.actionVisits: Dict[TMDPAction, int] = {}
+		self.actionScore: Dict[TMDPAction, float] = {}
+		self.legalVisits: List[float] = [0] * len(legalActions) # actionVisits of each legal action, in the order of legalActions
+		self.legalScores: List[float] = [0.0] * len(legalActions) # actionScore of each legal action, in the order of legalActions
+		self.nonDecisionAction = nonDecisionAction
+		self.lastVisit = 0 # value of MCTSEngine.iterationClock when a path through the node was last selected, only kept with a node budget
+
+	@classmethod
+	def rootFromExec(cls, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], legalActions: List[TMDPAction], nonDecisionAction : bool) -> "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		if mdpExecutionEngine.length(ignoreNonDecisionStates = False)>0:
+			raise Exception("bad MCTS root")
+		mdpState = mdpExecutionEngine.mdpEndState().deepCopy()
+		mdpParentNode = None
+		mdpParentTransition = None
+		depth = 0
+		return cls(mdpState, mdpParentNode, mdpParentTransition, depth, legalActions, nonDecisionAction)
+
+	def indexActionStatistics(self) -> None:
+		"""!
+		Copies actionVisits and actionScore to legalVisits and legalScores, after they are changed other than by MCTSEngine._backpropagate
+		"""
+		self.legalVisits = [self.actionVisits.get(action, 0) for action in self.legalActions]
+		self.legalScores = [self.actionScore.get(action, 0.0) for action in self.legalActions]
+
+	def getNumBytes(self) -> int:
+		"""!
+		@return an approximation of the memory held by the node: its state, parent transition, legal actions, dictionaries and lists, without its children
+		"""
+		numBytes = _getObjectNumBytes(self) + _getObjectNumBytes(self.mdpState)
+		if not self.mdpParentTransition is None:
+			numBytes += _getObjectNumBytes(self.mdpParentTransition) + _getObjectNumBytes(self.mdpParentTransition.mdpAction) + _getObjectNumBytes(self.mdpParentTransition.mdpStochasticAction)
+		numBytes += sum(_getObjectNumBytes(action) for action in self.legalActions)
+		numBytes += sum(sys.getsizeof(values) for values in [self.legalActions, self.children, self.childIndex, self.actionVisits, self.actionScore, self.legalVisits, self.legalScores])
+		return numBytes + sum(sys.getsizeof(children) for children in self.children.values())
+
+	def collapse(self) -> int:
+		"""!
+		Drops the children of the node, which keeps its statistics and those of its actions, and becomes a leaf of the tree.
+		The children are created again if a later selection draws their transitions.
+		@return the number of nodes dropped with the subtree, including the nodes still reachable from other parents through transpositions
+		"""
+		numNodes = 0
+		nodes = [self]
+		visited = set(nodes)
+		while len(nodes) > 0:
+			node = nodes.pop()
+			for children in node.children.values():
+				for child in children:
+					if not child in visited:
+						visited.add(child)
+						nodes.append(child)
+						numNodes += 1
+		self.children = {}
+		self.childIndex = {}
+		return numNodes
+
+	def makeRoot(self, legalActions: List[TMDPAction], nonDecisionAction : bool, scoreOffset: float = 0.0, scoreScale: float = 1.0) -> None:
+		"""!
+		Detaches the node from its parent, so that its subtree and statistics can be reused by a new search from its state.
+		The root advice may allow fewer actions than the advice used inside the tree: the statistics of the other actions are dropped.
+		The scores of the subtree, measured from the previous root, are mapped to (score - scoreOffset) * scoreScale for each visit.
+		The subtree may be a DAG if the previous search used transpositions: each node is mapped once.
+		"""
+		self.mdpParentNode = None
+		self.mdpParentTransition = None
+		self.legalActions = legalActions
+		self.nonDecisionAction = nonDecisionAction
+		for action in list(self.children.keys()):
+			if not action in legalActions:
+				self.numVisits -= self.actionVisits.pop(action)
+				self.totalScore -= self.actionScore.pop(action)
+				del self.children[action]
+				for mdpTransition in [t for t in self.childIndex if t.mdpAction == action]:
+					del self.childIndex[mdpTransition]
+		depthShift = self.depth
+		nodes = [self]
+		visited = set(nodes)
+		while len(nodes) > 0:
+			node = nodes.pop()
+			node.depth -= depthShift
+			node.totalScore = (node.totalScore - scoreOffset * node.numVisits) * scoreScale
+			for action in node.actionScore:
+				node.actionScore[action] = (node.actionScore[action] - scoreOffset * node.actionVisits[action]) * scoreScale
+			node.indexActionStatistics()
+			for children in node.children.values():
+				for child in children:
+					if not child in visited:
+						visited.add(child)
+						nodes.append(child)
+
+def _getObjectNumBytes(value: object) -> int:
+	"""!
+	@return the size of value and of its attribute dictionary, without the objects they refer to
+	"""
+	if hasattr(value, '__dict__'):
+		return sys.getsizeof(value) + sys.getsizeof(value.__dict__)
+	return sys.getsizeof(value)
+
+def _encodeFileStrs(values: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""!
+	Writes each distinct value of values once, with fileStr
+	@return the index of the string of each value (-1 for None), the offsets of the strings (one more than the strings), and their UTF-8 bytes
+	"""
+	stringIndex: Dict[str, int] = {}
+	indices = np.zeros(len(values), dtype=np.int32)
+	for i, value in enumerate(values):
+		indices[i] = (-1 if value is None else stringIndex.setdefault(value.fileStr(), len(stringIndex)))
+	encoded = [string.encode() for string in stringIndex]
+	offsets = np.zeros(len(encoded)+1, dtype=np.int64)
+	offsets[1:] = np.cumsum([len(string) for string in encoded], dtype=np.int64)
+	return indices, offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+def _decodeFileStrs(indices: np.ndarray, offsets: np.ndarray, data: np.ndarray, cls: Any) -> List[Any]:
+	"""!
+	Reads the values written by _encodeFileStrs with cls.fromFileStr: equal values are the same object
+	"""
+	distinct = [cls.fromFileStr(data[offsets[i]:offsets[i+1]].tobytes().decode()) for i in range(len(offsets)-1)]
+	return [(None if index < 0 else distinct[index]) for index in indices]
+
+def _getClassName(value: Any) -> Optional[str]:
+	return (None if value is None else type(value).__module__+'.'+type(value).__qualname__)
+
+def _getClass(className: str) -> Any:
+	moduleName, _, name = className.rpartition('.')
+	return getattr(importlib.import_module(moduleName), name)
+
+def _growArray(values: np.ndarray, capacity: int) -> np.ndarray:
+	grown = np.zeros(capacity, dtype=values.dtype)
+	grown[:len(values)] = values
+	return grown
+
+class MDPMCTSTree(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	An mcts tree stored as a structure of arrays, used by ArrayMCTSEngine.
+	Nodes and edges are integer IDs. The edges of a node are its legal actions,
+	in a range of consecutive IDs allocated with the node. The children of an edge are in a range of consecutive slots of childNodes,
+	and are found from their stochastic action with a hash map. A full range grows to twice its slots at the end of childNodes:
+	a range elsewhere is moved there and leaves its former slots unused. The trees built by subtree and fromNode, which add the children of an edge together, only have unused slots at the end of childNodes.
+	Visits, scores and links are in NumPy arrays that double their capacity when full;
+	the states, the stochastic actions that lead to the nodes, and the actions of the edges are in lists.
+	The actions are shared by the edges of the same action, and the parent transition of a node is only built by MDPMCTSNodeView.
+	MDPMCTSNodeView gives the interface of MDPMCTSNode on a node.
+	A tree is saved to a binary file with save, and load maps the arrays of the file in memory.
+	"""
+	NODE_ARRAYS = ['nodeParentEdge', 'nodeDepth', 'nodeVisits', 'nodeScore', 'nodeNonDecision', 'nodeFirstEdge', 'nodeNumEdges']
+	EDGE_ARRAYS = ['edgeNode', 'edgeVisits', 'edgeScore', 'edgeFirstChild', 'edgeNumChildren', 'edgeChildCapacity']
+	CHILD_ARRAYS = ['childNodes']
+	FILE_MAGIC = b"MCTSTREE2\n" # first bytes of a file written by save, with the version of the format
+	FILE_ALIGNMENT = 8 # the arrays of a file start at a multiple of FILE_ALIGNMENT bytes
+	def __init__(self, capacity: int = 64) -> None:
+		self.numNodes = 0
+		self.numEdges = 0
+		self.numChildSlots = 0
+		self.lastChildEdge = -1 # edge whose range of children ends at numChildSlots, -1 if unknown
+		# nodes
+		self.nodeParentEdge = np.zeros(capacity, dtype=np.int32) # edge that leads to the node, -1 for the root
+		self.nodeDepth = np.zeros(capacity, dtype=np.int32)
+		self.nodeVisits = np.zeros(capacity, dtype=np.int32) # MCTS counter
+		self.nodeScore = np.zeros(capacity, dtype=np.float64) # MCTS counter
+		self.nodeNonDecision = np.zeros(capacity, dtype=np.bool_)
+		self.nodeFirstEdge = np.zeros(capacity, dtype=np.int32) # the edges of the node are nodeFirstEdge, ..., nodeFirstEdge+nodeNumEdges-1
+		self.nodeNumEdges = np.zeros(capacity, dtype=np.int32)
+		self.nodeStates: List[TMDPState] = []
+		self.nodeOutcomes: List[Optional[TMDPStochasticAction]] = [] # stochastic action of the transition from the parent
+		# edges
+		self.edgeNode = np.zeros(capacity, dtype=np.int32) # node of the edge
+		self.edgeVisits = np.zeros(capacity, dtype=np.int32) # MCTS counter
+		self.edgeScore = np.zeros(capacity, dtype=np.float64) # MCTS counter
+		self.edgeFirstChild = np.zeros(capacity, dtype=np.int32) # the children of the edge are childNodes[edgeFirstChild], ..., childNodes[edgeFirstChild+edgeNumChildren-1]
+		self.edgeNumChildren = np.zeros(capacity, dtype=np.int32) # 0 if the action was never played
+		self.edgeChildCapacity = np.zeros(capacity, dtype=np.int32) # slots of childNodes reserved for the children of the edge
+		self.edgeActions: List[TMDPAction] = []
+		# children
+		self.childNodes = np.zeros(capacity, dtype=np.int32)
+		self.childIndex: Dict[Tuple[int, TMDPStochasticAction], int] = {} # maps an edge and a stochastic action to the child they lead to
+		self.actionTable: Dict[TMDPAction, TMDPAction] = {} # the action shared by the edges equal to it
+
+	def _reserve(self, numNodes: int, numEdges: int) -> None:
+		capacity = len(self.nodeVisits)
+		if numNodes > capacity:
+			while numNodes > capacity:
+				capacity *= 2
+			for name in MDPMCTSTree.NODE_ARRAYS:
+				setattr(self, name, _growArray(getattr(self, name), capacity))
+		capacity = len(self.edgeVisits)
+		if numEdges > capacity:
+			while numEdges > capacity:
+				capacity *= 2
+			for name in MDPMCTSTree.EDGE_ARRAYS:
+				setattr(self, name, _growArray(getattr(self, name), capacity))
+
+	def _addChild(self, edge: int, node: int) -> None:
+		"""!
+		Appends node to the children of edge. If their range is full, it doubles at the end of childNodes, where the children are moved
+		unless they are already there, and the range that was there gives back its unused slots
+		"""
+		firstChild = int(self.edgeFirstChild[edge])
+		numChildren = int(self.edgeNumChildren[edge])
+		capacity = int(self.edgeChildCapacity[edge])
+		if numChildren == capacity:
+			if edge != self.lastChildEdge: # the children are moved to the end of childNodes
+				if self.lastChildEdge >= 0: # the range at the end of childNodes gives back its unused slots
+					lastEdge = self.lastChildEdge
+					self.edgeChildCapacity[lastEdge] = self.edgeNumChildren[lastEdge]
+					self.numChildSlots = int(self.edgeFirstChild[lastEdge] + self.edgeNumChildren[lastEdge])
+				newFirstChild = self.numChildSlots
+				self.lastChildEdge = edge
+			else:
+				newFirstChild = firstChild # the range is at the end of childNodes and grows in place
+			capacity = max(1, 2 * capacity)
+			self.numChildSlots = newFirstChild + capacity
+			if self.numChildSlots > len(self.childNodes):
+				self.childNodes = _growArray(self.childNodes, max(self.numChildSlots, 2 * len(self.childNodes)))
+			if newFirstChild != firstChild:
+				self.childNodes[newFirstChild:newFirstChild+numChildren] = self.childNodes[firstChild:firstChild+numChildren]
+				self.edgeFirstChild[edge] = firstChild = newFirstChild
+			self.edgeChildCapacity[edge] = capacity
+		self.childNodes[firstChild+numChildren] = node
+		self.edgeNumChildren[edge] = numChildren + 1
+
+	def addNode(self, mdpState: TMDPState, parentEdge: int, mdpOutcome: Optional[TMDPStochasticAction], depth: int, legalActions: List[TMDPAction], nonDecisionAction: bool) -> int:
+		"""!
+		Adds a node with an edge for each legal action, as the last child of parentEdge
+		@return the ID of the node
+		"""
+		node = self.numNodes
+		firstEdge = self.numEdges
+		self._reserve(node+1, firstEdge+len(legalActions))
+		self.numNodes += 1
+		self.numEdges += len(legalActions)
+		self.nodeParentEdge[node] = parentEdge
+		self.nodeDepth[node] = depth
+		self.nodeVisits[node] = 0
+		self.nodeScore[node] = 0.0
+		self.nodeNonDecision[node] = nonDecisionAction
+		self.nodeFirstEdge[node] = firstEdge
+		self.nodeNumEdges[node] = len(legalActions)
+		self.nodeStates.append(mdpState)
+		self.nodeOutcomes.append(mdpOutcome)
+		edges = slice(firstEdge, self.numEdges)
+		self.edgeNode[edges] = node
+		self.edgeVisits[edges] = 0
+		self.edgeScore[edges] = 0.0
+		self.edgeFirstChild[edges] = 0
+		self.edgeNumChildren[edges] = 0
+		self.edgeChildCapacity[edges] = 0
+		for mdpAction in legalActions:
+			self.edgeActions.append(self.actionTable.setdefault(mdpAction, mdpAction))
+		if parentEdge >= 0:
+			self._addChild(parentEdge, node)
+			self.childIndex[(parentEdge, mdpOutcome)] = node
+		return node
+
+	def getEdges(self, node: int) -> range:
+		firstEdge = int(self.nodeFirstEdge[node])
+		return range(firstEdge, firstEdge+int(self.nodeNumEdges[node]))
+
+	def findEdge(self, node: int, mdpAction: TMDPAction) -> int:
+		"""!
+		@return the edge of mdpAction in node, -1 if it is not a legal action of node
+		"""
+		for edge in self.getEdges(node):
+			if self.edgeActions[edge] == mdpAction:
+				return edge
+		return -1
+
+	def isPlayed(self, edge: int) -> bool:
+		"""!
+		@return true if the action of edge was played: it has children, or visits kept without them by fromNode
+		"""
+		return self.edgeNumChildren[edge] > 0 or self.edgeVisits[edge] > 0
+
+	def getChildren(self, edge: int) -> List[int]:
+		firstChild = int(self.edgeFirstChild[edge])
+		return self.childNodes[firstChild:firstChild+int(self.edgeNumChildren[edge])].tolist()
+
+	def findChild(self, edge: int, mdpOutcome: TMDPStochasticAction) -> int:
+		"""!
+		@return the child of edge reached by mdpOutcome, -1 if it is not in the tree
+		"""
+		return self.childIndex.get((edge, mdpOutcome), -1)
+
+	def subtree(self, root: int, legalActions: List[TMDPAction], nonDecisionAction: bool, scoreOffset: float = 0.0, scoreScale: float = 1.0) -> "MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		"""!
+		Copies the subtree of root into a new tree, as in MDPMCTSNode.makeRoot.
+		The new root has an edge for each action of legalActions: the statistics of its other played actions are dropped.
+		The scores are mapped to (score - scoreOffset) * scoreScale for each visit.
+		"""
+		tree: MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPMCTSTree(max(64, self.numNodes))
+		depthShift = int(self.nodeDepth[root])
+		newRoot = tree.addNode(self.nodeStates[root], -1, None, 0, legalActions, nonDecisionAction)
+		tree.nodeVisits[newRoot] = self.nodeVisits[root]
+		tree.nodeScore[newRoot] = self.nodeScore[root]
+		for edge in self.getEdges(root):
+			if self.isPlayed(edge) and tree.findEdge(newRoot, self.edgeActions[edge]) < 0:
+				tree.nodeVisits[newRoot] -= self.edgeVisits[edge]
+				tree.nodeScore[newRoot] -= self.edgeScore[edge]
+		nodes = [(root, newRoot)]
+		while len(nodes) > 0:
+			node, newNode = nodes.pop()
+			for newEdge in tree.getEdges(newNode):
+				edge = (self.findEdge(node, tree.edgeActions[newEdge]) if node == root else self.nodeFirstEdge[node] + newEdge - tree.nodeFirstEdge[newNode])
+				if edge < 0:
+					continue
+				tree.edgeVisits[newEdge] = self.edgeVisits[edge]
+				tree.edgeScore[newEdge] = self.edgeScore[edge]
+				for child in self.getChildren(edge):
+					newChild = tree.addNode(self.nodeStates[child], newEdge, self.nodeOutcomes[child], int(self.nodeDepth[child]) - depthShift, [self.edgeActions[e] for e in self.getEdges(child)], bool(self.nodeNonDecision[child]))
+					tree.nodeVisits[newChild] = self.nodeVisits[child]
+					tree.nodeScore[newChild] = self.nodeScore[child]
+					nodes.append((child, newChild))
+		tree.nodeScore[:tree.numNodes] = (tree.nodeScore[:tree.numNodes] - scoreOffset * tree.nodeVisits[:tree.numNodes]) * scoreScale
+		tree.edgeScore[:tree.numEdges] = (tree.edgeScore[:tree.numEdges] - scoreOffset * tree.edgeVisits[:tree.numEdges]) * scoreScale
+		return tree
+
+	def getNumBytes(self) -> int:
+		"""!
+		@return the size of the arrays and lists, without the states, transitions and actions they refer to
+		"""
+		numBytes = sum(getattr(self, name).nbytes for name in MDPMCTSTree.NODE_ARRAYS + MDPMCTSTree.EDGE_ARRAYS + MDPMCTSTree.CHILD_ARRAYS)
+		return numBytes + sys.getsizeof(self.nodeStates) + sys.getsizeof(self.nodeOutcomes) + sys.getsizeof(self.edgeActions)
+
+	@classmethod
+	def fromNode(cls, root: MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], maxDepth: Optional[int] = None) -> "MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		"""!
+		Copies root and its subtree into a new tree, down to maxDepth transitions from root if it is not None.
+		The nodes at maxDepth keep the statistics of their actions without their children, as the nodes collapsed by MCTSEngine.
+		A node shared through transpositions is copied under each of its parents.
+		@param root an MDPMCTSNode or an MDPMCTSNodeView
+		"""
+		tree: MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = cls()
+		nodes = [(root, tree.addNode(root.mdpState, -1, None, 0, root.legalActions, root.nonDecisionAction))]
+		while len(nodes) > 0:
+			node, newNode = nodes.pop()
+			tree.nodeVisits[newNode] = node.numVisits
+			tree.nodeScore[newNode] = node.totalScore
+			depth = int(tree.nodeDepth[newNode])
+			actionVisits = node.actionVisits
+			actionScore = node.actionScore
+			children = node.children
+			for edge in tree.getEdges(newNode):
+				mdpAction = tree.edgeActions[edge]
+				if mdpAction in actionVisits:
+					tree.edgeVisits[edge] = actionVisits[mdpAction]
+					tree.edgeScore[edge] = actionScore[mdpAction]
+				if not maxDepth is None and depth >= maxDepth:
+					continue
+				for child in children.get(mdpAction, []):
+					if child.mdpParentTransition is None:
+						raise Exception("bad tree shape")
+					nodes.append((child, tree.addNode(child.mdpState, edge, child.mdpParentTransition.mdpStochasticAction, depth+1, child.legalActions, child.nonDecisionAction)))
+		return tree
+
+	def toNode(self, nodeId: int = 0) -> MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]:
+		"""!
+		@return a copy of the subtree of nodeId made of MDPMCTSNode objects, as built by MCTSEngine, with nodeId as root
+		"""
+		depthShift = int(self.nodeDepth[nodeId])
+		root: MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPMCTSNode(self.nodeStates[nodeId].deepCopy(), None, None, 0, [self.edgeActions[edge].deepCopy() for edge in self.getEdges(nodeId)], bool(self.nodeNonDecision[nodeId]))
+		nodes = [(nodeId, root)]
+		while len(nodes) > 0:
+			node, mctsNode = nodes.pop()
+			mctsNode.numVisits = int(self.nodeVisits[node])
+			mctsNode.totalScore = float(self.nodeScore[node])
+			for edge, mdpAction in zip(self.getEdges(node), mctsNode.legalActions):
+				if not self.isPlayed(edge):
+					continue
+				mctsNode.actionVisits[mdpAction] = int(self.edgeVisits[edge])
+				mctsNode.actionScore[mdpAction] = float(self.edgeScore[edge])
+				for child in self.getChildren(edge):
+					mdpOutcome = self.nodeOutcomes[child]
+					if mdpOutcome is None:
+						raise Exception("bad tree shape")
+					mdpParentTransition = MDPTransition(mdpAction.deepCopy(), mdpOutcome.deepCopy())
+					mctsChild = MDPMCTSNode(self.nodeStates[child].deepCopy(), mctsNode, mdpParentTransition, int(self.nodeDepth[child]) - depthShift, [self.edgeActions[e].deepCopy() for e in self.getEdges(child)], bool(self.nodeNonDecision[child]))
+					mctsNode.children.setdefault(mdpAction, []).append(mctsChild)
+					mctsNode.childIndex[mdpParentTransition] = mctsChild
+					nodes.append((child, mctsChild))
+			mctsNode.indexActionStatistics()
+		return root
+
+	def save(self, fileName: str, info: Dict[str, Any]) -> None:
+		"""!
+		Writes the tree to fileName: FILE_MAGIC, the length of a JSON header on 8 bytes, the header, and the arrays,
+		each starting at a multiple of FILE_ALIGNMENT bytes. The header gives the type, offset and length of each array,
+		the classes of the states and actions, and info, which must be JSON serializable.
+		Each distinct state, stochastic action and action is written once with fileStr, and the nodes and edges give the index of theirs.
+		The file is replaced at once, so that a tree loaded from the previous file keeps its memory map.
+		"""
+		arrays = {name: getattr(self, name)[:self.numNodes] for name in MDPMCTSTree.NODE_ARRAYS}
+		arrays.update({name: getattr(self, name)[:self.numEdges] for name in MDPMCTSTree.EDGE_ARRAYS})
+		arrays.update({name: getattr(self, name)[:self.numChildSlots] for name in MDPMCTSTree.CHILD_ARRAYS})
+		arrays['nodeState'], arrays['stateOffsets'], arrays['stateData'] = _encodeFileStrs(self.nodeStates)
+		arrays['nodeOutcome'], arrays['outcomeOffsets'], arrays['outcomeData'] = _encodeFileStrs(self.nodeOutcomes)
+		arrays['edgeAction'], arrays['actionOffsets'], arrays['actionData'] = _encodeFileStrs(self.edgeActions)
+		mdpOutcome = next((value for value in self.nodeOutcomes if not value is None), None)
+		header: Dict[str, Any] = {'numNodes': self.numNodes, 'numEdges': self.numEdges, 'numChildSlots': self.numChildSlots, 'info': info, 'arrays': {},
+			'classes': {'state': _getClassName(self.nodeStates[0]), 'outcome': _getClassName(mdpOutcome), 'action': _getClassName(self.edgeActions[0] if self.numEdges > 0 else None)}}
+		offset = 0
+		for name, values in arrays.items():
+			header['arrays'][name] = [values.dtype.str, offset, len(values)]
+			offset += -(-values.nbytes // MDPMCTSTree.FILE_ALIGNMENT) * MDPMCTSTree.FILE_ALIGNMENT
+		headerBytes = json.dumps(header).encode()
+		start = len(MDPMCTSTree.FILE_MAGIC) + 8 + len(headerBytes)
+		start = -(-start // MDPMCTSTree.FILE_ALIGNMENT) * MDPMCTSTree.FILE_ALIGNMENT
+		headerBytes += b' ' * (start - len(MDPMCTSTree.FILE_MAGIC) - 8 - len(headerBytes))
+		tmpFileName = fileName + '.tmp'
+		with open(tmpFileName, 'wb') as file:
+			file.write(MDPMCTSTree.FILE_MAGIC)
+			file.write(len(headerBytes).to_bytes(8, 'little'))
+			file.write(headerBytes)
+			for name, values in arrays.items():
+				file.seek(start + header['arrays'][name][1])
+				file.write(np.ascontiguousarray(values).tobytes())
+		os.replace(tmpFileName, fileName)
+
+	@classmethod
+	def load(cls, fileName: str) -> "Tuple[MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], Dict[str, Any]]":
+		"""!
+		Reads a tree written by save. The arrays of visits, scores and links are mapped copy-on-write from the file:
+		their pages are read when they are first accessed, and the changes made by a search stay in memory.
+		The states and actions are read at once, with the fromFileStr of the classes that wrote them.
+		@return the tree and the info given to save
+		"""
+		with open(fileName, 'rb') as file:
+			if file.read(len(MDPMCTSTree.FILE_MAGIC)) != MDPMCTSTree.FILE_MAGIC:
+				raise Exception("not an MCTS tree file, or one written by another version: "+fileName)
+			headerLength = int.from_bytes(file.read(8), 'little')
+			header = json.loads(file.read(headerLength).decode())
+		start = len(MDPMCTSTree.FILE_MAGIC) + 8 + headerLength
+		arrays = {}
+		for name, (dtype, offset, length) in header['arrays'].items():
+			if length == 0: # an empty array cannot be mapped
+				arrays[name] = np.zeros(0, dtype=np.dtype(dtype))
+			else:
+				arrays[name] = np.memmap(fileName, dtype=np.dtype(dtype), mode='c', offset=start+offset, shape=(length,))
+		tree: MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = cls()
+		tree.numNodes = header['numNodes']
+		tree.numEdges = header['numEdges']
+		tree.numChildSlots = header['numChildSlots']
+		for name in MDPMCTSTree.NODE_ARRAYS + MDPMCTSTree.EDGE_ARRAYS + MDPMCTSTree.CHILD_ARRAYS:
+			setattr(tree, name, arrays[name])
+		classes = header['classes']
+		tree.nodeStates = _decodeFileStrs(arrays['nodeState'], arrays['stateOffsets'], arrays['stateData'], _getClass(classes['state']))
+		tree.nodeOutcomes = (_decodeFileStrs(arrays['nodeOutcome'], arrays['outcomeOffsets'], arrays['outcomeData'], _getClass(classes['outcome'])) if not classes['outcome'] is None else [None] * tree.numNodes)
+		tree.edgeActions = (_decodeFileStrs(arrays['edgeAction'], arrays['actionOffsets'], arrays['actionData'], _getClass(classes['action'])) if not classes['action'] is None else [])
+		tree.actionTable = {mdpAction: mdpAction for mdpAction in tree.edgeActions}
+		tree.edgeActions = [tree.actionTable[mdpAction] for mdpAction in tree.edgeActions]
+		for node in range(1, tree.numNodes):
+			parentEdge = int(tree.nodeParentEdge[node])
+			if parentEdge >= 0:
+				tree.childIndex[(parentEdge, tree.nodeOutcomes[node])] = node
+		return tree, header['info']
+
+class MDPMCTSNodeView(MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	The interface of MDPMCTSNode on a node of an MDPMCTSTree, for the code that walks trees (reuse, printing, root rewards).
+	The statistics and children are read from the arrays at each access, and cannot be modified through the view, except by makeRoot.
+	"""
+	def __init__(self, tree: MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], nodeId: int) -> None:
+		self.tree = tree
+		self.nodeId = nodeId
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, MDPMCTSNodeView):
+			return NotImplemented
+		return self.tree is other.tree and self.nodeId == other.nodeId
+	def __hash__(self) -> int:
+		return hash((id(self.tree), self.nodeId))
+
+	def _readOnly(self, name: str) -> NoReturn:
+		raise Exception(name+" cannot be modified through an MDPMCTSNodeView, change the arrays of its MDPMCTSTree")
+
+	@property
+	def mdpState(self) -> TMDPState:
+		return self.tree.nodeStates[self.nodeId]
+	@mdpState.setter
+	def mdpState(self, value: TMDPState) -> None:
+		self._readOnly("mdpState")
+	@property
+	def mdpParentNode(self) -> "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]":
+		parentEdge = self.tree.nodeParentEdge[self.nodeId]
+		if parentEdge < 0:
+			return None
+		return MDPMCTSNodeView(self.tree, int(self.tree.edgeNode[parentEdge]))
+	@mdpParentNode.setter
+	def mdpParentNode(self, value: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]") -> None:
+		self._readOnly("mdpParentNode")
+	@property
+	def mdpParentTransition(self) -> Optional[MDPTransition[TMDPAction, TMDPStochasticAction]]:
+		mdpOutcome = self.tree.nodeOutcomes[self.nodeId]
+		if mdpOutcome is None:
+			return None
+		return MDPTransition(self.tree.edgeActions[self.tree.nodeParentEdge[self.nodeId]], mdpOutcome)
+	@mdpParentTransition.setter
+	def mdpParentTransition(self, value: Optional[MDPTransition[TMDPAction, TMDPStochasticAction]]) -> None:
+		self._readOnly("mdpParentTransition")
+	@property
+	def depth(self) -> int:
+		return int(self.tree.nodeDepth[self.nodeId])
+	@depth.setter
+	def depth(self, value: int) -> None:
+		self._readOnly("depth")
+	@property
+	def legalActions(self) -> List[TMDPAction]:
+		return [self.tree.edgeActions[edge] for edge in self.tree.getEdges(self.nodeId)]
+	@legalActions.setter
+	def legalActions(self, value: List[TMDPAction]) -> None:
+		self._readOnly("legalActions")
+	@property
+	def numVisits(self) -> int:
+		return int(self.tree.nodeVisits[self.nodeId])
+	@numVisits.setter
+	def numVisits(self, value: int) -> None:
+		self._readOnly("numVisits")
+	@property
+	def totalScore(self) -> float:
+		return float(self.tree.nodeScore[self.nodeId])
+	@totalScore.setter
+	def totalScore(self, value: float) -> None:
+		self._readOnly("totalScore")
+	@property
+	def nonDecisionAction(self) -> bool:
+		return bool(self.tree.nodeNonDecision[self.nodeId])
+	@nonDecisionAction.setter
+	def nonDecisionAction(self, value: bool) -> None:
+		self._readOnly("nonDecisionAction")
+	@property
+	def children(self) -> "Mapping[TMDPAction, Sequence[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]]":
+		return {self.tree.edgeActions[edge]: [MDPMCTSNodeView(self.tree, child) for child in self.tree.getChildren(edge)] for edge in self.tree.getEdges(self.nodeId) if self.tree.edgeNumChildren[edge] > 0}
+	@children.setter
+	def children(self, value: "Mapping[TMDPAction, Sequence[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]]") -> None:
+		self._readOnly("children")
+	@property
+	def actionVisits(self) -> Mapping[TMDPAction, int]:
+		return {self.tree.edgeActions[edge]: int(self.tree.edgeVisits[edge]) for edge in self.tree.getEdges(self.nodeId) if self.tree.isPlayed(edge)}
+	@actionVisits.setter
+	def actionVisits(self, value: Mapping[TMDPAction, int]) -> None:
+		self._readOnly("actionVisits")
+	@property
+	def actionScore(self) -> Mapping[TMDPAction, float]:
+		return {self.tree.edgeActions[edge]: float(self.tree.edgeScore[edge]) for edge in self.tree.getEdges(self.nodeId) if self.tree.isPlayed(edge)}
+	@actionScore.setter
+	def actionScore(self, value: Mapping[TMDPAction, float]) -> None:
+		self._readOnly("actionScore")
+
+	def makeRoot(self, legalActions: List[TMDPAction], nonDecisionAction : bool, scoreOffset: float = 0.0, scoreScale: float = 1.0) -> None:
+		"""!
+		Moves the view to the root of a copy of the subtree (see MDPMCTSTree.subtree), the rest of the tree is left to the garbage collector
+		"""
+		self.tree = self.tree.subtree(self.nodeId, legalActions, nonDecisionAction, scoreOffset, scoreScale)
+		self.nodeId = 0
+
+
 class OptionsMCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
 	TMDPActionStrategy = TypeVar("TMDPActionStrategy",bound=MDPActionStrategyInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPActionAdvice = TypeVar("TMDPActionAdvice",bound=MDPActionAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPPathAdvice = TypeVar("TMDPPathAdvice",bound=MDPPathAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPStateScore = TypeVar("TMDPStateScore",bound=MDPStateScoreInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
-	def __init__(self, horizon: int, ignoreNonDecisionStates : bool, mctsConstant: float, mdpActionStrategy: TMDPActionStrategy, mdpActionAdvice: TMDPActionAdvice, mdpActionAdviceRoot: TMDPActionAdvice, optionsSimulationEngine: OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], mdpThresholdActionAdvice: Optional[TMDPActionAdvice], mdpThresholdPathAdvice: Optional[TMDPPathAdvice], quiet: bool, quietInfoStr: bool) -> None:
+	def __init__(self, horizon: int, ignoreNonDecisionStates : bool, mctsConstant: float, mdpActionStrategy: TMDPActionStrategy, mdpActionAdvice: TMDPActionAdvice, mdpActionAdviceRoot: TMDPActionAdvice, optionsSimulationEngine: OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], mdpThresholdActionAdvice: Optional[TMDPActionAdvice], mdpThresholdPathAdvice: Optional[TMDPPathAdvice], quiet: bool, quietInfoStr: bool, reuseTree: bool = False, numWorkers: int = 1, numTreeWorkers: int = 0, arrayTree: bool = False, transpositions: bool = False, earlyStopInterval: int = 0, earlyStopConstant: Optional[float] = None, wideningConstant: float = 0.0, wideningExponent: float = 0.5, maxNodes: int = 0, checkpointFile: Optional[str] = None, checkpointDepth: Optional[int] = None, openingBookFile: Optional[str] = None, singlePassThreshold: bool = False) -> None:
 		self.horizon = horizon
 		self.ignoreNonDecisionStates = ignoreNonDecisionStates # if true, we only count states with multiple available actions for horizon purposes
 		self.mctsConstant = mctsConstant # the constant used by UCB
@@ -707,10 +1376,124 @@ class OptionsMCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStocha
 		self.mdpThresholdPathAdvice = mdpThresholdPathAdvice # path advice to create a threshold: optional
 		self.quiet = quiet
 		self.quietInfoStr = quietInfoStr
+		self.reuseTree = reuseTree # if true, MDPMCTSActionStrategy keeps the subtree of the outcome of its previous decision
+		self.numWorkers = numWorkers # number of processes that MDPMCTSActionStrategy uses to build independent trees, 1 for a single tree built in the calling process
+		self.numTreeWorkers = numTreeWorkers # number of processes of TreeParallelMCTSEngine, 0 to use MCTSEngine
+		self.arrayTree = arrayTree # if true and numTreeWorkers is 0, the trees are built by ArrayMCTSEngine
+		self.transpositions = transpositions # if true, MCTSEngine shares the nodes of a state reached at the same decision depth (ignored by ArrayMCTSEngine)
+		self.earlyStopInterval = earlyStopInterval # if positive, MCTSEngine checks every earlyStopInterval iterations if the root action is decided, see MCTSEngine.isSearchDecided
+		self.earlyStopConstant = earlyStopConstant # constant of the confidence bounds of the early stop, None to use mctsConstant
+		self.wideningConstant = wideningConstant # if positive, MCTSEngine bounds the explored actions of a node and the children of an action by wideningConstant * iterations ** wideningExponent, counting the iterations that went through them (ignored by ArrayMCTSEngine)
+		self.wideningExponent = wideningExponent
+		self.maxNodes = maxNodes # if positive, MCTSEngine collapses the subtrees of its least visited nodes, least recently selected first, when its tree has more nodes (ignored by ArrayMCTSEngine)
+		self.checkpointFile = checkpointFile # if not None, MDPMCTSActionStrategy starts the searches from the state of this file from its tree, and saves their trees in it
+		self.checkpointDepth = checkpointDepth # transitions from the root kept in checkpointFile, None for the whole tree
+		self.openingBookFile = openingBookFile # if not None, MDPMCTSActionStrategy keeps an MDPMCTSOpeningBook in this file
+		self.singlePassThreshold = singlePassThreshold # if true, mdpThresholdPathAdvice is applied to a single pool of simulations without mdpThresholdActionAdvice, see _getSinglePassSimulationReward
 	def deepCopy(self) -> "OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
 		mdpThresholdActionAdvice = (self.mdpThresholdActionAdvice.deepCopy() if not self.mdpThresholdActionAdvice is None else None)
 		mdpThresholdPathAdvice = (self.mdpThresholdPathAdvice.deepCopy() if not self.mdpThresholdPathAdvice is None else None)
-		return OptionsMCTSEngine(horizon=self.horizon, ignoreNonDecisionStates=self.ignoreNonDecisionStates, mctsConstant=self.mctsConstant, mdpActionStrategy=self.mdpActionStrategy, mdpActionAdvice=self.mdpActionAdvice.deepCopy(),mdpActionAdviceRoot=self.mdpActionAdviceRoot.deepCopy(), optionsSimulationEngine=self.optionsSimulationEngine.deepCopy(), mdpThresholdActionAdvice=mdpThresholdActionAdvice, mdpThresholdPathAdvice=mdpThresholdPathAdvice, quiet=self.quiet, quietInfoStr=self.quietInfoStr)
+		return OptionsMCTSEngine(horizon=self.horizon, ignoreNonDecisionStates=self.ignoreNonDecisionStates, mctsConstant=self.mctsConstant, mdpActionStrategy=self.mdpActionStrategy, mdpActionAdvice=self.mdpActionAdvice.deepCopy(),mdpActionAdviceRoot=self.mdpActionAdviceRoot.deepCopy(), optionsSimulationEngine=self.optionsSimulationEngine.deepCopy(), mdpThresholdActionAdvice=mdpThresholdActionAdvice, mdpThresholdPathAdvice=mdpThresholdPathAdvice, quiet=self.quiet, quietInfoStr=self.quietInfoStr, reuseTree=self.reuseTree, numWorkers=self.numWorkers, numTreeWorkers=self.numTreeWorkers, arrayTree=self.arrayTree, transpositions=self.transpositions, earlyStopInterval=self.earlyStopInterval, earlyStopConstant=self.earlyStopConstant, wideningConstant=self.wideningConstant, wideningExponent=self.wideningExponent, maxNodes=self.maxNodes, checkpointFile=self.checkpointFile, checkpointDepth=self.checkpointDepth, openingBookFile=self.openingBookFile, singlePassThreshold=self.singlePassThreshold)
+
+def _getMCTSSimulationReward(executionEngine: MDPExecutionEngine, optionsMCTS: OptionsMCTSEngine, numSims: int) -> float:
+	"""!
+	Simulation phase of an MCTS iteration: estimates the reward of the paths that extend executionEngine,
+	above the threshold given by the threshold advices of optionsMCTS if they are defined
+	"""
+	if not optionsMCTS.quiet: print("Simulation phase")
+	if optionsMCTS.singlePassThreshold:
+		if optionsMCTS.mdpThresholdPathAdvice is None:
+			raise Exception('bad threshold advices, the single pass threshold needs a threshold path advice')
+		if not optionsMCTS.mdpThresholdActionAdvice is None:
+			raise Exception('bad threshold advices, the single pass threshold does not use a threshold action advice')
+		return _getSinglePassSimulationReward(executionEngine, optionsMCTS, numSims)
+	options = optionsMCTS.optionsSimulationEngine.deepCopy()
+	if (optionsMCTS.mdpThresholdActionAdvice is None) != (optionsMCTS.mdpThresholdPathAdvice is None):
+		raise Exception('bad threshold advices, define both or neither')
+	if not optionsMCTS.mdpThresholdActionAdvice is None:
+		if optionsMCTS.mdpThresholdPathAdvice is None: # to make the type-checker happy
+			raise Exception('bad threshold advices, define both or neither')
+		optionsT = options.deepCopy()
+		mdpActionAdvice = optionsMCTS.mdpThresholdActionAdvice
+		optionsT.mdpActionAdvice = mdpActionAdvice
+		optionsT.mdpPathAdvice = optionsMCTS.mdpThresholdPathAdvice
+		simEngineT = optionsT.simulationEngineClass(executionEngine, optionsT) # engine to get reward threshold
+		simulationRewardT=simEngineT.getSimulationReward(numSims)
+		if simulationRewardT is None:
+			if not optionsMCTS.quiet: print("Simulation for threshold output None, trying again with full path advice")
+			tmp = MDPFullPathAdvice() # type: Any
+			# tmp = MDPFullPathAdvice()  # type: MDPFullPathAdvice[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]
+			optionsT.mdpPathAdvice = tmp
+			simEngineT = optionsT.simulationEngineClass(executionEngine, optionsT)
+			simulationRewardT=simEngineT.getSimulationReward(numSims)
+			if simulationRewardT is None:
+				raise Exception("could not get a reward estimate from simulation")
+		tmp2 = MDPAboveThresPathAdvice(simulationRewardT) # type: Any
+		options.mdpPathAdvice = tmp2
+	simEngine = options.simulationEngineClass(executionEngine, options)
+
+	simulationReward=simEngine.getSimulationReward(numSims)
+	if simulationReward is None:
+		if not optionsMCTS.quiet: print("Simulation output None, trying again with full path advice")
+		tmp3 = MDPFullPathAdvice() # type: Any
+		options.mdpPathAdvice = tmp3
+		simEngine = options.simulationEngineClass(executionEngine, options)
+		simulationReward=simEngine.getSimulationReward(numSims)
+		if simulationReward is None:
+			raise Exception("could not get a reward estimate from simulation")
+
+	if not optionsMCTS.quiet: print("->\tsimulation outputs score",simulationReward)
+	return simulationReward
+
+THRESHOLD_MIN_FRACTION = 0.25 # fraction of the simulations that _getSinglePassSimulationReward needs above the threshold before it draws more
+
+def _getPoolReward(simulations: List[Tuple[MDPExecutionEngine, float, int]], mdpPathAdvice: Optional[MDPPathAdviceInterface]) -> Tuple[float, int]:
+	"""!
+	@return the sum of the rewards of the simulations valid for mdpPathAdvice (all of them if it is None), and their number
+	"""
+	rewardSum = 0.0
+	numValid = 0
+	for mdpExecutionEngineS,rewardS,numS in simulations:
+		if mdpPathAdvice is None or mdpPathAdvice.isValidPath(mdpExecutionEngineS.forConsumer(CONSUMER_ADVICE)):
+			rewardSum += rewardS*numS
+			numValid += numS
+	return rewardSum, numValid
+
+def _getSinglePassSimulationReward(executionEngine: MDPExecutionEngine, optionsMCTS: OptionsMCTSEngine, numSims: int) -> float:
+	"""!
+	Simulation phase with the threshold advices of optionsMCTS, from a single pool of numSims simulations drawn without path advice,
+	instead of a pool for the threshold and another one above it.
+	The threshold is the mean reward of the simulations valid for mdpThresholdPathAdvice (of all of them if none is valid),
+	and the estimate is the mean reward of the simulations whose path reward is above it, as for MDPAboveThresPathAdvice.
+	If fewer than THRESHOLD_MIN_FRACTION * numSims simulations are above, the missing ones are drawn under MDPAboveThresPathAdvice,
+	and if they cannot be drawn, the estimate is the mean reward of the pool.
+	The simulations follow the action advice of optionsMCTS.optionsSimulationEngine, so mdpThresholdActionAdvice must be None.
+	They are drawn one by one by MDPSimulationEngine.getSimulations, even with a parallel or batch simulation engine.
+	"""
+	options = optionsMCTS.optionsSimulationEngine.deepCopy()
+	tmp = MDPFullPathAdvice() # type: Any
+	options.mdpPathAdvice = tmp
+	simulations = options.simulationEngineClass(executionEngine, options).getSimulations(numSims)
+	rewardSum, numValid = _getPoolReward(simulations, optionsMCTS.mdpThresholdPathAdvice)
+	if numValid == 0:
+		if not optionsMCTS.quiet: print("No simulation for threshold, using all the simulations")
+		rewardSum, numValid = _getPoolReward(simulations, None)
+	mdpAboveThresPathAdvice = MDPAboveThresPathAdvice(rewardSum / numValid) # type: Any
+	rewardSum, numValid = _getPoolReward(simulations, mdpAboveThresPathAdvice)
+	numMissing = math.ceil(THRESHOLD_MIN_FRACTION * numSims) - numValid
+	if numMissing > 0:
+		if not optionsMCTS.quiet: print("found",numValid,"simulations above the threshold, drawing",numMissing,"more")
+		options.mdpPathAdvice = mdpAboveThresPathAdvice
+		rewardSumMissing, numValidMissing = _getPoolReward(options.simulationEngineClass(executionEngine, options).getSimulations(numMissing), None)
+		if numValidMissing < numMissing:
+			if not optionsMCTS.quiet: print("Simulation above threshold failed, using all the simulations")
+			rewardSum, numValid = _getPoolReward(simulations, None)
+		else:
+			rewardSum += rewardSumMissing
+			numValid += numValidMissing
+	simulationReward = rewardSum / numValid
+	if not optionsMCTS.quiet: print("->\tsimulation outputs score",simulationReward)
+	return simulationReward
 
 class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
 	"""
@@ -720,17 +1503,32 @@ class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAct
 	# TMDPActionAdvice = TypeVar("TMDPActionAdvice",bound=MDPActionAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	TMDPPathAdvice = TypeVar("TMDPPathAdvice",bound=MDPPathAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	# TMDPStateScore = TypeVar("TMDPStateScore",bound=MDPStateScoreInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
-	def __init__(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> None:
-		self.mdpExecutionEngine = mdpExecutionEngine # an ExecutionEngine instance used to construct the tree
-		mdpActions,mdpActionsFull = options.mdpActionAdviceRoot.getMDPActionAdvice(self.mdpExecutionEngine.mdpEndState(), self.mdpExecutionEngine.mdpOperations, options.quietInfoStr)
-		mdpActions,rootActionsFull = options.mdpActionAdvice.getMDPActionAdviceInSubset(mdpActions, self.mdpExecutionEngine.mdpEndState(), self.mdpExecutionEngine.mdpOperations, options.quietInfoStr)
+	EVICTION_RATIO = 0.9 # fraction of maxNodes the tree is brought back to by an eviction, so that evictions are not run after each iteration
+	def __init__(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], root: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" = None) -> None:
+		"""!
+		@param root if not None, a descendant of the root of a previous tree at the end state of mdpExecutionEngine, whose subtree is reused
+		"""
+		self.mdpExecutionEngine = mdpExecutionEngine.forConsumer(CONSUMER_SELECTION) # an ExecutionEngine instance used to construct the tree
+		self.mdpOperationsAdvice = self.mdpExecutionEngine.mdpOperations.forConsumer(CONSUMER_ADVICE) # operations given to the action advice
+		mdpActions,mdpActionsFull = options.mdpActionAdviceRoot.getMDPActionAdvice(self.mdpExecutionEngine.mdpEndState(), self.mdpOperationsAdvice, options.quietInfoStr)
+		mdpActions,rootActionsFull = options.mdpActionAdvice.getMDPActionAdviceInSubset(mdpActions, self.mdpExecutionEngine.mdpEndState(), self.mdpOperationsAdvice, options.quietInfoStr)
 
 		nonDecisionAction = (len(mdpActionsFull)<=1) and options.ignoreNonDecisionStates
-		self.root = MDPMCTSNode.rootFromExec(self.mdpExecutionEngine,mdpActions,nonDecisionAction) # an MDPMCTSNode instance for the root of MCTS
+		if not root is None:
+			if root.mdpState != self.mdpExecutionEngine.mdpEndState():
+				raise Exception("bad MCTS root")
+			if not self._reuseRoot(root, mdpActions, nonDecisionAction, options):
+				root = None
+		if root is None:
+			root = self._newRoot(mdpActions,nonDecisionAction)
+		self.root: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]" = root # the root of MCTS, an MDPMCTSNode, or an MDPMCTSNodeView for ArrayMCTSEngine
 
 		self.horizon = options.horizon
 		self.ignoreNonDecisionStates = options.ignoreNonDecisionStates # if true, we only count states with multiple available actions for horizon purposes
 		self.mctsConstant = options.mctsConstant # the constant used by UCB
+		self.wideningConstant = options.wideningConstant # the constant of progressive widening, 0 for none
+		self.wideningExponent = options.wideningExponent # the exponent of progressive widening
+		self.numSims = 1 # simulations of the current iteration, that progressive widening divides the visits by
 		self.mdpActionStrategySelection = options.mdpActionStrategy # an action strategy
 		self.mdpActionAdviceSelection = options.mdpActionAdvice # an advice on actions (prunes actions)
 		self.optionsSimulationEngine = options.optionsSimulationEngine
@@ -738,6 +1536,80 @@ class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAct
 		self.mdpThresholdPathAdvice = options.mdpThresholdPathAdvice # path advice to create a threshold: optional
 		self.quiet = options.quiet
 		self.quietInfoStr = options.quietInfoStr
+		self.options = options # passed to the simulation phase
+		self.earlyStopInterval = options.earlyStopInterval
+		self.earlyStopConstant = (options.mctsConstant if options.earlyStopConstant is None else options.earlyStopConstant)
+		self.minReward: Optional[float] = None # lowest simulation reward of the search
+		self.maxReward: Optional[float] = None # highest simulation reward of the search
+		self.iterationsStart = 0.0 # time at which doMCTSIterations started
+		self.selectedPath: "List[Tuple[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], TMDPAction, int]]" = [] # nodes, actions played and their indices in the legal actions (-1 if they are not legal), by the last selection from the root
+		self.searchStatistics: util.Counter[str] = util.Counter() # counts of the search, see getSearchStatistics
+		self.transpositions: "Optional[Dict[Tuple[TMDPState, int], MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]]" = None # node of a state at a decision depth, if options.transpositions
+		if options.transpositions:
+			self.transpositions = {}
+			self._addTranspositions(self.root)
+		self.maxNodes = options.maxNodes
+		self.numNodes = self._countNodes() # nodes of the tree, including the ones of a reused subtree
+		self.iterationClock = (max(node.lastVisit for node in self._getTreeNodes()) if self.maxNodes > 0 else 0) # counts the selected paths, continuing the count of a reused subtree
+
+	def _addTranspositions(self, root: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> None:
+		"""!
+		Adds the nodes of the subtree of root to the transposition table, with their decision depth from root
+		"""
+		if self.transpositions is None:
+			return
+		if not isinstance(root, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		nodes = [(root, 0)]
+		self.transpositions[(root.mdpState, 0)] = root
+		while len(nodes) > 0:
+			node, decisionDepth = nodes.pop()
+			if len(node.legalActions) > 1 or not self.ignoreNonDecisionStates:
+				decisionDepth += 1
+			for children in node.children.values():
+				for child in children:
+					if not (child.mdpState, decisionDepth) in self.transpositions:
+						self.transpositions[(child.mdpState, decisionDepth)] = child
+						nodes.append((child, decisionDepth))
+
+	def _newRoot(self, mdpActions: List[TMDPAction], nonDecisionAction: bool) -> "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		return MDPMCTSNode.rootFromExec(self.mdpExecutionEngine,mdpActions,nonDecisionAction)
+
+	def _reuseRoot(self, root: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", mdpActions: List[TMDPAction], nonDecisionAction: bool, options: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> bool:
+		"""!
+		Makes root the root of the search, with scores measured from root instead of from the root of its previous tree.
+		The simulations of the previous tree reached the horizon from the previous root, that is a few decisions
+		before the horizon from root: their sums of rewards are extrapolated to the longer horizon.
+		The scores are exact if the transitions since the previous root are non-decision ones.
+		Returns False if the subtree has no information for the horizon from root, or if its scores would need to be rescaled with a positive alpha:
+		they sum (1-alpha) * path reward + alpha * state score, and only the path rewards may be rescaled, which cannot be done without the two terms apart.
+		"""
+		optionsSimulation = options.optionsSimulationEngine
+		discountFactor = self.mdpExecutionEngine.mdpOperations.discountFactor
+		rewards: List[float] = [] # rewards of the transitions from the previous root to root
+		numDecisions = 0 # decisions made from the previous root to root, counted as in the horizon of the simulations
+		node = root
+		while not node.mdpParentNode is None:
+			if node.mdpParentTransition is None:
+				raise Exception("bad tree shape")
+			rewards.append(node.mdpParentTransition.mdpStochasticAction.reward)
+			if not (node.mdpParentNode.nonDecisionAction and optionsSimulation.ignoreNonDecisionStates):
+				numDecisions += 1
+			node = node.mdpParentNode
+		if numDecisions >= optionsSimulation.horizon:
+			return False
+		pathReward = 0.0
+		discount = 1.0
+		for reward in reversed(rewards):
+			discount *= discountFactor
+			pathReward += reward * discount
+		scoreOffset = (1-optionsSimulation.alpha) * pathReward
+		scoreScale = optionsSimulation.horizon / (optionsSimulation.horizon - numDecisions) / discount
+		if optionsSimulation.alpha > 0 and scoreScale != 1.0:
+			if not options.quiet: print("->\tthe subtree is not reused, its scores cannot be rescaled with a positive alpha")
+			return False
+		root.makeRoot(mdpActions,nonDecisionAction,scoreOffset,scoreScale)
+		return True
 
 	def _getMDPActionSelection(self, mdpActions: List[TMDPAction]) -> TMDPAction:
 		mdpAction = self.mdpActionStrategySelection.getMDPActionInSubset(mdpActions,self.mdpExecutionEngine.mdpEndState(), self.mdpExecutionEngine.mdpOperations, self.quietInfoStr)
@@ -748,10 +1620,44 @@ class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAct
 				raise Exception("could not get an action")
 		return mdpAction
 
+	def _getActionStatistics(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", action: TMDPAction) -> Tuple[float, float]:
+		"""!
+		@return the visits and the total score of action in node, zeros if action was never played from node
+		"""
+		if action in node.actionVisits:
+			return node.actionVisits[action], node.actionScore[action]
+		return 0, 0.0
+
+	def _getNodeVisits(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> float:
+		return node.numVisits
+
 	def doMCTSIteration(self, numSims: int) -> None:
-		node=self.root
+		self.numSims = numSims
 		executionEngine=self.mdpExecutionEngine
 		fastResetData0=executionEngine.getFastResetData()
+		node = self._selectLeaf()
+		self._markSelectedPath(node)
+		simulationReward = self._getSimulationReward(executionEngine, numSims)
+		self._observeReward(simulationReward)
+		self._backpropagate(node, simulationReward, numSims)
+		executionEngine.fastReset(fastResetData0)
+
+	def _observeReward(self, simulationReward: float) -> None:
+		if self.minReward is None or simulationReward < self.minReward:
+			self.minReward = simulationReward
+		if self.maxReward is None or simulationReward > self.maxReward:
+			self.maxReward = simulationReward
+
+	def _selectLeaf(self) -> "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		"""!
+		Selection and expansion phases: extends the execution engine from the root to a new node or to the horizon
+		@return the last node of the selected path
+		"""
+		if not isinstance(self.root, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		node=self.root
+		self.selectedPath = []
+		executionEngine=self.mdpExecutionEngine
 		# Selection phase
 		# if not self.quiet: print("MCTS tree before selection:",self.root.consoleStr(bDownwards=True))
 		if not self.quiet: print("Selection phase")
@@ -763,77 +1669,34 @@ class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAct
 			depth += 1
 			if len(legal) > 1 or not self.ignoreNonDecisionStates:
 				decisionDepth += 1
-			nonUcbScores: util.ConsoleStrFloatCounter[TMDPAction] = util.ConsoleStrFloatCounter()
-			ucbScores: util.ConsoleStrFloatCounter[TMDPAction] = util.ConsoleStrFloatCounter()
-			notExplored: List[TMDPAction] = []
-			for actionLegal in legal:
-				action = actionLegal.deepCopy()
-				# if not self.quietInfoStr:
-				if action in node.actionVisits and node.actionVisits[action]>0:
-					nonUcbScores[action] = node.actionScore[action] / node.actionVisits[action]
-					ucbScores[action] = node.actionScore[action] / node.actionVisits[action] + self.mctsConstant * math.sqrt(2 * math.log(node.numVisits) / node.actionVisits[action])
-				else:
-					notExplored.append(action)
-					nonUcbScores[action] = float('inf')
-					ucbScores[action] = float('inf')
-			if len(notExplored)>0:
-				actionChosen = self._getMDPActionSelection(notExplored)
-				if not self.quietInfoStr:
-					if actionChosen.infoStr != '':
-						actionChosen.infoStr += '#'
-					actionChosen.infoStr += 'Scores'+str(nonUcbScores)+'UCB'+str(ucbScores)+'NEW' #'NEW['+','.join([a.miniConsoleStr() for a in notExplored])+']'
-			else:
-				argMax=ucbScores.argMax()
-				if len(argMax) == 0:
-					raise NoMoveException("no move in argMax "+str(node))
-				if len(argMax)>1:
-					actionChosen = self._getMDPActionSelection(argMax)
-					if not self.quietInfoStr:
-						if actionChosen.infoStr != '':
-							actionChosen.infoStr += '#'
-						actionChosen.infoStr += 'Scores'+str(nonUcbScores)+'UCB'+str(ucbScores)+'TIE' #'['+','.join([a.miniConsoleStr() for a in argMax])+']'
-				else:
-					actionChosen=argMax[0]
-					if not self.quietInfoStr:
-						if actionChosen.infoStr != '':
-							actionChosen.infoStr += '#'
-						actionChosen.infoStr += 'Scores'+str(nonUcbScores)+'UCB'+str(ucbScores)
+			actionChosen, actionIndex = self._selectAction(node)
 			# Draw a child of actionChosen
-			mdpTransition = self.mdpExecutionEngine.drawTransition(actionChosen, self.quietInfoStr)
+			mdpTransition = self._drawTransition(node, actionChosen)
 			if not self.quiet: print("+\t",mdpTransition.consoleStr())
 
 			# go to next node in execution engine
 			executionEngine.append(mdpTransition,node.nonDecisionAction)
 			# Search for next node in children
-			nextNode=None
-			newAction=True
-			if actionChosen in node.children:
-				newAction=False
-				for child in node.children[actionChosen]:
-					if child.mdpParentTransition == mdpTransition:
-						nextNode=child
+			self.selectedPath.append((node, actionChosen, actionIndex))
+			newAction = not actionChosen in node.children
+			nextNode = node.childIndex.get(mdpTransition)
+			if nextNode is None:
+				nextNode = self._findTransposition(node, actionChosen, newAction, mdpTransition, decisionDepth)
 			if not nextNode is None:
 				if not self.quiet: print("->\tfound child in MCTS tree")
 				node=nextNode
 			else:
 				# Constructs the new node
-				legalActions,legalActionsFull = self.mdpActionAdviceSelection.getMDPActionAdvice(executionEngine.mdpEndState(), executionEngine.mdpOperations, self.quietInfoStr)
+				legalActions,legalActionsFull = self.mdpActionAdviceSelection.getMDPActionAdvice(executionEngine.mdpEndState(), self.mdpOperationsAdvice, self.quietInfoStr)
 
 				nonDecisionAction = (len(legalActionsFull)<=1) and self.ignoreNonDecisionStates
-				mdpParentTransition = mdpTransition.deepCopy()
-				if not self.quietInfoStr:
-					mdpParentTransition.mdpAction.infoStr = "" # resets the extra info
-					mdpParentTransition.mdpStochasticAction.infoStr = "" # resets the extra info
+				mdpParentTransition = self._getParentTransition(mdpTransition)
 				newNode = MDPMCTSNode(executionEngine.mdpEndState().deepCopy(),node,mdpParentTransition,depth,legalActions,nonDecisionAction)
-				if newAction:
-					actionCopy = actionChosen.deepCopy()
-					if not self.quietInfoStr:
-					 	actionCopy.infoStr = '' # erase extra info
-					node.actionVisits[actionCopy]=0
-					node.actionScore[actionCopy]=0
-					node.children[actionCopy]=[newNode]
-				else:
-					node.children[actionChosen].append(newNode)
+				self._addChild(node, actionChosen, newAction, mdpParentTransition, newNode)
+				self.searchStatistics['nodes created'] += 1
+				self.numNodes += 1
+				if not self.transpositions is None:
+					self.transpositions[(newNode.mdpState, decisionDepth)] = newNode
 				if not self.quiet: print("->\tnew child added to MCTS tree")
 				node=newNode
 				if not nonDecisionAction:
@@ -841,72 +1704,339 @@ class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAct
 			if executionEngine.isTerminal():
 				break
 		# if not self.quiet: print("MCTS selected path in tree:",node.consoleStr(bUpwards=True))
-		# Simulation phase
-		# if not self.quiet: print("MCTS tree before simulation:",self.root.consoleStr(bDownwards=True))
-		if not self.quiet: print("Simulation phase")
-		options = self.optionsSimulationEngine.deepCopy()
-		if (self.mdpThresholdActionAdvice is None) != (self.mdpThresholdPathAdvice is None):
-			raise Exception('bad threshold advices, define both or neither')
-		if not self.mdpThresholdActionAdvice is None:
-			if self.mdpThresholdPathAdvice is None: # to make the type-checker happy
-				raise Exception('bad threshold advices, define both or neither')
-			optionsT = options.deepCopy()
-			mdpActionAdvice = self.mdpThresholdActionAdvice
-			optionsT.mdpActionAdvice = mdpActionAdvice
-			optionsT.mdpPathAdvice = self.mdpThresholdPathAdvice
-			simEngineT = MDPSimulationEngine(executionEngine, optionsT) # engine to get reward threshold
-			simulationRewardT=simEngineT.getSimulationReward(numSims)
-			if simulationRewardT is None:
-				if not self.quiet: print("Simulation for threshold output None, trying again with full path advice")
-				tmp = MDPFullPathAdvice() # type: Any
-				# tmp = MDPFullPathAdvice()  # type: MDPFullPathAdvice[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]
-				optionsT.mdpPathAdvice = tmp
-				simEngineT = MDPSimulationEngine(executionEngine, optionsT)
-				simulationRewardT=simEngineT.getSimulationReward(numSims)
-				if simulationRewardT is None:
-					raise Exception("could not get a reward estimate from simulation")
-			tmp2 = MDPAboveThresPathAdvice(simulationRewardT) # type: Any
-			options.mdpPathAdvice = tmp2
-		simEngine = MDPSimulationEngine(executionEngine, options)
+		return node
 
-		simulationReward=simEngine.getSimulationReward(numSims)
-		if simulationReward is None:
-			if not self.quiet: print("Simulation output None, trying again with full path advice")
-			tmp3 = MDPFullPathAdvice() # type: Any
-			options.mdpPathAdvice = tmp3
-			simEngine = MDPSimulationEngine(executionEngine, options)
-			simulationReward=simEngine.getSimulationReward(numSims)
-			if simulationReward is None:
-				raise Exception("could not get a reward estimate from simulation")
+	def _getLegalStatistics(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> Tuple[List[float], List[float]]:
+		"""!
+		@return the visits and the total scores of the legal actions of node, in the order of node.legalActions
+		"""
+		return node.legalVisits, node.legalScores
 
-		if not self.quiet: print("->\tsimulation outputs score",simulationReward)
+	def _selectAction(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> Tuple[TMDPAction, int]:
+		"""!
+		Chooses the action played from node: an action not explored yet, chosen by the selection strategy if progressive widening allows it,
+		otherwise the action of highest UCB score, with ties broken by a random index.
+		The scores are computed in a single pass over the visits and scores of the legal actions, without hashing or copying the actions:
+		the chosen action is only copied when its infoStr receives the scores.
+		@return the action and its index in node.legalActions, -1 if the selection strategy returned an action outside of them
+		"""
+		legal = node.legalActions
+		legalVisits, legalScores = self._getLegalStatistics(node)
+		logVisits: Optional[float] = None # twice the log of the visits of node
+		bestScore = -math.inf
+		best: List[int] = [] # indices of the explored actions of UCB score bestScore
+		notExplored: List[int] = []
+		for i in range(len(legal)):
+			actionVisits = legalVisits[i]
+			if actionVisits>0:
+				if logVisits is None:
+					logVisits = 2 * math.log(self._getNodeVisits(node))
+				ucbScore = legalScores[i] / actionVisits + self.mctsConstant * math.sqrt(logVisits / actionVisits)
+				if ucbScore > bestScore:
+					bestScore = ucbScore
+					best = [i]
+				elif ucbScore == bestScore:
+					best.append(i)
+			else:
+				notExplored.append(i)
+		if len(notExplored)>0 and self._canWiden(len(legal)-len(notExplored), self._getNodeVisits(node)):
+			actionChosen = self._getMDPActionSelection([legal[i] for i in notExplored])
+			index = next((i for i in notExplored if legal[i] == actionChosen), -1)
+			infoStr = 'NEW'
+		elif len(best) == 0:
+			raise NoMoveException("no move in argMax "+str(node))
+		else:
+			index = (best[0] if len(best) == 1 else best[random.randrange(len(best))])
+			actionChosen = legal[index]
+			infoStr = ('' if len(best) == 1 else 'TIE')
+		if not self.quietInfoStr:
+			actionChosen = actionChosen.deepCopy()
+			if actionChosen.infoStr != '':
+				actionChosen.infoStr += '#'
+			actionChosen.infoStr += self._getNodeScoresStr(node)+infoStr
+		return actionChosen, index
+
+	def _getNodeScoresStr(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> str:
+		nonUcbScores: util.ConsoleStrFloatCounter[TMDPAction] = util.ConsoleStrFloatCounter()
+		ucbScores: util.ConsoleStrFloatCounter[TMDPAction] = util.ConsoleStrFloatCounter()
+		for action in node.legalActions:
+			actionVisits, actionScore = self._getActionStatistics(node, action)
+			if actionVisits>0:
+				nonUcbScores[action] = actionScore / actionVisits
+				ucbScores[action] = actionScore / actionVisits + self.mctsConstant * math.sqrt(2 * math.log(self._getNodeVisits(node)) / actionVisits)
+			else:
+				nonUcbScores[action] = float('inf')
+				ucbScores[action] = float('inf')
+		return 'Scores'+str(nonUcbScores)+'UCB'+str(ucbScores)
+
+	def _canWiden(self, numChildren: int, numVisits: float) -> bool:
+		"""!
+		Progressive widening: @return true if a node or an action with numVisits visits can get a child more than its numChildren ones.
+		The bound counts iterations, each iteration adding numSims visits.
+		"""
+		if self.wideningConstant <= 0 or numChildren == 0:
+			return True
+		return numChildren < self.wideningConstant * (numVisits / self.numSims) ** self.wideningExponent
 
-		# Backpropagation phase
+	def _drawTransition(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", actionChosen: TMDPAction) -> MDPTransition[TMDPAction, TMDPStochasticAction]:
+		"""!
+		Draws a transition of actionChosen from node. If progressive widening does not allow actionChosen another child,
+		the transition to one of its children is drawn in proportion to the visits of the children, without calling the MDP.
+		"""
+		if self.wideningConstant > 0:
+			children = [(mdpTransition, child) for mdpTransition, child in node.childIndex.items() if mdpTransition.mdpAction == actionChosen]
+			if not self._canWiden(len(children), self._getActionStatistics(node, actionChosen)[0]):
+				frequencies: util.Counter[MDPTransition[TMDPAction, TMDPStochasticAction]] = util.Counter()
+				for mdpTransition, child in children:
+					frequencies[mdpTransition] = self._getNodeVisits(child)
+				if not self.quiet: print("->\tprogressive widening revisits a child")
+				return util.sample(frequencies)
+		return self.mdpExecutionEngine.drawTransition(actionChosen, self.quietInfoStr)
+
+	def _getParentTransition(self, mdpTransition: MDPTransition[TMDPAction, TMDPStochasticAction]) -> MDPTransition[TMDPAction, TMDPStochasticAction]:
+		mdpParentTransition = mdpTransition.deepCopy()
+		if not self.quietInfoStr:
+			mdpParentTransition.mdpAction.infoStr = "" # resets the extra info
+			mdpParentTransition.mdpStochasticAction.infoStr = "" # resets the extra info
+		return mdpParentTransition
+
+	def _addChild(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", actionChosen: TMDPAction, newAction: bool, mdpParentTransition: MDPTransition[TMDPAction, TMDPStochasticAction], child: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> None:
+		if newAction:
+			actionCopy = actionChosen.deepCopy()
+			if not self.quietInfoStr:
+				actionCopy.infoStr = '' # erase extra info
+			if not actionCopy in node.actionVisits: # a collapsed node keeps the statistics of the actions it played
+				node.actionVisits[actionCopy]=0
+				node.actionScore[actionCopy]=0
+			node.children[actionCopy]=[child]
+		else:
+			node.children[actionChosen].append(child)
+		node.childIndex[mdpParentTransition] = child
+
+	def _findTransposition(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", actionChosen: TMDPAction, newAction: bool, mdpTransition: MDPTransition[TMDPAction, TMDPStochasticAction], decisionDepth: int) -> "Optional[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]":
+		"""!
+		Returns the node of the end state of the execution at decisionDepth if it is in the transposition table,
+		after adding it as a child of node for mdpTransition. The nodes of the selected path are not reused, to keep the tree acyclic.
+		"""
+		if self.transpositions is None:
+			return None
+		nextNode = self.transpositions.get((self.mdpExecutionEngine.mdpEndState(), decisionDepth))
+		if nextNode is None or any(nextNode is pathNode for pathNode, _, _ in self.selectedPath):
+			return None
+		self._addChild(node, actionChosen, newAction, self._getParentTransition(mdpTransition), nextNode)
+		self.searchStatistics['nodes reused'] += 1
+		if not self.quiet: print("->\ttransposition found in MCTS tree")
+		return nextNode
+
+	def _getSimulationReward(self, executionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], numSims: int) -> float:
+		"""!
+		Simulation phase: estimates the reward of the paths that extend the execution engine
+		"""
+		return _getMCTSSimulationReward(executionEngine, self.options, numSims)
+
+	def _backpropagate(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", simulationReward: float, numSims: int) -> None:
+		"""!
+		Backpropagation phase: adds numSims visits of score simulationReward to node and to the nodes and actions of the selected path,
+		which may differ from the parents of node if it is shared by transpositions
+		"""
+		if not isinstance(node, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS node")
 		# if not self.quiet: print("MCTS tree before backpropagation:",self.root.consoleStr(bDownwards=True))
 		if not self.quiet: print("Backpropagation phase")
 		node.numVisits += numSims
 		node.totalScore += simulationReward * numSims
-		while not node.mdpParentNode is None:
-			if node.mdpParentTransition is None:
-				raise Exception("bad tree shape")
-			action=node.mdpParentTransition.mdpAction
-			node.mdpParentNode.actionVisits[action] += numSims
-			node.mdpParentNode.actionScore[action] += simulationReward * numSims
-			node.mdpParentNode.numVisits += numSims
-			node.mdpParentNode.totalScore += simulationReward * numSims
-			node=node.mdpParentNode
-		executionEngine.fastReset(fastResetData0)
-		if not self.quiet: print("->\tnew root score for action",action.miniConsoleStr(),":",(node.actionScore[action] / node.actionVisits[action]))
+		action = None
+		for node, action, index in reversed(self.selectedPath):
+			node.actionVisits[action] += numSims
+			node.actionScore[action] += simulationReward * numSims
+			if index >= 0:
+				node.legalVisits[index] += numSims
+				node.legalScores[index] += simulationReward * numSims
+			node.numVisits += numSims
+			node.totalScore += simulationReward * numSims
+		if not self.quiet and not action is None: print("->\tnew root score for action",action.miniConsoleStr(),":",(node.actionScore[action] / node.actionVisits[action]))
 		# if not self.quiet: print("MCTS tree after iteration:",self.root.consoleStr(bDownwards=True))
 
+		# if not self.quiet: print("MCTS tree before simulation:",self.root.consoleStr(bDownwards=True))
+	def _getDeadline(self, numMCTSIters: Optional[int], timeBudget: Optional[float]) -> Optional[float]:
+		if numMCTSIters is None and timeBudget is None:
+			raise Exception("MCTS needs a number of iterations or a time budget")
+		self.iterationsStart = time.perf_counter()
+		if timeBudget is None:
+			return None
+		return self.iterationsStart + timeBudget
 
-	def doMCTSIterations(self, numMCTSIters: int, numSims: int) -> None:
-		for i in range(numMCTSIters):
+	def _continueIterations(self, numIters: int, numMCTSIters: Optional[int], deadline: Optional[float], numSims: int) -> bool:
+		"""!
+		@return true if another iteration can start after numIters ones: the first iteration always starts, so that the root has statistics.
+		Every earlyStopInterval iterations, the search stops if the root action is decided, and the iterations left are counted as saved:
+		up to the cap numMCTSIters, or if there is none, the iterations that would fit in the rest of the time budget at the rate so far.
+		"""
+		if not numMCTSIters is None and numIters >= numMCTSIters:
+			return False
+		now = time.perf_counter()
+		if numIters > 0 and not deadline is None and now >= deadline:
+			return False
+		if self.earlyStopInterval > 0 and numIters > 0 and numIters % self.earlyStopInterval == 0:
+			numItersLeft = (None if numMCTSIters is None else numMCTSIters - numIters)
+			if self.isSearchDecided(numItersLeft, numSims):
+				if numItersLeft is None and not deadline is None:
+					numItersLeft = int((deadline - now) * numIters / (now - self.iterationsStart))
+				self.searchStatistics['iterations saved'] += (0 if numItersLeft is None else numItersLeft)
+				if not self.quiet: print("->\tMCTS root action decided after",numIters,"iterations")
+				return False
+		return True
+
+	def isSearchDecided(self, numItersLeft: Optional[int], numSims: int) -> bool:
+		"""!
+		@return true if the root action of best mean score is decided, once every legal root action has been visited:
+		either its lower confidence bound is above the upper bounds of the other actions, with the radius of the UCB term
+		and earlyStopConstant as constant, or numItersLeft more iterations cannot change it, even if they all add
+		the lowest simulation reward seen so far to it or the highest one to another action
+		"""
+		statistics = [self._getActionStatistics(self.root, action) for action in self.root.legalActions]
+		if len(statistics) <= 1:
+			return True
+		if any(visits == 0 for visits, _ in statistics):
+			return False
+		logVisits = math.log(self._getNodeVisits(self.root))
+		means = [score / visits for visits, score in statistics]
+		best = max(range(len(means)), key=lambda i: means[i])
+		bounds = [self.earlyStopConstant * math.sqrt(2 * logVisits / visits) for visits, _ in statistics]
+		others = [i for i in range(len(means)) if i != best]
+		if all(means[i] + bounds[i] < means[best] - bounds[best] for i in others):
+			return True
+		if numItersLeft is None or self.minReward is None or self.maxReward is None:
+			return False
+		visitsLeft = numItersLeft * numSims
+		visitsBest, scoreBest = statistics[best]
+		worstBest = (scoreBest + self.minReward * visitsLeft) / (visitsBest + visitsLeft)
+		return all((statistics[i][1] + self.maxReward * visitsLeft) / (statistics[i][0] + visitsLeft) < worstBest for i in others)
+
+	def doMCTSIterations(self, numMCTSIters: Optional[int], numSims: int, timeBudget: Optional[float] = None) -> None:
+		"""!
+		Runs numMCTSIters iterations, or as many as fit in timeBudget seconds if it is not None, with numMCTSIters as a cap if it is not None.
+		An iteration that started before the end of the budget is completed.
+		"""
+		deadline = self._getDeadline(numMCTSIters, timeBudget)
+		i = 0
+		while self._continueIterations(i, numMCTSIters, deadline, numSims):
 			if not self.quiet:
 				print("===========================================================")
 				print("MCTS Iteration",i)
 				print("===========================================================")
 			self.doMCTSIteration(numSims)
+			self.searchStatistics['iterations'] += 1
+			self._evictNodes()
+			i += 1
+
+	def _getTreeNodes(self) -> "List[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]":
+		"""!
+		@return the nodes reachable from the root, each once, parents before children
+		"""
+		if not isinstance(self.root, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		nodes = [self.root]
+		visited = set(nodes)
+		i = 0
+		while i < len(nodes):
+			for children in nodes[i].children.values():
+				for child in children:
+					if not child in visited:
+						visited.add(child)
+						nodes.append(child)
+			i += 1
+		return nodes
+
+	def _countNodes(self) -> int:
+		return len(self._getTreeNodes())
+
+	def getTreeSize(self) -> Tuple[int, int]:
+		"""!
+		@return the number of nodes of the tree and an approximation of their memory in bytes, see MDPMCTSNode.getNumBytes
+		"""
+		nodes = self._getTreeNodes()
+		return len(nodes), sum(node.getNumBytes() for node in nodes)
+
+	def _markSelectedPath(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> None:
+		"""!
+		With a node budget, stamps node and the nodes of the selected path with the next value of iterationClock, for _evictNodes
+		"""
+		if self.maxNodes <= 0:
+			return
+		if not isinstance(node, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS node")
+		self.iterationClock += 1
+		node.lastVisit = self.iterationClock
+		for pathNode, _, _ in self.selectedPath:
+			pathNode.lastVisit = self.iterationClock
+
+	def _evictNodes(self) -> None:
+		"""!
+		If the tree has more than maxNodes nodes, collapses the least visited nodes, the least recently selected first among equal visits,
+		then the deepest first,
+		until the tree has at most EVICTION_RATIO * maxNodes nodes, see MDPMCTSNode.collapse.
+		The root and its children are never collapsed, so the tree keeps at least the grandchildren of the root.
+		Runs between iterations, when no selected path refers to the nodes.
+		"""
+		if self.maxNodes <= 0 or self.numNodes <= self.maxNodes:
+			return
+		nodes = self._getTreeNodes()
+		kept = set(child for children in self.root.children.values() for child in children)
+		kept.add(self.root)
+		candidates = [node for node in nodes if len(node.children) > 0 and not node in kept]
+		candidates.sort(key=lambda node: (self._getNodeVisits(node), node.lastVisit, -node.depth))
+		numNodes = len(nodes)
+		for node in candidates:
+			if numNodes <= MCTSEngine.EVICTION_RATIO * self.maxNodes:
+				break
+			numNodes -= node.collapse()
+		# a collapsed subtree can share nodes with the rest of the tree through transpositions: the nodes left are counted again
+		self.numNodes = self._countNodes()
+		self.searchStatistics['nodes evicted'] += len(nodes) - self.numNodes
+		if not self.transpositions is None:
+			self.transpositions = {}
+			self._addTranspositions(self.root)
+		if not self.quiet: print("->\tevicted",len(nodes) - self.numNodes,"MCTS nodes")
+
+	def getRootStatistics(self) -> List[Tuple[TMDPAction, int, float]]:
+		"""!
+		@return the visits and the total score of each action of the root
+		"""
+		return [(action, self.root.actionVisits[action], self.root.actionScore[action]) for action in self.root.actionVisits]
+
+	def getSearchStatistics(self) -> Dict[str, float]:
+		"""!
+		@return the counts of the search since the engine was created: the iterations completed, the iterations saved by the early stop,
+		the nodes created, the nodes reused through transpositions and the nodes evicted, the searches seeded by an opening book
+		and the ones it decided without iterations (see MDPMCTSActionStrategy), then the size of the tree at the end of the search, in nodes and approximate bytes, see getTreeSize.
+		The sizes of the trees merged by mergeSearchStatistics are added to the size of the tree.
+		"""
+		numNodes, numBytes = self.getTreeSize()
+		return {'iterations': self.searchStatistics['iterations'], 'iterations saved': self.searchStatistics['iterations saved'], 'nodes created': self.searchStatistics['nodes created'], 'nodes reused': self.searchStatistics['nodes reused'], 'nodes evicted': self.searchStatistics['nodes evicted'], 'book priors': self.searchStatistics['book priors'], 'book decisions': self.searchStatistics['book decisions'], 'tree nodes': self.searchStatistics['tree nodes'] + numNodes, 'tree bytes': self.searchStatistics['tree bytes'] + numBytes}
+
+	def mergeSearchStatistics(self, searchStatistics: Dict[str, float]) -> None:
+		"""!
+		Adds the counts of the search of another tree, given by getSearchStatistics
+		"""
+		for key, value in searchStatistics.items():
+			self.searchStatistics[key] += value
+
+	def mergeRootStatistics(self, rootStatistics: List[Tuple[TMDPAction, int, float]]) -> None:
+		"""!
+		Adds the visits and scores of the root of another tree from the same state, given by getRootStatistics
+		"""
+		if not isinstance(self.root, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		for action, visits, score in rootStatistics:
+			if not action in self.root.actionVisits:
+				self.root.actionVisits[action] = 0
+				self.root.actionScore[action] = 0.0
+			self.root.actionVisits[action] += visits
+			self.root.actionScore[action] += score
+			self.root.numVisits += visits
+			self.root.totalScore += score
+		self.root.indexActionStatistics()
 
 	def getMCTSRootReward(self, action: TMDPAction) -> float:
 		if action in self.root.actionVisits and self.root.actionVisits[action]>0:
@@ -939,20 +2069,711 @@ class MCTSEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAct
 			print("===========================================================")
 		return actionChosen
 
+class ArrayMCTSEngine(MCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	MCTSEngine on an MDPMCTSTree: the UCB scores of the actions of a node are computed with array operations,
+	and the backpropagation updates the arrays along the selected path.
+	self.root is an MDPMCTSNodeView, so the root reward methods of MCTSEngine and tree reuse work as with MDPMCTSNode.
+	For the same seed, the tree is the same as the one of MCTSEngine.
+	"""
+	def __init__(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], root: "Optional[MDPMCTSNodeView[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" = None) -> None:
+		if not root is None and not isinstance(root, MDPMCTSNodeView):
+			raise Exception("bad MCTS root")
+		super().__init__(mdpExecutionEngine, options, root)
+		self.pathNodes: List[int] = [] # nodes of the path chosen by the last selection
+		self.pathEdges: List[int] = [] # edges of the path chosen by the last selection
+
+	def _newRoot(self, mdpActions: List[TMDPAction], nonDecisionAction: bool) -> "MDPMCTSNodeView[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		if self.mdpExecutionEngine.length(ignoreNonDecisionStates = False)>0:
+			raise Exception("bad MCTS root")
+		tree: MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPMCTSTree()
+		rootId = tree.addNode(self.mdpExecutionEngine.mdpEndState().deepCopy(), -1, None, 0, mdpActions, nonDecisionAction)
+		return MDPMCTSNodeView(tree, rootId)
+
+	def _addTranspositions(self, root: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> None:
+		"""!
+		A node of an MDPMCTSTree has a single parent: options.transpositions is ignored
+		"""
+		self.transpositions = None
+
+	def _countNodes(self) -> int:
+		if not isinstance(self.root, MDPMCTSNodeView): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		return self.root.tree.numNodes
+
+	def getTreeSize(self) -> Tuple[int, int]:
+		"""!
+		The arrays of the tree are counted with its states, outcomes and distinct actions, which MDPMCTSTree.getNumBytes leaves out
+		"""
+		if not isinstance(self.root, MDPMCTSNodeView): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		tree = self.root.tree
+		numBytes = tree.getNumBytes() + sum(_getObjectNumBytes(value) for values in [tree.nodeStates, tree.nodeOutcomes, list(tree.actionTable.values())] for value in values if not value is None)
+		return tree.numNodes, numBytes
+
+	def _markSelectedPath(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> None:
+		pass
+
+	def _evictNodes(self) -> None:
+		"""!
+		The nodes of an MDPMCTSTree are not dropped without copying the tree: options.maxNodes is ignored, and rejected by main.readParameters
+		"""
+		pass
+
+	def mergeRootStatistics(self, rootStatistics: List[Tuple[TMDPAction, int, float]]) -> None:
+		"""!
+		The actions must be legal actions of the root
+		"""
+		if not isinstance(self.root, MDPMCTSNodeView): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		tree = self.root.tree
+		node = self.root.nodeId
+		for action, visits, score in rootStatistics:
+			edge = tree.findEdge(node, action)
+			if edge < 0:
+				raise Exception("action outside the legal actions of the MCTS root")
+			tree.edgeVisits[edge] += visits
+			tree.edgeScore[edge] += score
+			tree.nodeVisits[node] += visits
+			tree.nodeScore[node] += score
+
+	def _getActionStatistics(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", action: TMDPAction) -> Tuple[float, float]:
+		if not isinstance(node, MDPMCTSNodeView):
+			raise Exception("bad MCTS node")
+		edge = node.tree.findEdge(node.nodeId, action)
+		if edge < 0:
+			return 0, 0.0
+		return int(node.tree.edgeVisits[edge]), float(node.tree.edgeScore[edge])
+
+	def _getScoresStr(self, tree: MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], node: int) -> str:
+		nonUcbScores: util.ConsoleStrFloatCounter[TMDPAction] = util.ConsoleStrFloatCounter()
+		ucbScores: util.ConsoleStrFloatCounter[TMDPAction] = util.ConsoleStrFloatCounter()
+		for edge in tree.getEdges(node):
+			action = tree.edgeActions[edge]
+			if tree.edgeVisits[edge] > 0:
+				nonUcbScores[action] = tree.edgeScore[edge] / tree.edgeVisits[edge]
+				ucbScores[action] = tree.edgeScore[edge] / tree.edgeVisits[edge] + self.mctsConstant * math.sqrt(2 * math.log(tree.nodeVisits[node]) / tree.edgeVisits[edge])
+			else:
+				nonUcbScores[action] = float('inf')
+				ucbScores[action] = float('inf')
+		return 'Scores'+str(nonUcbScores)+'UCB'+str(ucbScores)
+
+	def _selectLeaf(self) -> "MDPMCTSNodeView[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		if not isinstance(self.root, MDPMCTSNodeView): # to make the type-checker happy
+			raise Exception("bad MCTS root")
+		tree = self.root.tree
+		node = self.root.nodeId
+		self.pathNodes = [node]
+		self.pathEdges = []
+		executionEngine=self.mdpExecutionEngine
+		if not self.quiet: print("Selection phase")
+		depth = 0
+		decisionDepth = 0
+		while decisionDepth < self.horizon:
+			# Selects an action
+			firstEdge = int(tree.nodeFirstEdge[node])
+			numEdges = int(tree.nodeNumEdges[node])
+			depth += 1
+			if numEdges > 1 or not self.ignoreNonDecisionStates:
+				decisionDepth += 1
+			edgeVisits = tree.edgeVisits[firstEdge:firstEdge+numEdges]
+			edge = -1 # found from actionChosen if it is chosen by the selection strategy
+			notExplored = (edgeVisits == 0).nonzero()[0]
+			if len(notExplored)>0:
+				actionChosen = self._getMDPActionSelection([tree.edgeActions[firstEdge+i] for i in notExplored])
+				infoStr = 'NEW'
+			else:
+				if numEdges == 0:
+					raise NoMoveException("no move in argMax "+str(MDPMCTSNodeView(tree, node)))
+				ucbScores = tree.edgeScore[firstEdge:firstEdge+numEdges] / edgeVisits + self.mctsConstant * np.sqrt(2 * math.log(tree.nodeVisits[node]) / edgeVisits)
+				argMax = (ucbScores == ucbScores.max()).nonzero()[0]
+				if len(argMax)>1:
+					edge = firstEdge+int(argMax[random.randrange(len(argMax))])
+					infoStr = 'TIE'
+				else:
+					edge = firstEdge+int(argMax[0])
+					infoStr = ''
+				actionChosen = tree.edgeActions[edge]
+			if not self.quietInfoStr:
+				actionChosen = actionChosen.deepCopy()
+				if actionChosen.infoStr != '':
+					actionChosen.infoStr += '#'
+				actionChosen.infoStr += self._getScoresStr(tree, node)+infoStr
+			if edge < 0:
+				edge = tree.findEdge(node, actionChosen)
+				if edge < 0:
+					raise Exception("action outside the legal actions of the MCTS node")
+			# Draw a child of actionChosen
+			mdpTransition = self.mdpExecutionEngine.drawTransition(actionChosen, self.quietInfoStr)
+			if not self.quiet: print("+\t",mdpTransition.consoleStr())
+
+			# go to next node in execution engine
+			executionEngine.append(mdpTransition,bool(tree.nodeNonDecision[node]))
+			# Search for next node in children
+			self.pathEdges.append(edge)
+			nextNode = tree.findChild(edge, mdpTransition.mdpStochasticAction)
+			if nextNode >= 0:
+				if not self.quiet: print("->\tfound child in MCTS tree")
+				node = nextNode
+				self.pathNodes.append(node)
+			else:
+				# Constructs the new node
+				legalActions,legalActionsFull = self.mdpActionAdviceSelection.getMDPActionAdvice(executionEngine.mdpEndState(), self.mdpOperationsAdvice, self.quietInfoStr)
+
+				nonDecisionAction = (len(legalActionsFull)<=1) and self.ignoreNonDecisionStates
+				mdpOutcome = mdpTransition.mdpStochasticAction
+				if not self.quietInfoStr:
+					mdpOutcome = mdpOutcome.deepCopy()
+					mdpOutcome.infoStr = "" # resets the extra info
+				node = tree.addNode(executionEngine.mdpEndState().deepCopy(),edge,mdpOutcome,depth,legalActions,nonDecisionAction)
+				self.pathNodes.append(node)
+				self.searchStatistics['nodes created'] += 1
+				if not self.quiet: print("->\tnew child added to MCTS tree")
+				if not nonDecisionAction:
+					break
+			if executionEngine.isTerminal():
+				break
+		return MDPMCTSNodeView(tree, node)
+
+	def _backpropagate(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", simulationReward: float, numSims: int) -> None:
+		if not isinstance(node, MDPMCTSNodeView) or node.nodeId != self.pathNodes[-1]:
+			raise Exception("bad MCTS node")
+		if not self.quiet: print("Backpropagation phase")
+		tree = node.tree
+		pathNodes = np.array(self.pathNodes)
+		pathEdges = np.array(self.pathEdges, dtype=np.int64)
+		tree.nodeVisits[pathNodes] += numSims
+		tree.nodeScore[pathNodes] += simulationReward * numSims
+		tree.edgeVisits[pathEdges] += numSims
+		tree.edgeScore[pathEdges] += simulationReward * numSims
+		if not self.quiet and len(self.pathEdges) > 0: print("->\tnew root score for action",tree.edgeActions[self.pathEdges[0]].miniConsoleStr(),":",(tree.edgeScore[self.pathEdges[0]] / tree.edgeVisits[self.pathEdges[0]]))
+
+class MCTSSharedStatistics():
+	"""!
+	Visits and scores of the nodes and actions of an MCTS tree, in a block of shared memory that worker processes attach by name.
+	Each slot holds four numbers: the visits and the total score backpropagated so far,
+	and the visits and the score of the virtual loss of the pending iterations.
+	"""
+	SLOT_SIZE = 4
+
+	def __init__(self, capacity: int) -> None:
+		self.capacity = capacity # number of slots of the block
+		self.numSlots = 0 # number of allocated slots
+		self.block = shared_memory.SharedMemory(create=True, size=capacity*MCTSSharedStatistics.SLOT_SIZE*8)
+		self.values = self.block.buf.cast('d')
+
+	def name(self) -> str:
+		return self.block.name
+
+	def allocate(self, visits: float, score: float) -> int:
+		if self.numSlots >= self.capacity:
+			raise Exception("shared MCTS statistics are full")
+		slot = self.numSlots
+		self.numSlots += 1
+		offset = slot*MCTSSharedStatistics.SLOT_SIZE
+		self.values[offset:offset+MCTSSharedStatistics.SLOT_SIZE] = array.array('d', [visits, score, 0.0, 0.0])
+		return slot
+
+	def grow(self) -> None:
+		"""!
+		Moves the statistics to a new block of twice the capacity. The workers must not write into the old block anymore.
+		"""
+		size = self.numSlots*MCTSSharedStatistics.SLOT_SIZE
+		values = self.values
+		block = self.block
+		self.capacity *= 2
+		self.block = shared_memory.SharedMemory(create=True, size=self.capacity*MCTSSharedStatistics.SLOT_SIZE*8)
+		self.values = self.block.buf.cast('d')
+		self.values[:size] = values[:size]
+		values.release()
+		block.close()
+		block.unlink()
+
+	def close(self) -> None:
+		self.values.release()
+		self.block.close()
+		self.block.unlink()
+
+	def getStatistics(self, slot: int) -> Tuple[float, float]:
+		"""!
+		@return the visits and the total score of slot, virtual loss included
+		"""
+		offset = slot*MCTSSharedStatistics.SLOT_SIZE
+		return self.values[offset] + self.values[offset+2], self.values[offset+1] + self.values[offset+3]
+
+	def getBackpropagatedStatistics(self, slot: int) -> Tuple[float, float]:
+		offset = slot*MCTSSharedStatistics.SLOT_SIZE
+		return self.values[offset], self.values[offset+1]
+
+def _addSharedStatistics(values: memoryview, slots: List[int], virtual: bool, visits: float, score: float) -> None:
+	offset = (2 if virtual else 0)
+	for slot in slots:
+		values[slot*MCTSSharedStatistics.SLOT_SIZE+offset] += visits
+		values[slot*MCTSSharedStatistics.SLOT_SIZE+offset+1] += score
+
+_treeWorkerData: Dict[str, Any] = {} # the operations, options and shared statistics of a worker process of TreeParallelMCTSEngine
+
+def _initTreeWorker(mdpOperations: Any, optionsMCTSEngine: OptionsMCTSEngine, lock: Any) -> None:
+	_treeWorkerData['mdpOperations'] = mdpOperations
+	_treeWorkerData['optionsMCTSEngine'] = optionsMCTSEngine
+	_treeWorkerData['lock'] = lock
+	_treeWorkerData['block'] = None
+
+def _attachSharedStatistics(blockName: str) -> memoryview:
+	block = _treeWorkerData['block']
+	if block is None or block.name != blockName:
+		if not block is None:
+			_treeWorkerData['values'].release()
+			block.close()
+		block = shared_memory.SharedMemory(name=blockName)
+		_treeWorkerData['block'] = block
+		_treeWorkerData['values'] = block.buf.cast('d')
+	return _treeWorkerData['values']
+
+def _runTreeWorker(mdpExecution: MDPExecution, nonDecisionLength: int, numSims: int, blockName: str, slots: List[int], seed: int) -> float:
+	"""!
+	Simulation and backpropagation phases of an iteration of TreeParallelMCTSEngine in a worker process
+	@return the simulation reward
+	"""
+	random.seed(seed)
+	mdpOperations = _treeWorkerData['mdpOperations']
+	mdpOperations.setSeed(seed)
+	executionEngine = MDPExecutionEngine(mdpOperations,mdpExecution,nonDecisionLength)
+	simulationReward = _getMCTSSimulationReward(executionEngine, _treeWorkerData['optionsMCTSEngine'], numSims)
+	values = _attachSharedStatistics(blockName)
+	with _treeWorkerData['lock']:
+		_addSharedStatistics(values, slots, False, numSims, simulationReward * numSims)
+	return simulationReward
+
+class TreeParallelMCTSEngine(MCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	MCTSEngine whose iterations run concurrently in options.numTreeWorkers worker processes on a single tree (tree parallelization).
+	The visits and scores of the tree are kept in MCTSSharedStatistics during doMCTSIterations, and copied back to the nodes at the end.
+	The calling process owns the tree: it selects the paths and expands the tree, and adds a virtual loss along each selected path
+	so that the following selections spread over other branches while the iteration is pending.
+	A pending iteration counts as numSims visits of the lowest simulation reward seen so far (0 before the first one).
+	The workers draw the simulations from the leaf with their own simulator, and backpropagate the reward in shared memory;
+	the virtual loss is removed when the calling process collects the iteration.
+	With a single worker, the iterations run one at a time in the calling process, and for the same seed
+	the tree is the same as the one of MCTSEngine.
+	The workers are started by the first call and kept until closeWorkers().
+	The nodes collapsed by options.maxNodes keep their slots, and the memory they hold, until the end of doMCTSIterations.
+	"""
+	workerPool: Optional[Any] = None # the worker processes, shared by all the instances
+	workerLock: Optional[Any] = None # serializes the writes into the shared statistics
+	BUDGET_ITERATIONS = 1024 # iterations the shared statistics are first sized for when the search is only bounded by a time budget
+
+	def __init__(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], options: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], root: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" = None) -> None:
+		super().__init__(mdpExecutionEngine, options, root)
+		self.numWorkers = options.numTreeWorkers
+		self.sharedStatistics: Optional[MCTSSharedStatistics] = None # open during doMCTSIterations
+		self.nodeSlots: "Dict[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], int]" = {} # slot of the statistics of a node
+		self.actionSlots: "Dict[Tuple[MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], TMDPAction], int]" = {} # slot of the statistics of an action of a node
+		self.pendingIterations: Dict[int, Tuple[List[int], int, float]] = {} # slots, virtual visits and virtual score of the iterations sent to the workers
+		self.finishedIterations: "queue.Queue[Tuple[int, Optional[float], Optional[BaseException]]]" = queue.Queue() # iterations returned by the workers
+		self.numStartedIterations = 0
+		self.lossReward: Optional[float] = None # lowest simulation reward returned so far
+
+	@classmethod
+	def closeWorkers(cls) -> None:
+		if not cls.workerPool is None:
+			cls.workerPool.terminate()
+			cls.workerPool.join()
+			cls.workerPool = None
+			cls.workerLock = None
+
+	def _getWorkerPool(self) -> Any:
+		if TreeParallelMCTSEngine.workerPool is None:
+			context = multiprocessing.get_context("spawn")
+			TreeParallelMCTSEngine.workerLock = context.Lock()
+			TreeParallelMCTSEngine.workerPool = context.Pool(self.numWorkers, initializer=_initTreeWorker, initargs=(self.mdpExecutionEngine.mdpOperations, self.options, TreeParallelMCTSEngine.workerLock))
+		return TreeParallelMCTSEngine.workerPool
+
+	def _addSharedStatistics(self, slots: List[int], virtual: bool, visits: float, score: float) -> None:
+		if self.sharedStatistics is None:
+			raise Exception("shared MCTS statistics are closed")
+		if TreeParallelMCTSEngine.workerLock is None:
+			_addSharedStatistics(self.sharedStatistics.values, slots, virtual, visits, score)
+		else:
+			with TreeParallelMCTSEngine.workerLock:
+				_addSharedStatistics(self.sharedStatistics.values, slots, virtual, visits, score)
+
+	def _allocateSlot(self, visits: float, score: float) -> int:
+		if self.sharedStatistics is None:
+			raise Exception("shared MCTS statistics are closed")
+		if self.sharedStatistics.numSlots >= self.sharedStatistics.capacity:
+			self._waitIterations(0)
+			self.sharedStatistics.grow()
+		return self.sharedStatistics.allocate(visits, score)
+
+	def _getNodeSlot(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> int:
+		if not node in self.nodeSlots:
+			self.nodeSlots[node] = self._allocateSlot(node.numVisits, node.totalScore)
+		return self.nodeSlots[node]
+
+	def _getActionSlot(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", action: TMDPAction) -> int:
+		if not (node, action) in self.actionSlots:
+			self.actionSlots[(node, action)] = self._allocateSlot(node.actionVisits[action], node.actionScore[action])
+		return self.actionSlots[(node, action)]
+
+	def _getPathSlots(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> List[int]:
+		"""!
+		@return the slots updated by the backpropagation from node along the selected path, in the order of MCTSEngine._backpropagate
+		"""
+		if not isinstance(node, MDPMCTSNode): # to make the type-checker happy
+			raise Exception("bad MCTS node")
+		slots = [self._getNodeSlot(node)]
+		for node, action, _ in reversed(self.selectedPath):
+			slots.append(self._getActionSlot(node, action))
+			slots.append(self._getNodeSlot(node))
+		return slots
+
+	def _getActionStatistics(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", action: TMDPAction) -> Tuple[float, float]:
+		if self.sharedStatistics is None or not isinstance(node, MDPMCTSNode) or not (node, action) in self.actionSlots:
+			return super()._getActionStatistics(node, action)
+		return self.sharedStatistics.getStatistics(self.actionSlots[(node, action)])
+
+	def _getLegalStatistics(self, node: "MDPMCTSNode[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> Tuple[List[float], List[float]]:
+		if self.sharedStatistics is None:
+			return super()._getLegalStatistics(node)
+		statistics = [self._getActionStatistics(node, action) for action in node.legalActions]
+		return [visits for visits, _ in statistics], [score for _, score in statistics]
+
+	def _getNodeVisits(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]") -> float:
+		if self.sharedStatistics is None or not isinstance(node, MDPMCTSNode) or not node in self.nodeSlots:
+			return super()._getNodeVisits(node)
+		return self.sharedStatistics.getStatistics(self.nodeSlots[node])[0]
+
+	def _backpropagate(self, node: "MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]", simulationReward: float, numSims: int) -> None:
+		if not self.quiet: print("Backpropagation phase")
+		self._addSharedStatistics(self._getPathSlots(node), False, numSims, simulationReward * numSims)
+
+	def _startIteration(self, numSims: int) -> None:
+		"""!
+		Selects a path with a virtual loss, and sends the simulations from its leaf to a worker
+		"""
+		self.numSims = numSims
+		executionEngine = self.mdpExecutionEngine
+		fastResetData0 = executionEngine.getFastResetData()
+		node = self._selectLeaf()
+		self._markSelectedPath(node)
+		slots = self._getPathSlots(node)
+		lossScore = (0.0 if self.lossReward is None else self.lossReward) * numSims
+		self._addSharedStatistics(slots, True, numSims, lossScore)
+		key = self.numStartedIterations
+		self.numStartedIterations += 1
+		self.pendingIterations[key] = (slots, numSims, lossScore)
+		if self.sharedStatistics is None: # to make the type-checker happy
+			raise Exception("shared MCTS statistics are closed")
+		# the execution is pickled by another thread of the pool, after it is reset here
+		mdpExecution = executionEngine.mdpExecution.executionCopy()
+		self._getWorkerPool().apply_async(_runTreeWorker, (mdpExecution, executionEngine.nonDecisionLength, numSims, self.sharedStatistics.name(), slots, random.getrandbits(31)),
+			callback=lambda simulationReward, key=key: self.finishedIterations.put((key, simulationReward, None)),
+			error_callback=lambda error, key=key: self.finishedIterations.put((key, None, error)))
+		executionEngine.fastReset(fastResetData0)
+
+	def _waitIterations(self, maxPending: int) -> None:
+		"""!
+		Collects the iterations returned by the workers and removes their virtual loss, until at most maxPending are pending
+		"""
+		while len(self.pendingIterations) > maxPending:
+			key, simulationReward, error = self.finishedIterations.get()
+			slots, numSims, lossScore = self.pendingIterations.pop(key)
+			self._addSharedStatistics(slots, True, -numSims, -lossScore)
+			if not error is None:
+				raise error
+			if simulationReward is None: # to make the type-checker happy
+				raise Exception("could not get a reward estimate from simulation")
+			if not self.quiet: print("->\tworker outputs score",simulationReward)
+			self._observeReward(simulationReward)
+			if self.lossReward is None or simulationReward < self.lossReward:
+				self.lossReward = simulationReward
+
+	def _updateTree(self) -> None:
+		"""!
+		Copies the backpropagated statistics to the nodes
+		"""
+		if self.sharedStatistics is None:
+			raise Exception("shared MCTS statistics are closed")
+		for node, slot in self.nodeSlots.items():
+			visits, score = self.sharedStatistics.getBackpropagatedStatistics(slot)
+			node.numVisits = int(visits)
+			node.totalScore = score
+		for (node, action), slot in self.actionSlots.items():
+			visits, score = self.sharedStatistics.getBackpropagatedStatistics(slot)
+			node.actionVisits[action] = int(visits)
+			node.actionScore[action] = score
+		for node in self.nodeSlots:
+			node.indexActionStatistics()
+
+	def doMCTSIterations(self, numMCTSIters: Optional[int], numSims: int, timeBudget: Optional[float] = None) -> None:
+		"""!
+		With a time budget, no iteration starts after the end of the budget, and the pending ones are completed
+		"""
+		deadline = self._getDeadline(numMCTSIters, timeBudget)
+		self.sharedStatistics = MCTSSharedStatistics(2 * (TreeParallelMCTSEngine.BUDGET_ITERATIONS if numMCTSIters is None else numMCTSIters) * (self.horizon + 1))
+		self.nodeSlots = {}
+		self.actionSlots = {}
+		try:
+			if self.numWorkers <= 1 or multiprocessing.current_process().daemon:
+				super().doMCTSIterations(numMCTSIters, numSims, timeBudget)
+			else:
+				i = 0
+				while self._continueIterations(i, numMCTSIters, deadline, numSims):
+					if not self.quiet:
+						print("===========================================================")
+						print("MCTS Iteration",i)
+						print("===========================================================")
+					self._waitIterations(self.numWorkers - 1)
+					self._startIteration(numSims)
+					self.searchStatistics['iterations'] += 1
+					self._evictNodes()
+					i += 1
+				self._waitIterations(0)
+			self._updateTree()
+		finally:
+			self.sharedStatistics.close()
+			self.sharedStatistics = None
+
+_mctsWorkerData: Dict[str, Any] = {} # the operations and options of a worker process of MDPMCTSActionStrategy
+
+def _initMCTSWorker(mdpOperations: Any, optionsMCTSEngine: OptionsMCTSEngine, numMCTSIters: Optional[int], numSims: int, timeBudget: Optional[float]) -> None:
+	_mctsWorkerData['mdpOperations'] = mdpOperations
+	_mctsWorkerData['optionsMCTSEngine'] = optionsMCTSEngine
+	_mctsWorkerData['numMCTSIters'] = numMCTSIters
+	_mctsWorkerData['numSims'] = numSims
+	_mctsWorkerData['timeBudget'] = timeBudget
+
+def _runMCTSWorker(mdpState: Any, seed: int) -> Tuple[List[Tuple[Any, int, float]], Dict[str, float]]:
+	"""!
+	Builds a tree from mdpState in a worker process, and returns the statistics of its root and of its search
+	"""
+	random.seed(seed)
+	mdpOperations = _mctsWorkerData['mdpOperations']
+	mdpOperations.setSeed(seed)
+	mdpPath: MDPPath = MDPPath(mdpState.deepCopy(),[],[[]],mdpOperations.getPredicateTable())
+	execEngine = MDPExecutionEngine(mdpOperations,MDPExecution(mdpPath,mdpState.deepCopy(),0,False,1),0)
+	mctsEngine: MCTSEngine = MCTSEngine(execEngine, _mctsWorkerData['optionsMCTSEngine'])
+	mctsEngine.doMCTSIterations(_mctsWorkerData['numMCTSIters'],_mctsWorkerData['numSims'],_mctsWorkerData['timeBudget'])
+	return mctsEngine.getRootStatistics(), mctsEngine.getSearchStatistics()
+
+class MDPMCTSOpeningBook(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	"""!
+	The root statistics of the last search from each state (see MCTSEngine.getRootStatistics), kept across games and runs.
+	It is saved as a JSON file, with the states and actions written with fileStr and the parameters the scores depend on.
+	"""
+	def __init__(self, info: Dict[str, Any]) -> None:
+		self.info = info # parameters of the searches, checked by load
+		self.entries: Dict[TMDPState, List[Tuple[TMDPAction, int, float]]] = {} # root statistics of each state
+
+	def get(self, mdpState: TMDPState) -> Optional[List[Tuple[TMDPAction, int, float]]]:
+		return self.entries.get(mdpState)
+
+	def put(self, mdpState: TMDPState, rootStatistics: List[Tuple[TMDPAction, int, float]]) -> None:
+		self.entries[mdpState.deepCopy()] = [(action.deepCopy(), visits, score) for action, visits, score in rootStatistics]
+
+	def __len__(self) -> int:
+		return len(self.entries)
+
+	def save(self, fileName: str) -> None:
+		"""!
+		Writes the book to fileName, which is replaced at once
+		"""
+		mdpState = next(iter(self.entries), None)
+		mdpAction = next((statistics[0][0] for statistics in self.entries.values() if len(statistics) > 0), None)
+		book = {'info': self.info, 'classes': {'state': _getClassName(mdpState), 'action': _getClassName(mdpAction)},
+			'entries': [[state.fileStr(), [[action.fileStr(), visits, score] for action, visits, score in statistics]] for state, statistics in self.entries.items()]}
+		tmpFileName = fileName + '.tmp'
+		with open(tmpFileName, 'w') as file:
+			json.dump(book, file)
+		os.replace(tmpFileName, fileName)
+
+	@classmethod
+	def load(cls, fileName: str, info: Dict[str, Any]) -> "MDPMCTSOpeningBook[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
+		"""!
+		Reads a book written by save, that must have been built with the parameters info
+		"""
+		with open(fileName) as file:
+			book = json.load(file)
+		if book['info'] != info:
+			raise Exception("the MCTS opening book "+fileName+" was saved with other parameters: "+str(book['info']))
+		openingBook: MDPMCTSOpeningBook[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = cls(info)
+		if len(book['entries']) > 0:
+			stateClass = _getClass(book['classes']['state'])
+			actionClass = (_getClass(book['classes']['action']) if not book['classes']['action'] is None else None)
+			for state, statistics in book['entries']:
+				openingBook.entries[stateClass.fromFileStr(state)] = [(actionClass.fromFileStr(action), int(visits), float(score)) for action, visits, score in statistics]
+		return openingBook
+
 class MDPMCTSActionStrategy( MDPActionStrategyInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] ):
 	"""!
-	A probabilistic strategy that draws from a distribution over legal actions
+	A probabilistic strategy that draws from a distribution over legal actions.
+	If optionsMCTSEngine.reuseTree is true, the search of a decision starts from the subtree
+	of the previous tree that matches the action played and the state reached since.
+	If optionsMCTSEngine.numWorkers > 1, each decision is searched by that many worker processes (root parallelization):
+	each builds its own tree of numMCTSIters iterations from the state with its own seed, and the statistics of the roots are added up.
+	The operations are pickled to the workers, which must rebuild their own simulator (see stormMdpClasses.MDPOperations.__getstate__).
+	Trees are not reused in this mode. Call close() to stop the workers.
+	Otherwise, if optionsMCTSEngine.numTreeWorkers > 0, each tree is built by a TreeParallelMCTSEngine,
+	and if optionsMCTSEngine.arrayTree is true, by an ArrayMCTSEngine.
+	Each decision runs numMCTSIters iterations, or if timeBudget is not None, as many as fit in timeBudget seconds
+	with numMCTSIters as a cap if it is not None.
+	The search statistics of each decision (see MCTSEngine.getSearchStatistics) are appended to decisionStatistics,
+	summed over the trees of the workers in root parallelization.
+	If optionsMCTSEngine.checkpointFile is not None, the tree of the first decision searched, down to optionsMCTSEngine.checkpointDepth,
+	is saved in it (see MDPMCTSTree.save), and so is the tree of each later decision from the same state without a reused subtree,
+	such as the first decision of the next game. These decisions start from the saved tree instead of an empty root,
+	and so does the first one if the file exists when the strategy is created. Checkpoints are not used in root parallelization.
+	If optionsMCTSEngine.openingBookFile is not None, the root statistics of the decisions without a reused subtree are kept in an
+	MDPMCTSOpeningBook, loaded from the file by the first decision if it exists and saved by close().
+	A decision from a state of the book, without a reused subtree or a checkpoint, adds its statistics to the root as priors,
+	and is played without iterations if they already decide the action (see MCTSEngine.isSearchDecided).
 	"""
 	TMDPOperations = TypeVar("TMDPOperations",bound=MDPOperationsInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 	# Abstract class
-	def __init__(self, numMCTSIters: int, numSims: int, optionsMCTSEngine: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> None:
+	def __init__(self, numMCTSIters: Optional[int], numSims: int, optionsMCTSEngine: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], timeBudget: Optional[float] = None) -> None:
 
 		self.numMCTSIters=numMCTSIters
 		self.numSims=numSims
+		self.timeBudget=timeBudget # seconds of search per decision, or None to run numMCTSIters iterations
 
 		self.optionsMCTSEngine = optionsMCTSEngine
+		self.mctsRoot: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" = None # root of the tree of the previous decision
+		self.lastAction: Optional[TMDPAction] = None # action returned by the previous decision
+		self.workerPool: Optional[Any] = None # the worker processes, started by the first decision if optionsMCTSEngine.numWorkers > 1
+		self.decisionStatistics: List[Dict[str, float]] = [] # search statistics of the decisions made so far
+		self.checkpoint: Optional[MDPMCTSTree[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]] = None # tree of optionsMCTSEngine.checkpointFile
+		self.checkpointLoaded = False # true once the first decision has looked for optionsMCTSEngine.checkpointFile
+		self.openingBook: Optional[MDPMCTSOpeningBook[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]] = None # loaded by the first decision if optionsMCTSEngine.openingBookFile is not None
 	def deepCopy(self) -> "MDPMCTSActionStrategy[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]":
-		return MDPMCTSActionStrategy(numMCTSIters=self.numMCTSIters, numSims=self.numSims, optionsMCTSEngine=self.optionsMCTSEngine)
+		return MDPMCTSActionStrategy(numMCTSIters=self.numMCTSIters, numSims=self.numSims, optionsMCTSEngine=self.optionsMCTSEngine, timeBudget=self.timeBudget)
+
+	def close(self) -> None:
+		"""!
+		Stops the worker processes, and saves the opening book
+		"""
+		if not self.openingBook is None and not self.optionsMCTSEngine.openingBookFile is None:
+			self.openingBook.save(self.optionsMCTSEngine.openingBookFile)
+		if not self.workerPool is None:
+			self.workerPool.terminate()
+			self.workerPool.join()
+			self.workerPool = None
+
+	def _runWorkers(self, mctsEngine: MCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], mdpState: TMDPState, mdpOperations: TMDPOperations) -> None:
+		"""!
+		Builds optionsMCTSEngine.numWorkers trees from mdpState in the worker processes, and merges their root statistics in mctsEngine
+		"""
+		if self.workerPool is None:
+			# spawned workers start from a fresh interpreter, where the stormpy objects are rebuilt instead of copied
+			context = multiprocessing.get_context("spawn")
+			self.workerPool = context.Pool(self.optionsMCTSEngine.numWorkers, initializer=_initMCTSWorker, initargs=(mdpOperations, self.optionsMCTSEngine, self.numMCTSIters, self.numSims, self.timeBudget))
+		seeds = [random.getrandbits(31) for _ in range(self.optionsMCTSEngine.numWorkers)]
+		for rootStatistics, searchStatistics in self.workerPool.starmap(_runMCTSWorker, [(mdpState, seed) for seed in seeds]):
+			mctsEngine.mergeRootStatistics(rootStatistics)
+			mctsEngine.mergeSearchStatistics(searchStatistics)
+
+	def _getMCTSEngine(self, execEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], root: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]" = None) -> MCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]:
+		if self.optionsMCTSEngine.numTreeWorkers > 0:
+			return TreeParallelMCTSEngine(execEngine, self.optionsMCTSEngine, root)
+		if self.optionsMCTSEngine.arrayTree:
+			return ArrayMCTSEngine(execEngine, self.optionsMCTSEngine, root)
+		return MCTSEngine(execEngine, self.optionsMCTSEngine, root)
+
+	def _nextRoot(self, mdpState: TMDPState) -> "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]":
+		"""!
+		Returns the child of the previous root that was reached by playing lastAction and arriving in mdpState,
+		or None if it is not in the tree. A child shared through transpositions and created under another parent is not reused.
+		"""
+		if self.mctsRoot is None or self.lastAction is None or not self.optionsMCTSEngine.reuseTree:
+			return None
+		nextRoot = None
+		for child in self.mctsRoot.children.get(self.lastAction, []):
+			if child.mdpState == mdpState and child.mdpParentNode == self.mctsRoot and (nextRoot is None or child.numVisits > nextRoot.numVisits):
+				nextRoot = child
+		return nextRoot
+
+	def _setLastDecision(self, mctsRoot: "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]", mdpAction: TMDPAction) -> None:
+		if not self.optionsMCTSEngine.reuseTree:
+			return
+		self.mctsRoot = mctsRoot
+		self.lastAction = mdpAction.deepCopy()
+
+	def _getScoreInfo(self) -> Dict[str, Any]:
+		"""!
+		@return the parameters that the scores of a checkpoint or an opening book depend on, saved with them
+		"""
+		optionsSimulation = self.optionsMCTSEngine.optionsSimulationEngine
+		return {'horizon': self.optionsMCTSEngine.horizon, 'simulation horizon': optionsSimulation.horizon, 'alpha': optionsSimulation.alpha, 'ignore non decision states': self.optionsMCTSEngine.ignoreNonDecisionStates}
+
+	def _checkpointRoot(self, mdpState: TMDPState) -> "Optional[MDPMCTSNodeInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]":
+		"""!
+		Returns a copy of the root of the checkpoint if it is at mdpState, for the engine of _getMCTSEngine, or None.
+		The first call loads optionsMCTSEngine.checkpointFile if it exists.
+		"""
+		fileName = self.optionsMCTSEngine.checkpointFile
+		if fileName is None:
+			return None
+		if not self.checkpointLoaded:
+			self.checkpointLoaded = True
+			if os.path.exists(fileName):
+				self.checkpoint, info = MDPMCTSTree.load(fileName)
+				if info != self._getScoreInfo():
+					raise Exception("the MCTS checkpoint "+fileName+" was saved with other parameters: "+str(info))
+				if not self.optionsMCTSEngine.quiet: print("loaded MCTS checkpoint",fileName,"with",self.checkpoint.numNodes,"nodes")
+		if self.checkpoint is None or self.checkpoint.nodeStates[0] != mdpState:
+			return None
+		if self.optionsMCTSEngine.numTreeWorkers == 0 and self.optionsMCTSEngine.arrayTree:
+			return MDPMCTSNodeView(self.checkpoint, 0) # ArrayMCTSEngine copies the subtree of its root
+		return self.checkpoint.toNode()
+
+	def _saveCheckpoint(self, mctsEngine: MCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], reusedTree: bool) -> None:
+		"""!
+		Saves the tree of mctsEngine in optionsMCTSEngine.checkpointFile if it is the first one, or if it is from the state of the checkpoint without a reused subtree
+		"""
+		fileName = self.optionsMCTSEngine.checkpointFile
+		if fileName is None or (not self.checkpoint is None and (reusedTree or self.checkpoint.nodeStates[0] != mctsEngine.root.mdpState)):
+			return
+		self.checkpoint = MDPMCTSTree.fromNode(mctsEngine.root, self.optionsMCTSEngine.checkpointDepth)
+		self.checkpoint.save(fileName, self._getScoreInfo())
+		if not self.optionsMCTSEngine.quiet: print("saved MCTS checkpoint",fileName,"with",self.checkpoint.numNodes,"nodes")
+
+	def _getOpeningBook(self) -> Optional[MDPMCTSOpeningBook[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]]:
+		"""!
+		@return the opening book, loaded from optionsMCTSEngine.openingBookFile by the first call if it exists, None if there is no file
+		"""
+		fileName = self.optionsMCTSEngine.openingBookFile
+		if fileName is None:
+			return None
+		if self.openingBook is None:
+			if os.path.exists(fileName):
+				self.openingBook = MDPMCTSOpeningBook.load(fileName, self._getScoreInfo())
+				if not self.optionsMCTSEngine.quiet: print("loaded MCTS opening book",fileName,"with",len(self.openingBook),"states")
+			else:
+				self.openingBook = MDPMCTSOpeningBook(self._getScoreInfo())
+		return self.openingBook
+
+	def _seedFromOpeningBook(self, mctsEngine: MCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], mdpState: TMDPState) -> bool:
+		"""!
+		Adds the root statistics of mdpState in the opening book to the root of mctsEngine, for its legal actions
+		@return true if they decide the action, so that no iteration is needed
+		"""
+		openingBook = self._getOpeningBook()
+		rootStatistics = (None if openingBook is None else openingBook.get(mdpState))
+		if rootStatistics is None:
+			return False
+		legalActions = mctsEngine.root.legalActions
+		mctsEngine.mergeRootStatistics([(action, visits, score) for action, visits, score in rootStatistics if action in legalActions])
+		mctsEngine.searchStatistics['book priors'] += 1
+		if not mctsEngine.isSearchDecided(None, self.numSims):
+			return False
+		mctsEngine.searchStatistics['book decisions'] += 1
+		if not self.optionsMCTSEngine.quiet: print("MCTS opening book decides the action")
+		return True
+
+	def _addDecisionStatistics(self, searchStatistics: Dict[str, float]) -> None:
+		self.decisionStatistics.append(searchStatistics)
+		if not self.optionsMCTSEngine.quiet:
+			print("MCTS search statistics:",' '.join([key+"="+str(value) for key, value in searchStatistics.items()]))
 
 	def getMDPValues(self, mdpState, mdpOperations, quietInfoStr):
 		"""!
@@ -971,11 +2792,11 @@ class MDPMCTSActionStrategy( MDPActionStrategyInterface[TMDPPredicate, TMDPState
 		initState = mdpState.deepCopy()
 		endState = mdpState.deepCopy()
 		# TODO initial predicates
-		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],[predicates])
+		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],[predicates],mdpOperations.getPredicateTable())
 		execEngine = MDPExecutionEngine(mdpOperations,MDPExecution(mdpPath,endState,0,False,1),0)
 
-		mctsEngine = MCTSEngine(execEngine, self.optionsMCTSEngine)
-		mctsEngine.doMCTSIterations(self.numMCTSIters,self.numSims)
+		mctsEngine = self._getMCTSEngine(execEngine)
+		mctsEngine.doMCTSIterations(self.numMCTSIters,self.numSims,self.timeBudget)
 		return mctsEngine.getMCTSRootRewardDict()
 
 	def getMDPAction(self, mdpState: TMDPState, mdpOperations: TMDPOperations, quietInfoStr: bool) -> TMDPAction:
@@ -984,23 +2805,45 @@ class MDPMCTSActionStrategy( MDPActionStrategyInterface[TMDPPredicate, TMDPState
 		must return a legal MDPAction
 		"""
 		choices = mdpOperations.getLegalActions(mdpState)
+		root = self._nextRoot(mdpState)
 		if len(choices) == 1:
 			choice = choices[0]
 			if not self.optionsMCTSEngine.quiet:
 				print("===========================================================")
 				print('Only one available action; no need for MCTS:', choice.consoleStr())
 				print("===========================================================")
+			self._setLastDecision(root, choice)
 			return(choice)
 		predicates: List[TMDPPredicate] = []#[ProductMDPPredicate(p) for p in initialPredicateDatas]
 		initState = mdpState.deepCopy()
 		endState = mdpState.deepCopy()
 		# TODO initial predicates
-		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],[predicates])
+		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],[predicates],mdpOperations.getPredicateTable())
 		execEngine = MDPExecutionEngine(mdpOperations,MDPExecution(mdpPath,endState,0,False,1),0)
 
-		mctsEngine = MCTSEngine(execEngine, self.optionsMCTSEngine)
-		mctsEngine.doMCTSIterations(self.numMCTSIters,self.numSims)
+		if self.optionsMCTSEngine.numWorkers > 1:
+			mctsEngine = MCTSEngine(execEngine, self.optionsMCTSEngine)
+			if not self._seedFromOpeningBook(mctsEngine, mdpState):
+				self._runWorkers(mctsEngine, mdpState, mdpOperations)
+			if not self.openingBook is None:
+				self.openingBook.put(mdpState, mctsEngine.getRootStatistics())
+			self._addDecisionStatistics(mctsEngine.getSearchStatistics())
+			return mctsEngine.getMCTSRootAction()
+		reusedTree = not root is None
+		if root is None:
+			root = self._checkpointRoot(mdpState)
+		if not root is None and not self.optionsMCTSEngine.quiet:
+			print("reusing MCTS subtree with",root.numVisits,"visits")
+		mctsEngine = self._getMCTSEngine(execEngine, root)
+		if not root is None or not self._seedFromOpeningBook(mctsEngine, mdpState):
+			mctsEngine.doMCTSIterations(self.numMCTSIters,self.numSims,self.timeBudget)
+		self._saveCheckpoint(mctsEngine, reusedTree)
+		openingBook = (None if reusedTree else self._getOpeningBook())
+		if not openingBook is None:
+			openingBook.put(mdpState, mctsEngine.getRootStatistics())
+		self._addDecisionStatistics(mctsEngine.getSearchStatistics())
 		choice = mctsEngine.getMCTSRootAction()
+		self._setLastDecision(mctsEngine.root, choice)
 		return choice
 	def getMDPActionInSubset(self, mdpActions: List[TMDPAction], mdpState: TMDPState, mdpOperations: TMDPOperations, quietInfoStr: bool) -> TMDPAction:
 		# raise Exception("MCTS strategy incompatible with advice")
@@ -1009,20 +2852,32 @@ class MDPMCTSActionStrategy( MDPActionStrategyInterface[TMDPPredicate, TMDPState
 class MDPMCTSTraceEngine(Generic[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
 	TMDPOperations = TypeVar("TMDPOperations",bound=MDPOperationsInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction])
 
-	def getMCTSSimulationEngine(self, mdpState: TMDPState, mdpPredicates: List[TMDPPredicate], mdpOperations: TMDPOperations, horizonTrace: int, numMCTSIters: int, numSims: int, optionsMCTSEngine: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], quietTrace: bool, quietInfoStr: bool, printEachStepTrace: bool) -> MDPSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]:
+	def getMCTSSimulationEngine(self, mdpState: TMDPState, mdpPredicates: List[TMDPPredicate], mdpOperations: TMDPOperations, horizonTrace: int, numMCTSIters: Optional[int], numSims: int, optionsMCTSEngine: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], quietTrace: bool, quietInfoStr: bool, printEachStepTrace: bool, timeBudget: Optional[float] = None) -> MDPSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]:
 		initState=mdpState.deepCopy()
 		endState=mdpState.deepCopy()
-		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],[mdpPredicates])
+		mdpPath: MDPPath[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = MDPPath(initState,[],[mdpPredicates],mdpOperations.getPredicateTable())
 		mdpExecutionEngine=MDPExecutionEngine(mdpOperations,MDPExecution(mdpPath,endState,0,False,1),0)
-		mdpActionStrategy = MDPMCTSActionStrategy(numMCTSIters=numMCTSIters, numSims=numSims, optionsMCTSEngine=optionsMCTSEngine)
+		mdpActionStrategy = MDPMCTSActionStrategy(numMCTSIters=numMCTSIters, numSims=numSims, optionsMCTSEngine=optionsMCTSEngine, timeBudget=timeBudget)
 		mdpActionTraceAdvice=MDPFullActionAdvice() # type: MDPFullActionAdvice[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]
 		mdpPathTraceAdvice=MDPFullPathAdvice() # type: Any
 		mdpStateScoreTrace=MDPStateScoreZero() # type: Any
-		optionsTraceEngine: OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = OptionsSimulationEngine(horizon=horizonTrace, ignoreNonDecisionStates = False, mdpActionStrategy=mdpActionStrategy, mdpActionAdvice=mdpActionTraceAdvice, mdpPathAdvice=mdpPathTraceAdvice, mdpStateScore=mdpStateScoreTrace, alpha = 0.0, rejectFactor=1, quiet=quietTrace, quietInfoStr=quietInfoStr, printEachStep=printEachStepTrace, printCompact=True)
+		optionsTraceEngine: OptionsSimulationEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction] = OptionsSimulationEngine(horizon=horizonTrace, ignoreNonDecisionStates = False, mdpActionStrategy=mdpActionStrategy, mdpActionAdvice=mdpActionTraceAdvice, mdpPathAdvice=mdpPathTraceAdvice, mdpStateScore=mdpStateScoreTrace, alpha = 0.0, rejectFactor=1, quiet=quietTrace, quietInfoStr=quietInfoStr, printEachStep=printEachStepTrace, printCompact=True, consumer=CONSUMER_GAME)
 		mdpSimulationEngine = MDPSimulationEngine(mdpExecutionEngine, optionsTraceEngine)
 		return mdpSimulationEngine
 
-	def runMCTSTrace(self, numTraces: int, mdpState: TMDPState, mdpPredicates: List[TMDPPredicate], mdpOperations: TMDPOperations, horizonTrace: int, numMCTSIters: int, numSims: int, optionsMCTSEngine: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], quietTrace: bool, quietInfoStr: bool, printEachStepTrace: bool) -> List[Tuple[MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], float, int]]:
-		mdpSimulationEngine = self.getMCTSSimulationEngine(mdpState, mdpPredicates, mdpOperations, horizonTrace, numMCTSIters, numSims, optionsMCTSEngine,quietTrace,quietInfoStr,printEachStepTrace)
-		results = mdpSimulationEngine.getSimulations(numTraces)
+	def runMCTSTrace(self, numTraces: int, mdpState: TMDPState, mdpPredicates: List[TMDPPredicate], mdpOperations: TMDPOperations, horizonTrace: int, numMCTSIters: Optional[int], numSims: int, optionsMCTSEngine: OptionsMCTSEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], quietTrace: bool, quietInfoStr: bool, printEachStepTrace: bool, decisionStatistics: Optional[List[Dict[str, float]]] = None, timeBudget: Optional[float] = None) -> List[Tuple[MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction], float, int]]:
+		"""!
+		@param numMCTSIters iterations of each decision, or their cap if timeBudget is not None (None for no cap)
+		@param decisionStatistics if not None, receives the search statistics of each decision (see MDPMCTSActionStrategy.decisionStatistics)
+		@param timeBudget if not None, seconds of search of each decision
+		"""
+		mdpSimulationEngine = self.getMCTSSimulationEngine(mdpState, mdpPredicates, mdpOperations, horizonTrace, numMCTSIters, numSims, optionsMCTSEngine,quietTrace,quietInfoStr,printEachStepTrace,timeBudget)
+		try:
+			results = mdpSimulationEngine.getSimulations(numTraces)
+			if not decisionStatistics is None:
+				decisionStatistics.extend(mdpSimulationEngine.mdpActionStrategy.decisionStatistics)
+		finally:
+			mdpSimulationEngine.mdpActionStrategy.close()
+			MDPParallelSimulationEngine.closeWorkers()
+			TreeParallelMCTSEngine.closeWorkers()
 		return results
@@ -7,7 +7,13 @@ import stormpy
 import stormpy.simulator
 from stormpy.storage import BitVector
 from simulationClasses import *
+import util
 import json
+import random
+import array
+import weakref
+import time
+import numpy as np
 
 def prismToSimulator(prismFile):
 	"""! Given a prism file, creates a stormpy simulator
@@ -16,13 +22,101 @@ def prismToSimulator(prismFile):
 	@return  a stormpy.simulator.PrismSimulator object
 	"""
 	prism_program = stormpy.parse_prism_program(prismFile)
+	return programToSimulator(prism_program)
+
+def programToSimulator(prismProgram):
+	"""! Given a parsed prism program, creates a stormpy simulator
+
+	@param prismProgram a stormpy.storage.PrismProgram
+	@return  a stormpy.simulator.PrismSimulator object
+	"""
 	option = stormpy.core.BuilderOptions()
 	option.set_build_state_valuations()
 	option.set_build_choice_labels()
-	prismSimulator = stormpy.simulator.create_simulator(prism_program)
+	prismSimulator = stormpy.simulator.create_simulator(prismProgram)
 	prismSimulator.set_action_mode(stormpy.simulator.SimulatorActionMode.GLOBAL_NAMES)
+	prismSimulator.mdpStateKey = None # key in MDPState.stateTable of the state the simulator is at, kept by MDPOperations, None if unknown
 	return prismSimulator
 
+class MDPSimulatorPool():
+	"""!
+	Simulators of one prism program, one per consumer of MDPOperations (see MDPOperationsInterface.forConsumer).
+	A consumer that keeps its own simulator finds it where it left it,
+	instead of restarting it at the state the previous consumer asked for.
+	Queries that do not move the simulator may be answered by any simulator at the right state (see findSimulator).
+	The program is parsed once and shared by the simulators.
+	"""
+	def __init__(self, prismFile, pinConsumers: bool = True) -> None:
+		self.prismProgram = stormpy.parse_prism_program(prismFile) # the program shared by the simulators
+		self.pinConsumers = pinConsumers # if False, all the consumers share one simulator
+		self.simulators: Dict[str, Any] = {} # maps a consumer to its simulator
+		self.restarts: util.Counter[str] = util.Counter() # number of restarts of the simulator of each consumer
+		self.seed: Optional[int] = None # seed given by setSeed, None if the simulators draw their own seeds
+
+	def getSimulator(self, consumer: str):
+		"""!
+		Returns the simulator of consumer, created on first request
+		"""
+		if not self.pinConsumers:
+			consumer = CONSUMER_GAME
+		if not consumer in self.simulators:
+			self.simulators[consumer] = programToSimulator(self.prismProgram)
+			if not self.seed is None:
+				self.simulators[consumer].set_seed(self.seed + len(self.simulators) - 1)
+		return self.simulators[consumer]
+
+	def findSimulator(self, bitVector):
+		"""!
+		Returns a simulator of the pool that is at the state bitVector, or None if there is none
+		"""
+		stateKey = MDPState.stateTable.getKey(bitVector)
+		for simulator in self.simulators.values():
+			if simulator.mdpStateKey is None:
+				simulator.mdpStateKey = MDPState.stateTable.getKey(simulator._get_current_state())
+			if simulator.mdpStateKey is stateKey:
+				return simulator
+		return None
+
+	def setSeed(self, seed: int) -> None:
+		"""!
+		Seeds the simulators with distinct seeds derived from seed, including those created later
+		"""
+		self.seed = seed
+		for i, consumer in enumerate(sorted(self.simulators.keys())):
+			self.simulators[consumer].set_seed(seed + i)
+
+	def restartStatistics(self) -> Dict[str, int]:
+		return {consumer: int(restarts) for consumer, restarts in self.restarts.items()}
+
+
+class MDPSimulatorProfile():
+	"""!
+	Number of calls and cumulative time of the calls to the stormpy simulators,
+	by consumer of MDPOperations (see MDPOperationsInterface.forConsumer) and by simulator operation
+	"""
+	def __init__(self) -> None:
+		self.calls: util.Counter[Tuple[str, str]] = util.Counter() # maps (consumer, operation) to a number of calls
+		self.seconds: util.Counter[Tuple[str, str]] = util.Counter() # maps (consumer, operation) to a cumulative time in seconds
+
+	def record(self, consumer: str, operation: str, seconds: float) -> None:
+		self.calls[(consumer, operation)] += 1
+		self.seconds[(consumer, operation)] += seconds
+
+	def statistics(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+		"""!
+		@return a dict from each consumer to a dict from each operation to its number of calls and its time,
+		with the totals over all consumers under the consumer "total"
+		"""
+		result: Dict[str, Dict[str, Dict[str, float]]] = {}
+		for (consumer, operation), calls in sorted(self.calls.items()):
+			for c in (consumer, "total"):
+				entry = result.setdefault(c, {}).setdefault(operation, {'calls': 0, 'seconds': 0.0})
+				entry['calls'] += int(calls)
+				entry['seconds'] += self.seconds[(consumer, operation)]
+		if "total" in result:
+			result["total"] = result.pop("total")
+		return result
+
 
 class MDPPredicate(MDPPredicateInterface):
 
@@ -39,6 +133,14 @@ class MDPPredicate(MDPPredicateInterface):
 	def __str__(self) -> str:
 		return "(name:"+str(self.name)+")"
 
+	def __hash__(self) -> int:
+		return hash(self.name)
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, MDPPredicate):
+			return NotImplemented
+		return (self.name == other.name)
+
 	# methods that can be redefined
 	def consoleStr(self) -> str:
 		return str(self.name)
@@ -53,29 +155,95 @@ class MDPPredicate(MDPPredicateInterface):
 		name=s
 		return cls(name)
 
+class MDPStateKey():
+	"""!
+	The interned BitVector of a state of the MDP, see MDPStateTable.
+	Keys are compared and hashed by identity
+	"""
+	__slots__ = ('bitVector', '__weakref__')
+	def __init__(self, bitVector) -> None:
+		self.bitVector = bitVector
+
+class MDPStateTable():
+	"""!
+	Interns the BitVectors of the states of the MDP.
+	Each distinct BitVector gets one MDPStateKey, so that states, transitions and caches only have to hold and hash a key.
+	The table only holds weak references to the keys: the entry of a BitVector is dropped
+	when no state, transition or cache refers to its key anymore, and the BitVector gets a new key if it is seen again
+	"""
+	def __init__(self) -> None:
+		self.stateKeys: "weakref.WeakValueDictionary[Any, MDPStateKey]" = weakref.WeakValueDictionary() # key of each BitVector in use
+
+	def getKey(self, bitVector) -> MDPStateKey:
+		"""!
+		@return the key of bitVector, created if no key of bitVector is in use
+		"""
+		stateKey = self.stateKeys.get(bitVector)
+		if stateKey is None:
+			stateKey = MDPStateKey(bitVector)
+			self.stateKeys[bitVector] = stateKey
+		return stateKey
+
+	def __len__(self) -> int:
+		return len(self.stateKeys)
+
 class MDPState(MDPStateInterface):
+	"""!
+	A state of the Prism program, stored as the key of its BitVector in MDPState.stateTable.
+	Equal states have the same key, so the key serves as hash
+	"""
+	__slots__ = ('stateKey',)
+	stateTable: MDPStateTable = MDPStateTable() # shared by all the states, so that keys can be compared. Only keeps the keys in use
+
 	# methods that must be redefined
 	def __init__(self, bitVector) -> None:
-		self.bitVector=bitVector
+		self.stateKey = MDPState.stateTable.getKey(bitVector)
+
+	@classmethod
+	def fromKey(cls, stateKey: MDPStateKey) -> "MDPState":
+		mdpState = cls.__new__(cls)
+		mdpState.stateKey = stateKey
+		return mdpState
+
+	@property
+	def bitVector(self):
+		return self.stateKey.bitVector
+
+	@bitVector.setter
+	def bitVector(self, bitVector) -> None:
+		self.stateKey = MDPState.stateTable.getKey(bitVector)
 
 	def deepCopy(self) -> "MDPState":
-		return MDPState(self.bitVector)
+		return MDPState.fromKey(self.stateKey)
 
 	def initFromCopy(self, other: "MDPState") -> None:
-		self.bitVector = other.bitVector
+		self.stateKey = other.stateKey
 
 	def __str__(self) -> str:
 		return "(bitVector:"+self.bitVector.store_as_string()+")"
 
+	def __hash__(self) -> int:
+		return hash(self.stateKey)
+
 	def __eq__(self, other: object) -> bool:
 		if not isinstance(other, MDPState):
 			return NotImplemented
-		return (self.bitVector == other.bitVector)
+		return (self.stateKey is other.stateKey)
+
+	def __reduce__(self):
+		# keys are only valid in the process that interned them, the BitVector is pickled instead
+		return (MDPState.fromFileStr, (self.fileStr(),))
 
 	# methods that can be redefined
 	def consoleStr(self) -> str:
 		return self.bitVector.store_as_string()
 
+	def fastReset(self, fastResetData: MDPStateKey) -> None: # type: ignore
+		self.stateKey = fastResetData
+
+	def getFastResetData(self) -> MDPStateKey: # type: ignore
+		return self.stateKey
+
 	# define if you intend to write or read instances from a text file
 	def fileStr(self) -> str:
 		return self.bitVector.store_as_string()
@@ -132,20 +300,36 @@ class MDPStochasticAction(MDPStochasticActionInterface):
 	# Immutable class
 	# methods that must be redefined
 	def __init__(self,bitVector, reward:float, infoStr: str="") -> None:
-		self.bitVector=bitVector
+		self.stateKey=MDPState.stateTable.getKey(bitVector) # key of the reached state
 		self.reward=reward
 		self.infoStr=infoStr
 
+	@classmethod
+	def fromKey(cls, stateKey: MDPStateKey, reward: float, infoStr: str="") -> "MDPStochasticAction":
+		mdpStochasticAction = cls.__new__(cls)
+		mdpStochasticAction.stateKey = stateKey
+		mdpStochasticAction.reward = reward
+		mdpStochasticAction.infoStr = infoStr
+		return mdpStochasticAction
+
+	@property
+	def bitVector(self):
+		return self.stateKey.bitVector
+
 	def deepCopy(self) -> "MDPStochasticAction":
-		return MDPStochasticAction(self.bitVector,self.reward,self.infoStr)
+		return MDPStochasticAction.fromKey(self.stateKey,self.reward,self.infoStr)
 
 	def __hash__(self) -> int:
-		return hash(self.bitVector)
+		return hash(self.stateKey)
 
 	def __eq__(self, other: object) -> bool:
 		if not isinstance(other, MDPStochasticAction):
 			return NotImplemented
-		return (self.bitVector == other.bitVector)
+		return (self.stateKey is other.stateKey)
+
+	def __reduce__(self):
+		# keys are only valid in the process that interned them, the BitVector is pickled instead
+		return (MDPStochasticAction.fromFileStr, (self.fileStr(),))
 
 	def __str__(self) -> str:
 		return "(bitVector:"+str(self.bitVector.store_as_string())+"reward:"+str(self.reward)+",infoStr:"+str(self.infoStr)+")"
@@ -175,95 +359,367 @@ class MDPStochasticAction(MDPStochasticActionInterface):
 		return cls(bitVector, reward, infoStr)
 
 	def toState(self) -> "MDPState":
-		return MDPState(self.bitVector)
+		return MDPState.fromKey(self.stateKey)
+
+class MDPStateDecoder():
+	"""!
+	Reads the values of the variables of a prism program from the BitVectors of its states.
+
+	Storm compresses a state by writing its variables one after the other: the global boolean
+	variables, the global integer variables, then the boolean and integer variables of each module.
+	A boolean takes one bit, an integer between lowerBound and upperBound is stored as value-lowerBound
+	on ceil(log2(upperBound-lowerBound+1)) bits, and an integer without bounds on UNBOUNDED_BITS bits.
+	"""
+	UNBOUNDED_BITS: int = 32 # default of storm's BuilderOptions, used by prismToSimulator
+	UNINITIALIZED_EXPRESSION: str = "__storm::notinitialized__" # how stormpy prints a missing bound
+
+	def __init__(self, prismProgram) -> None:
+		self.variableNames: List[str] = []
+		self.isBoolean: List[bool] = []
+		self.bitOffsets: List[int] = []
+		self.bitWidths: List[int] = []
+		self.lowerBounds: List[int] = []
+		self.numBits = 0 # bits used by all the variables
+		prismProgram = prismProgram.substitute_constants()
+		for variable in prismProgram.global_boolean_variables:
+			self._addBooleanVariable(variable)
+		for variable in prismProgram.global_integer_variables:
+			self._addIntegerVariable(variable)
+		for module in prismProgram.modules:
+			for variable in module.boolean_variables:
+				self._addBooleanVariable(variable)
+			for variable in module.integer_variables:
+				self._addIntegerVariable(variable)
+
+	@classmethod
+	def fromPrismFile(cls, prismFile) -> "MDPStateDecoder":
+		return cls(stormpy.parse_prism_program(prismFile))
+
+	def _addVariable(self, name: str, isBoolean: bool, bitWidth: int, lowerBound: int) -> None:
+		self.variableNames.append(name)
+		self.isBoolean.append(isBoolean)
+		self.bitOffsets.append(self.numBits)
+		self.bitWidths.append(bitWidth)
+		self.lowerBounds.append(lowerBound)
+		self.numBits += bitWidth
+
+	def _addBooleanVariable(self, variable) -> None:
+		self._addVariable(variable.name, True, 1, 0)
+
+	def _addIntegerVariable(self, variable) -> None:
+		# evaluating a missing bound crashes stormpy, so it is recognized by its string
+		if str(variable.lower_bound_expression) == MDPStateDecoder.UNINITIALIZED_EXPRESSION or str(variable.upper_bound_expression) == MDPStateDecoder.UNINITIALIZED_EXPRESSION:
+			lowerBound = -(1 << (MDPStateDecoder.UNBOUNDED_BITS-1))
+			upperBound = (1 << (MDPStateDecoder.UNBOUNDED_BITS-1)) - 1
+		else:
+			lowerBound = variable.lower_bound_expression.evaluate_as_int()
+			upperBound = variable.upper_bound_expression.evaluate_as_int()
+		bitWidth = (upperBound - lowerBound).bit_length() # ceil(log2(upperBound-lowerBound+1))
+		self._addVariable(variable.name, False, bitWidth, lowerBound)
+
+	def decode(self, bitVector) -> Dict[str, Any]:
+		"""!
+		@return a dict from the names of the variables to their values in bitVector, as in the JSON valuation of the simulator
+		"""
+		stateDescription: Dict[str, Any] = {}
+		for name, isBoolean, bitOffset, bitWidth, lowerBound in zip(self.variableNames, self.isBoolean, self.bitOffsets, self.bitWidths, self.lowerBounds):
+			if isBoolean:
+				stateDescription[name] = bitVector.get(bitOffset)
+			elif bitWidth == 0:
+				stateDescription[name] = lowerBound
+			else:
+				stateDescription[name] = lowerBound + bitVector.as_int(bitOffset, bitWidth)
+		return stateDescription
+
+	def decodeBatch(self, bitVectors: Sequence[Any]) -> Dict[str, Any]:
+		"""!
+		Decodes many states at once: each BitVector is read 64 bits at a time, and the variables are extracted with NumPy
+		@return a dict from the names of the variables to NumPy arrays with their value in each of bitVectors (bool arrays for boolean variables, int64 arrays otherwise)
+		"""
+		numBuckets = (self.numBits + 63) // 64
+		buckets = np.zeros((len(bitVectors), numBuckets), dtype=np.uint64) # bit 0 of a BitVector is the most significant bit of its first bucket
+		for i, bitVector in enumerate(bitVectors):
+			for k in range(numBuckets):
+				bucketWidth = min(64, self.numBits - 64*k)
+				buckets[i, k] = bitVector.as_int(64*k, bucketWidth) << (64 - bucketWidth)
+		columns: Dict[str, Any] = {}
+		for name, isBoolean, bitOffset, bitWidth, lowerBound in zip(self.variableNames, self.isBoolean, self.bitOffsets, self.bitWidths, self.lowerBounds):
+			k, start = divmod(bitOffset, 64)
+			end = start + bitWidth
+			if bitWidth == 0:
+				values = np.zeros(len(bitVectors), dtype=np.uint64)
+			elif end <= 64:
+				values = (buckets[:, k] >> np.uint64(64 - end)) & np.uint64((1 << bitWidth) - 1)
+			else: # the variable continues on the next bucket
+				numLowBits = end - 64
+				values = ((buckets[:, k] & np.uint64((1 << (64 - start)) - 1)) << np.uint64(numLowBits)) | (buckets[:, k+1] >> np.uint64(64 - numLowBits))
+			if isBoolean:
+				columns[name] = values.astype(bool)
+			else:
+				columns[name] = values.astype(np.int64) + lowerBound
+		return columns
+
+class MDPStateCacheEntry():
+	"""!
+	Answers of the simulator memoized for one state of the MDP
+	"""
+	__slots__ = ('actionNames', 'actionOffsets', 'labels', 'labelsMask', 'isDone')
+	def __init__(self, labels: Tuple[str, ...], isDone: bool, predicateTable: MDPPredicateTable[MDPPredicate]) -> None:
+		self.actionNames: Optional[Tuple[str, ...]] = None # names of the available actions, without duplicates, read on first request
+		self.actionOffsets: Optional[Tuple[int, ...]] = None # index in the simulator of the first choice of each action of actionNames
+		self.labels = labels # names of the labels that hold in the state
+		self.labelsMask = predicateTable.getMask([MDPPredicate(label) for label in labels]) # the same labels, as a mask of predicateTable
+		self.isDone = isDone # True if the simulator reports the state as a sink
 
 class MDPOperations(MDPOperationsInterface[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]):
 	FILE_SEPARATOR: str = "\nParameters\n"
+	DEFAULT_CACHE_SIZE: int = 10000
 
 	# methods that must be redefined
-	def __init__(self, prismSimulator, prismFile, stateStrFunction = str, discountFactor = 1) -> None:
+	def __init__(self, prismSimulator, prismFile, stateStrFunction = str, discountFactor = 1, cacheSize: int = DEFAULT_CACHE_SIZE, simulatorPool: Optional[MDPSimulatorPool] = None, consumer: str = CONSUMER_GAME, profile: Optional[MDPSimulatorProfile] = None, labelNames: Optional[List[str]] = None) -> None:
 		self.prismSimulator=prismSimulator
 		self.prismFile=prismFile
 		self.discountFactor=discountFactor
 		self.stateStrFunction=stateStrFunction
+		self.stateCache: util.LRUCache[MDPStateKey, MDPStateCacheEntry] = util.LRUCache(cacheSize) # maps the key of a state to what the simulator says about it, shared with the copies (see deepCopy)
+		if labelNames is None:
+			prismProgram = (simulatorPool.prismProgram if not simulatorPool is None else stormpy.parse_prism_program(prismFile))
+			labelNames = [label.name for label in prismProgram.labels]
+		self.labelNames: List[str] = labelNames # labels of the prism program
+		self.allPredicates: List[MDPPredicate] = [MDPPredicate(label) for label in labelNames] # returned by getAllPredicates
+		self.stateDecoder: Optional[MDPStateDecoder] = None # built on first request
+		self.simulatorPool = simulatorPool # gives the simulators of the other consumers, None if all consumers use prismSimulator
+		self.consumer = consumer # the consumer that uses prismSimulator
+		self.consumerOperations: Dict[str, "MDPOperations"] = {consumer: self} # operations of each consumer, shared by all of them
+		self.profile = profile # counts and times the calls to the simulators, None if they are not profiled
 
 	def updateStrFunction(self, stateStrFunction):
 		self.stateStrFunction=stateStrFunction
 
 	def deepCopy(self) -> "MDPOperations":
-		return MDPOperations(self.prismSimulator,self.prismFile,self.discountFactor,self.stateStrFunction) # NOTE: this is not deepcopy, as I cannot deepcopy prism simulator
+		"""!
+		Returns operations on the same simulators, that share the state cache of this instance on purpose:
+		the entries of the cache only depend on the state and the prism program, so a state queried by one copy,
+		such as the operations of another consumer (see forConsumer), is a hit for all of them.
+		The copy does not parse the prism program again.
+		"""
+		mdpOperations = MDPOperations(self.prismSimulator,self.prismFile,stateStrFunction=self.stateStrFunction,discountFactor=self.discountFactor,cacheSize=0,simulatorPool=self.simulatorPool,consumer=self.consumer,profile=self.profile,labelNames=self.labelNames) # NOTE: this is not deepcopy, as I cannot deepcopy prism simulator
+		mdpOperations.stateCache = self.stateCache
+		mdpOperations.stateDecoder = self.stateDecoder
+		mdpOperations.predicateTable = self.getPredicateTable() # the masks of the cache entries are encoded in it
+		mdpOperations.consumerOperations = self.consumerOperations # the copy uses the same simulators
+		return mdpOperations
+
+	def __getstate__(self) -> Dict[str, Any]:
+		"""!
+		Simulators cannot be pickled: an unpickled instance gets new simulators built from the prism file,
+		and an empty cache
+		"""
+		return {'prismFile': self.prismFile, 'stateStrFunction': self.stateStrFunction, 'discountFactor': self.discountFactor, 'cacheSize': self.stateCache.maxSize, 'pinConsumers': (self.simulatorPool.pinConsumers if not self.simulatorPool is None else None), 'consumer': self.consumer}
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		simulatorPool: Optional[MDPSimulatorPool] = None
+		if state['pinConsumers'] is None:
+			prismSimulator = prismToSimulator(state['prismFile'])
+		else:
+			simulatorPool = MDPSimulatorPool(state['prismFile'], state['pinConsumers'])
+			prismSimulator = simulatorPool.getSimulator(state['consumer'])
+		self.__init__(prismSimulator, state['prismFile'], stateStrFunction=state['stateStrFunction'], discountFactor=state['discountFactor'], cacheSize=state['cacheSize'], simulatorPool=simulatorPool, consumer=state['consumer']) # type: ignore
+
+	def setSeed(self, seed: int) -> None:
+		if self.simulatorPool is None:
+			self.prismSimulator.set_seed(seed)
+		else:
+			self.simulatorPool.setSeed(seed)
+
+	def forConsumer(self, consumer: str) -> "MDPOperations":
+		"""!
+		Returns the operations that query the simulator of consumer in the simulator pool.
+		They share the cache of this instance, as the answers of the simulators only depend on the state.
+		"""
+		if self.simulatorPool is None or consumer == self.consumer:
+			return self
+		mdpOperations = self.consumerOperations.get(consumer)
+		if mdpOperations is None:
+			mdpOperations = self.deepCopy()
+			mdpOperations.prismSimulator = self.simulatorPool.getSimulator(consumer)
+			mdpOperations.consumer = consumer
+			self.consumerOperations[consumer] = mdpOperations
+		return mdpOperations
 
 	# def __str__(self) -> str:
 	#     return "(walls:\n"+gridStr(self.walls)+",holes:\n"+gridStr(self.holes)+",targets:\n"+gridStr(self.targets)+",discountFactor:"+str(self.discountFactor)+")"
 
+	def _simulatorCall(self, operation: str, function, *args):
+		"""!
+		Calls function, a method of a simulator, and records it in the profile as operation
+		"""
+		if self.profile is None:
+			return function(*args)
+		start = time.perf_counter()
+		result = function(*args)
+		self.profile.record(self.consumer, operation, time.perf_counter() - start)
+		return result
+
+	def simulatorProfile(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+		"""!
+		@return the calls to the simulators and their time, see MDPSimulatorProfile.statistics, empty if they are not profiled
+		"""
+		if self.profile is None:
+			return {}
+		return self.profile.statistics()
+
+	def _getSimulatorStateKey(self, prismSimulator) -> MDPStateKey:
+		"""!
+		@return the key of the state prismSimulator is at, asked to the simulator only if it is not known
+		"""
+		if prismSimulator.mdpStateKey is None:
+			prismSimulator.mdpStateKey = MDPState.stateTable.getKey(self._simulatorCall("_get_current_state", prismSimulator._get_current_state))
+		return prismSimulator.mdpStateKey
+
+	def _moveSimulator(self, stateKey: MDPStateKey) -> None:
+		"""!
+		Restarts the simulator at the state of the given key, unless it is already there
+		"""
+		if not self._getSimulatorStateKey(self.prismSimulator) is stateKey:
+			self._simulatorCall("restart", self.prismSimulator.restart, stateKey.bitVector)
+			self.prismSimulator.mdpStateKey = stateKey
+			if not self.simulatorPool is None:
+				self.simulatorPool.restarts[self.consumer] += 1
+
+	def _simulatorAt(self, stateKey: MDPStateKey):
+		"""!
+		Returns a simulator at the state of the given key, for queries that do not move it:
+		the simulator of this consumer if it is there, else a simulator of the pool that is there,
+		else the simulator of this consumer after a restart
+		"""
+		if self._getSimulatorStateKey(self.prismSimulator) is stateKey:
+			return self.prismSimulator
+		if not self.simulatorPool is None:
+			prismSimulator = self._simulatorCall("findSimulator", self.simulatorPool.findSimulator, stateKey.bitVector)
+			if not prismSimulator is None:
+				return prismSimulator
+		self._moveSimulator(stateKey)
+		return self.prismSimulator
+
+	def _getCacheEntry(self, mdpState: MDPState) -> MDPStateCacheEntry:
+		"""!
+		Returns the memoized simulator answers for mdpState, querying the simulator on a miss
+		"""
+		stateKey = mdpState.stateKey
+		entry = self.stateCache.get(stateKey)
+		if entry is None:
+			prismSimulator = self._simulatorAt(stateKey)
+			entry = MDPStateCacheEntry(tuple(self._simulatorCall("_report_labels", prismSimulator._report_labels)), self._simulatorCall("is_done", prismSimulator.is_done), self.getPredicateTable())
+			self.stateCache.put(stateKey, entry)
+		return entry
+
+	def _getActionsCacheEntry(self, mdpState: MDPState) -> MDPStateCacheEntry:
+		"""!
+		Returns the memoized simulator answers for mdpState, with its available actions
+		"""
+		entry = self._getCacheEntry(mdpState)
+		if entry.actionNames is None:
+			prismSimulator = self._simulatorAt(mdpState.stateKey)
+			actionNames: List[str] = []
+			actionOffsets: List[int] = []
+			for offset, label in enumerate(self._simulatorCall("available_actions", prismSimulator.available_actions)):
+				if label not in actionNames:
+					actionNames.append(label)
+					actionOffsets.append(offset)
+			entry.actionNames = tuple(actionNames)
+			entry.actionOffsets = tuple(actionOffsets)
+		return entry
+
+	def _stepSimulator(self, mdpState: MDPState, mdpAction: MDPAction) -> MDPStochasticAction:
+		"""!
+		Plays mdpAction from mdpState in the simulator, and returns the stochastic action drawn.
+		The choice is given to the simulator by its index, which spares the search
+		by name and the report of the state as JSON done by PrismSimulator.step,
+		which is only used if the simulator has no engine.
+		The engine step only reports success, so reading the state reached and the reward takes two more calls;
+		the simulator is only asked for its current state before the step if MDPOperations did not move it there.
+		"""
+		entry = self._getActionsCacheEntry(mdpState)
+		if mdpAction.action not in entry.actionNames:
+			raise ValueError(f"Could not find action: {mdpAction.action}")
+		offset = entry.actionOffsets[entry.actionNames.index(mdpAction.action)]
+		self._moveSimulator(mdpState.stateKey)
+		self.prismSimulator.mdpStateKey = None
+		engine = getattr(self.prismSimulator, "_engine", None)
+		if engine is None: # a simulator without the engine of stormpy.simulator.PrismSimulator: step by name
+			_, reward, _ = self._simulatorCall("step", self.prismSimulator.step, mdpAction.action)
+		else:
+			if not self._simulatorCall("step", engine.step, offset):
+				raise Exception("the simulator could not play action "+str(mdpAction.action)+" from state "+str(mdpState))
+			reward = self._simulatorCall("_report_rewards", self.prismSimulator._report_rewards)
+		newBitVector = self._simulatorCall("_get_current_state", self.prismSimulator._get_current_state)
+		if len(reward) > 1:
+			raise Exception ("multiple reward")
+		mdpStochasticAction = MDPStochasticAction(newBitVector,reward[0],"")
+		self.prismSimulator.mdpStateKey = mdpStochasticAction.stateKey
+		return mdpStochasticAction
+
+	def cacheStatistics(self) -> Dict[str, int]:
+		"""!
+		@return hits, misses and size of the state cache
+		"""
+		return self.stateCache.statistics()
+
 	def applyTransitionOnState(self, mdpState: MDPState, mdpTransition: MDPTransition[MDPAction, MDPStochasticAction]) -> float:
-		mdpState.bitVector=mdpTransition.mdpStochasticAction.bitVector
+		mdpState.stateKey=mdpTransition.mdpStochasticAction.stateKey
 		mdpReward=mdpTransition.mdpStochasticAction.reward
 		return mdpReward
 
 	def drawStochasticAction(self, mdpState: MDPState, mdpAction: MDPAction, quietInfoStr: bool) -> MDPStochasticAction:
-		currentBitVector = self.prismSimulator._get_current_state()
-		stateBitVector = mdpState.bitVector
-		if currentBitVector != stateBitVector:
-			self.prismSimulator.restart(stateBitVector)
-		actionName = mdpAction.action
-		self.prismSimulator.step(actionName)
-		newBitVector = self.prismSimulator._get_current_state()
-		reward = self.prismSimulator._report_rewards()
-		if len(reward) > 1:
-			raise Exception ("multiple reward")
-		mdpStochasticAction = MDPStochasticAction(newBitVector,reward[0],"")
-		return mdpStochasticAction
+		return self._stepSimulator(mdpState, mdpAction)
+
+	def step(self, mdpState: MDPState, mdpAction: MDPAction, quietInfoStr: bool) -> Tuple[MDPStochasticAction, Optional[int], Optional[bool]]:
+		mdpStochasticAction = self._stepSimulator(mdpState, mdpAction)
+		entry = self.stateCache.get(mdpStochasticAction.stateKey)
+		if entry is None:
+			entry = MDPStateCacheEntry(tuple(self._simulatorCall("_report_labels", self.prismSimulator._report_labels)), self._simulatorCall("is_done", self.prismSimulator.is_done), self.getPredicateTable())
+			self.stateCache.put(mdpStochasticAction.stateKey, entry)
+		return mdpStochasticAction, entry.labelsMask, entry.isDone
 
 	def getLegalActions(self, mdpState: MDPState) -> List[MDPAction]:
-		currentBitVector = self.prismSimulator._get_current_state()
-		stateBitVector = mdpState.bitVector
-		if currentBitVector != stateBitVector:
-			self.prismSimulator.restart(stateBitVector)
-		actions = self.prismSimulator.available_actions()
-		legalActions=[]
-		for label in actions:
-			action = MDPAction(label,"")
-			if action not in legalActions:
-				legalActions.append(action)
+		entry = self._getActionsCacheEntry(mdpState)
+		legalActions = [MDPAction(label,"") for label in entry.actionNames]
 		return legalActions
 
 	def getAllPredicates(self) -> List[MDPPredicate]:
-		mdpPredicates: List[MDPPredicate] = []
-		labels = [label.name for label in self.prismSimulator._program.prism_program.labels]
-		mdpPredicates = [MDPPredicate(label) for label in labels]
+		mdpPredicates = list(self.allPredicates)
 		return mdpPredicates
 
 	def getPredicates(self, mdpState: MDPState) -> List[MDPPredicate]:
-		currentBitVector = self.prismSimulator._get_current_state()
-		stateBitVector = mdpState.bitVector
-		if currentBitVector != stateBitVector:
-			self.prismSimulator.restart(stateBitVector)
-		labels = self.prismSimulator._report_labels()
-		mdpPredicates: List[MDPPredicate] = [MDPPredicate(label) for label in labels]
-		# if currentBitVector != stateBitVector:
-		#     self.prismSimulator.restart(currentBitVector)
+		entry = self._getCacheEntry(mdpState)
+		mdpPredicates: List[MDPPredicate] = [MDPPredicate(label) for label in entry.labels]
 		return mdpPredicates
 
+	def getPredicatesMask(self, mdpState: MDPState) -> int:
+		return self._getCacheEntry(mdpState).labelsMask
+
 	def isExecutionTerminal(self, mdpExecution: MDPExecution[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]) -> bool:
-		currentBitVector = self.prismSimulator._get_current_state()
-		mdpState = mdpExecution.mdpEndState
-		stateBitVector = mdpState.bitVector
-		if currentBitVector != stateBitVector:
-			self.prismSimulator.restart(stateBitVector)
-		isTerminal = self.prismSimulator.is_done()
-		return isTerminal
+		entry = self._getCacheEntry(mdpExecution.mdpEndState)
+		return entry.isDone
 
 	def getTerminalReward(self, mdpExecution: MDPExecution[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]) -> float:
 		return 0
 
+	def _getStateDecoder(self) -> MDPStateDecoder:
+		if self.stateDecoder is None:
+			self.stateDecoder = MDPStateDecoder.fromPrismFile(self.prismFile)
+		return self.stateDecoder
+
 	def stateDescription(self,mdpState): # returns a dict # works also with stochastic actions
-		currentBitVector = self.prismSimulator._get_current_state()
-		stateBitVector = mdpState.bitVector
-		if currentBitVector != stateBitVector:
-			self.prismSimulator.restart(stateBitVector)
-		stateDescription = json.loads(str(self.prismSimulator._report_state()))
-		return stateDescription
+		return self._getStateDecoder().decode(mdpState.bitVector)
+
+	def stateDescriptions(self, mdpStates) -> Dict[str, Any]:
+		"""!
+		Batch form of stateDescription
+		@return a dict from the names of the variables to NumPy arrays with their value in each of mdpStates
+		"""
+		return self._getStateDecoder().decodeBatch([mdpState.bitVector for mdpState in mdpStates])
 
 	def replayConsoleStr(self,mdpState):
 		stateDescription = self.stateDescription(mdpState)
@@ -286,13 +742,535 @@ class MDPOperations(MDPOperationsInterface[MDPPredicate, MDPState, MDPAction, MD
 		discountFactor=float(params[1][8:])
 		return cls(prismSimulator, prismFile, stateStrFunction, discountFactor)
 
-def runResults(engineList: List[MDPExecutionEngine[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]], cursesDelay:float = 0.0, quiet: bool = True, prettyConsole: bool = False) -> Any:
+class MDPExplicitState(MDPStateInterface):
+	"""!
+	A state of an MDPExplicitModel, given by its index in the model
+	"""
+	__slots__ = ('index',)
+
+	# methods that must be redefined
+	def __init__(self, index: int) -> None:
+		self.index=index
+
+	def deepCopy(self) -> "MDPExplicitState":
+		return MDPExplicitState(self.index)
+
+	def initFromCopy(self, other: "MDPExplicitState") -> None:
+		self.index = other.index
+
+	def __str__(self) -> str:
+		return "(index:"+str(self.index)+")"
+
+	def __hash__(self) -> int:
+		return self.index
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, MDPExplicitState):
+			return NotImplemented
+		return (self.index == other.index)
+
+	# methods that can be redefined
+	def consoleStr(self) -> str:
+		return str(self.index)
+
+	# define if you intend to write or read instances from a text file
+	def fileStr(self) -> str:
+		return str(self.index)
+
+	@classmethod
+	def fromFileStr(cls, s:str) -> "MDPExplicitState":
+		return cls(int(s))
+
+class MDPExplicitStochasticAction(MDPStochasticActionInterface):
+	# Immutable class
+	# methods that must be redefined
+	def __init__(self, index: int, reward: float, infoStr: str="") -> None:
+		self.index=index # index of the successor state
+		self.reward=reward
+		self.infoStr=infoStr
+
+	def deepCopy(self) -> "MDPExplicitStochasticAction":
+		return MDPExplicitStochasticAction(self.index,self.reward,self.infoStr)
+
+	def __hash__(self) -> int:
+		return hash(self.index)
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, MDPExplicitStochasticAction):
+			return NotImplemented
+		return (self.index == other.index)
+
+	def __str__(self) -> str:
+		return "(index:"+str(self.index)+"reward:"+str(self.reward)+",infoStr:"+str(self.infoStr)+")"
+
+	# methods that can be redefined
+	def consoleStr(self) -> str:
+		return str(self.index)+("#"+str(self.infoStr) if self.infoStr!="" else "")
+
+	def miniConsoleStr(self) -> str:
+		return str(self.index)
+
+	# define if you intend to write or read instances from a text file
+	def fileStr(self) -> str:
+		return str(self.index)+("\n#"+str(self.reward))+("\n#"+str(self.infoStr) if self.infoStr!="" else "")
+	@classmethod
+	def fromFileStr(cls, s: str) -> "MDPExplicitStochasticAction":
+		if s=="":
+			raise Exception("parsing error")
+		splits=s.split("\n#")
+		index=int(splits[0])
+		reward=float(splits[1])
+		if len(splits) > 2:
+			infoStr=splits[2]
+		else:
+			infoStr=""
+		return cls(index, reward, infoStr)
+
+	def toState(self) -> "MDPExplicitState":
+		return MDPExplicitState(self.index)
+
+class MDPExplicitModel():
+	"""!
+	The MDP of a prism file, built once with stormpy and stored in CSR-style NumPy arrays.
+
+	The choices of state s are the rows stateChoiceStart[s] to stateChoiceStart[s+1]-1.
+	The transitions of row r are the entries rowStart[r] to rowStart[r+1]-1 of
+	successors, probabilities and transitionRewards.
+	The reward of a transition is the state-action reward of its row plus the state
+	reward of its successor, which is what the prism simulator reports after a step.
+	Single transitions are drawn from alias tables built on first visit of a (state, action)
+	and kept in a bounded cache, see drawTransition.
+	Only the state valuations of the stormpy model are kept once the arrays are built.
+	"""
+	DEFAULT_ALIAS_CACHE_SIZE: int = 100000
+	DEFAULT_MAX_STATES: int = 1000000
+
+	def __init__(self, model, labelNames: List[str], aliasCacheSize: int = DEFAULT_ALIAS_CACHE_SIZE, maxStates: int = DEFAULT_MAX_STATES) -> None:
+		if model.nr_states > maxStates:
+			raise Exception("the model has "+str(model.nr_states)+" states, more than the "+str(maxStates)+" allowed for the explicit backend: use the simulator backend, or raise explicit max states")
+		if len(model.reward_models) > 1:
+			raise Exception ("multiple reward")
+		matrix = model.transition_matrix
+		numStates = model.nr_states
+		numChoices = matrix.nr_rows
+		self.stateValuations = model.state_valuations # the model itself is not kept
+		self.numStates: int = numStates
+		self.initialState: int = int(model.initial_states[0])
+
+		# choices of each state, and action of each choice
+		self.stateChoiceStart = np.array([matrix.get_row_group_start(s) for s in range(numStates)]+[numChoices], dtype=np.int64)
+		self.actionNames: List[str] = []
+		self.actionIds: Dict[str, int] = {}
+		self.choiceActionIds = np.zeros(numChoices, dtype=np.int32)
+		choiceLabeling = model.choice_labeling
+		for row in range(numChoices):
+			labels = list(choiceLabeling.get_labels_of_choice(row))
+			if len(labels) > 1:
+				raise Exception("multiple labels on choice "+str(row))
+			actionName = labels[0] if len(labels) == 1 else ""
+			if actionName not in self.actionIds:
+				self.actionIds[actionName] = len(self.actionNames)
+				self.actionNames.append(actionName)
+			self.choiceActionIds[row] = self.actionIds[actionName]
+
+		# transitions of each choice, read into typed buffers that take 4 or 8 bytes per entry instead of a Python object
+		rowStart = array.array('q', [0])
+		successors = array.array('i')
+		probabilities = array.array('d')
+		cumulativeProbabilities = array.array('d') # running sum of the probabilities inside each row
+		for row in range(numChoices):
+			total = 0.0
+			for entry in matrix.get_row(row):
+				value = entry.value()
+				successors.append(entry.column)
+				probabilities.append(value)
+				total += value
+				cumulativeProbabilities.append(total)
+			cumulativeProbabilities[-1] = 1.0 # avoids rounding errors when sampling
+			rowStart.append(len(successors))
+		self.rowStart = np.frombuffer(rowStart, dtype=np.int64) # views of the buffers, without a copy
+		self.successors = np.frombuffer(successors, dtype=np.int32)
+		self.probabilities = np.frombuffer(probabilities, dtype=np.float64)
+		self.cumulativeProbabilities = np.frombuffer(cumulativeProbabilities, dtype=np.float64)
+		entryRows = np.repeat(np.arange(numChoices), np.diff(self.rowStart))
+
+		# rewards
+		actionRewards = np.zeros(numChoices, dtype=np.float64)
+		stateRewards = np.zeros(numStates, dtype=np.float64)
+		for rewardModel in model.reward_models.values():
+			if rewardModel.has_transition_rewards:
+				raise Exception("transition rewards are not supported")
+			if rewardModel.has_state_action_rewards:
+				actionRewards = np.array(rewardModel.state_action_rewards, dtype=np.float64)
+			if rewardModel.has_state_rewards:
+				stateRewards = np.array(rewardModel.state_rewards, dtype=np.float64)
+		self.transitionRewards = actionRewards[entryRows] + stateRewards[self.successors]
+
+		# labels, and sink states as defined by the prism simulator: all choices lead back to the state itself
+		self.labelNames = labelNames
+		self.stateLabels = np.zeros((numStates, len(labelNames)), dtype=bool)
+		for i, labelName in enumerate(labelNames):
+			for s in model.labeling.get_states(labelName):
+				self.stateLabels[s, i] = True
+		self.stateLabelsMasks: Optional[Any] = None # masks of the labels of each state, see getLabelsMask
+		self.stateLabelsTable: Optional[MDPPredicateTable[MDPPredicate]] = None # table in which stateLabelsMasks are encoded
+		self.isDeadlock = np.zeros(numStates, dtype=bool)
+		if model.labeling.contains_label("deadlock"):
+			for s in model.labeling.get_states("deadlock"):
+				self.isDeadlock[s] = True
+		choiceStates = np.repeat(np.arange(numStates), np.diff(self.stateChoiceStart))
+		entryStates = choiceStates[entryRows]
+		self.isDone = np.bincount(entryStates, weights=(self.successors != entryStates), minlength=numStates) == 0
+
+		# legal actions: the first row of each action name in each state, the prism simulator has no action in a deadlock
+		# the actions of state s are given by the rows stateActionRows[stateActionStart[s]:stateActionStart[s+1]]
+		_, firstRows = np.unique(choiceStates * len(self.actionNames) + self.choiceActionIds, return_index=True)
+		firstRows = np.sort(firstRows)
+		firstRows = firstRows[~self.isDeadlock[choiceStates[firstRows]]]
+		self.stateActionRows = firstRows.astype(np.int64)
+		self.stateActionStart = np.concatenate(([0], np.cumsum(np.bincount(choiceStates[firstRows], minlength=numStates)))).astype(np.int64)
+
+		# cumulative probabilities shifted by the row index, so that a single searchsorted samples rows in batch
+		self.shiftedCumulativeProbabilities = self.cumulativeProbabilities + entryRows
+
+		self.stateDescriptions: List[Optional[Dict[str, Any]]] = [None]*numStates # decoded on first request
+		self.aliasCache: util.LRUCache[Tuple[int, str], Tuple[util.AliasTable, Tuple[int, ...], Tuple[float, ...]]] = util.LRUCache(aliasCacheSize) # maps (state, action name) to an alias table of the transitions of the choice, with their successors and rewards
+
+	@classmethod
+	def fromPrismFile(cls, prismFile, aliasCacheSize: int = DEFAULT_ALIAS_CACHE_SIZE, maxStates: int = DEFAULT_MAX_STATES) -> "MDPExplicitModel":
+		"""!
+		Builds the model of prismFile with stormpy. The number of states is only known once stormpy has built it:
+		a model too large for stormpy itself cannot be used with this backend.
+		"""
+		prism_program = stormpy.parse_prism_program(prismFile)
+		option = stormpy.BuilderOptions(True, True)
+		option.set_build_state_valuations()
+		option.set_build_choice_labels()
+		model = stormpy.build_sparse_model_with_options(prism_program, option)
+		labelNames = [label.name for label in prism_program.labels]
+		return cls(model, labelNames, aliasCacheSize, maxStates)
+
+	def getActionNames(self, state: int) -> List[str]:
+		"""!
+		@return names of the actions available in state, without duplicates
+		"""
+		rows = self.stateActionRows[self.stateActionStart[state]:self.stateActionStart[state+1]]
+		return [self.actionNames[actionId] for actionId in self.choiceActionIds[rows]]
+
+	def getChoice(self, state: int, actionName: str) -> int:
+		"""!
+		@return the first row of state labelled by actionName
+		"""
+		actionId = self.actionIds.get(actionName)
+		for row in self.stateActionRows[self.stateActionStart[state]:self.stateActionStart[state+1]]:
+			if self.choiceActionIds[row] == actionId:
+				return int(row)
+		raise Exception("Could not find action: "+str(actionName))
+
+	def drawSuccessor(self, row: int) -> Tuple[int, float]:
+		"""!
+		Samples a transition of a row
+		@return the successor state and the reward of the transition
+		"""
+		start = self.rowStart[row]
+		end = self.rowStart[row+1]
+		if end - start == 1:
+			entry = start
+		else:
+			entry = start + np.searchsorted(self.cumulativeProbabilities[start:end], random.random(), side='right')
+		return int(self.successors[entry]), float(self.transitionRewards[entry])
+
+	def drawTransition(self, state: int, actionName: str) -> Tuple[int, float]:
+		"""!
+		Samples a transition of the choice of actionName in state, with its alias table
+		@return the successor state and the reward of the transition
+		"""
+		key = (state, actionName)
+		aliasEntry = self.aliasCache.get(key)
+		if aliasEntry is None:
+			row = self.getChoice(state, actionName)
+			start = self.rowStart[row]
+			end = self.rowStart[row+1]
+			aliasEntry = (util.AliasTable(self.probabilities[start:end].tolist()), tuple(self.successors[start:end].tolist()), tuple(self.transitionRewards[start:end].tolist()))
+			self.aliasCache.put(key, aliasEntry)
+		aliasTable, successors, rewards = aliasEntry
+		entry = aliasTable.sample()
+		return successors[entry], rewards[entry]
+
+	def drawSuccessors(self, rows, uniforms) -> Tuple[Any, Any]:
+		"""!
+		Samples one transition for each row of an array of rows
+		@param uniforms array of numbers drawn uniformly in [0,1), one for each row
+		@return the arrays of successor states and of transition rewards
+		"""
+		entries = np.searchsorted(self.shiftedCumulativeProbabilities, rows + uniforms, side='right')
+		entries = np.minimum(entries, self.rowStart[rows+1]-1)
+		return self.successors[entries], self.transitionRewards[entries]
+
+	def getLabels(self, state: int) -> List[str]:
+		return [self.labelNames[i] for i in np.flatnonzero(self.stateLabels[state])]
+
+	def getLabelsMask(self, state: int, predicateTable: MDPPredicateTable[MDPPredicate]) -> int:
+		"""!
+		@return the labels of state as a mask of predicateTable
+		"""
+		if not predicateTable is self.stateLabelsTable:
+			self.stateLabelsTable = predicateTable
+			labelBits = [predicateTable.getMask([MDPPredicate(labelName)]) for labelName in self.labelNames]
+			if max(labelBits, default=0).bit_length() < 63:
+				self.stateLabelsMasks = self.stateLabels.astype(np.int64) @ np.array(labelBits, dtype=np.int64)
+			else:
+				self.stateLabelsMasks = self.stateLabels.astype(object) @ np.array(labelBits, dtype=object)
+		return int(self.stateLabelsMasks[state])
+
+	def stateDescription(self, state: int) -> Dict[str, Any]:
+		stateDescription = self.stateDescriptions[state]
+		if stateDescription is None:
+			stateDescription = json.loads(str(self.stateValuations.get_json(state)))
+			self.stateDescriptions[state] = stateDescription
+		return stateDescription
+
+class MDPExplicitOperations(MDPOperationsInterface[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]):
+	"""!
+	MDPOperations that read the MDP from an MDPExplicitModel instead of querying the prism simulator
+	"""
+	FILE_SEPARATOR: str = "\nExplicitParameters\n"
+
+	# methods that must be redefined
+	def __init__(self, explicitModel: MDPExplicitModel, prismFile, stateStrFunction = str, discountFactor = 1) -> None:
+		self.explicitModel=explicitModel
+		self.prismFile=prismFile
+		self.discountFactor=discountFactor
+		self.stateStrFunction=stateStrFunction
+
+	@classmethod
+	def fromPrismFile(cls, prismFile, stateStrFunction = str, discountFactor = 1, maxStates: int = MDPExplicitModel.DEFAULT_MAX_STATES) -> "MDPExplicitOperations":
+		return cls(MDPExplicitModel.fromPrismFile(prismFile, maxStates=maxStates), prismFile, stateStrFunction, discountFactor)
+
+	def updateStrFunction(self, stateStrFunction):
+		self.stateStrFunction=stateStrFunction
+
+	def __getstate__(self) -> Dict[str, Any]:
+		"""!
+		The stormpy model cannot be pickled: an unpickled instance builds the model again from the prism file,
+		which numbers the states in the same way
+		"""
+		return {'prismFile': self.prismFile, 'stateStrFunction': self.stateStrFunction, 'discountFactor': self.discountFactor, 'aliasCacheSize': self.explicitModel.aliasCache.maxSize, 'maxStates': self.explicitModel.numStates}
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		explicitModel = MDPExplicitModel.fromPrismFile(state['prismFile'], state['aliasCacheSize'], state['maxStates'])
+		self.__init__(explicitModel, state['prismFile'], stateStrFunction=state['stateStrFunction'], discountFactor=state['discountFactor']) # type: ignore
+
+	def deepCopy(self) -> "MDPExplicitOperations":
+		mdpOperations = MDPExplicitOperations(self.explicitModel,self.prismFile,stateStrFunction=self.stateStrFunction,discountFactor=self.discountFactor) # the model is never modified, so it is shared
+		mdpOperations.predicateTable = self.getPredicateTable()
+		return mdpOperations
+
+	def initialState(self) -> MDPExplicitState:
+		return MDPExplicitState(self.explicitModel.initialState)
+
+	def applyTransitionOnState(self, mdpState: MDPExplicitState, mdpTransition: MDPTransition[MDPAction, MDPExplicitStochasticAction]) -> float:
+		mdpState.index=mdpTransition.mdpStochasticAction.index
+		mdpReward=mdpTransition.mdpStochasticAction.reward
+		return mdpReward
+
+	def drawStochasticAction(self, mdpState: MDPExplicitState, mdpAction: MDPAction, quietInfoStr: bool) -> MDPExplicitStochasticAction:
+		successor, reward = self.explicitModel.drawTransition(mdpState.index, mdpAction.action)
+		return MDPExplicitStochasticAction(successor,reward,"")
+
+	def step(self, mdpState: MDPExplicitState, mdpAction: MDPAction, quietInfoStr: bool) -> Tuple[MDPExplicitStochasticAction, Optional[int], Optional[bool]]:
+		successor, reward = self.explicitModel.drawTransition(mdpState.index, mdpAction.action)
+		return MDPExplicitStochasticAction(successor,reward,""), self.explicitModel.getLabelsMask(successor, self.getPredicateTable()), bool(self.explicitModel.isDone[successor])
+
+	def getLegalActions(self, mdpState: MDPExplicitState) -> List[MDPAction]:
+		return [MDPAction(actionName,"") for actionName in self.explicitModel.getActionNames(mdpState.index)]
+
+	def getAllPredicates(self) -> List[MDPPredicate]:
+		return [MDPPredicate(label) for label in self.explicitModel.labelNames]
+
+	def getPredicates(self, mdpState: MDPExplicitState) -> List[MDPPredicate]:
+		return [MDPPredicate(label) for label in self.explicitModel.getLabels(mdpState.index)]
+
+	def getPredicatesMask(self, mdpState: MDPExplicitState) -> int:
+		return self.explicitModel.getLabelsMask(mdpState.index, self.getPredicateTable())
+
+	def isExecutionTerminal(self, mdpExecution: MDPExecution[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]) -> bool:
+		return bool(self.explicitModel.isDone[mdpExecution.mdpEndState.index])
+
+	def getTerminalReward(self, mdpExecution: MDPExecution[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]) -> float:
+		return 0
+
+	def stateDescription(self,mdpState): # returns a dict # works also with stochastic actions
+		return dict(self.explicitModel.stateDescription(mdpState.index)) # a copy, so that callers cannot modify the model
+
+	def replayConsoleStr(self,mdpState):
+		stateDescription = self.stateDescription(mdpState)
+		return self.stateStrFunction(stateDescription)
+
+	# define if you intend to write or read instances from a text file
+	def fileStr(self) -> str:
+		return str (self.prismFile) + MDPExplicitOperations.FILE_SEPARATOR + "\ndiscount " + str(self.discountFactor)
+
+	@classmethod
+	def fromFileStr(cls, s: str, stateStrFunction=str) -> "MDPExplicitOperations":
+		split=s.split(MDPExplicitOperations.FILE_SEPARATOR)
+		if len(split)!=2:
+			raise Exception("parsing error mdp "+s)
+		prismFile = split[0]
+		params = split[1].split('\n')
+		if params[1][:8]!="discount":
+			raise Exception("bad str provided",params[1])
+		discountFactor=float(params[1][8:])
+		return cls.fromPrismFile(prismFile, stateStrFunction, discountFactor)
+
+class MDPExplicitBatchExecution(MDPExecution[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]):
+	"""!
+	An execution drawn by MDPBatchSimulationEngine.
+	The path is only built from the recorded arrays when it is requested (by a path advice for example).
+	"""
+	def __init__(self, mdpOperations: MDPExplicitOperations, mdpPrefixPath: MDPPath[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction], actionIds: List[int], successors: List[int], rewards: List[float], mdpEndState: MDPExplicitState, mdpPathReward: float, isTerminal: bool, discountFactor: float) -> None:
+		self.mdpOperations = mdpOperations
+		self.mdpPrefixPath = mdpPrefixPath # path of the execution the simulation started from
+		self.actionIds = actionIds # actions played during the simulation
+		self.successors = successors # states reached during the simulation
+		self.rewards = rewards # rewards of the transitions of the simulation
+		self._mdpPath: Optional[MDPPath[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]] = None
+		self.mdpEndState = mdpEndState
+		self.mdpPathReward = mdpPathReward
+		self.isTerminal = isTerminal
+		self.discountFactor = discountFactor
+
+	@property
+	def mdpPath(self) -> MDPPath[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]:
+		if self._mdpPath is None:
+			explicitModel = self.mdpOperations.explicitModel
+			mdpPath = self.mdpPrefixPath.transitionsCopy()
+			for actionId, successor, reward in zip(self.actionIds, self.successors, self.rewards):
+				mdpTransition = MDPTransition(MDPAction(explicitModel.actionNames[actionId],""), MDPExplicitStochasticAction(successor,reward,""))
+				mdpPath.append(mdpTransition, explicitModel.getLabelsMask(successor, mdpPath.predicateTable))
+			self._mdpPath = mdpPath
+		return self._mdpPath
+
+	@mdpPath.setter
+	def mdpPath(self, mdpPath: MDPPath[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]) -> None:
+		self._mdpPath = mdpPath
+
+	def usePredicateTable(self, predicateTable: MDPPredicateTable[MDPPredicate]) -> None:
+		self.mdpPrefixPath.usePredicateTable(predicateTable)
+		if not self._mdpPath is None:
+			self._mdpPath.usePredicateTable(predicateTable)
+
+	def length(self) -> int:
+		return self.mdpPrefixPath.length() + len(self.actionIds)
+
+class MDPBatchSimulationEngine(MDPSimulationEngine[MDPPredicate, MDPExplicitState, MDPAction, MDPExplicitStochasticAction]):
+	"""!
+	Draws the simulations of getSimulationReward in lockstep with NumPy, on an MDPExplicitOperations.
+	Only the uniform action strategy under an advice that allows all actions is vectorized:
+	for other options, or other MDPOperations, the simulations are drawn one by one as in MDPSimulationEngine.
+	Path advice and state score are still called on an MDPExecutionEngine for each simulation.
+	"""
+	def isBatchable(self) -> bool:
+		return isinstance(self.mdpExecutionEngine.mdpOperations, MDPExplicitOperations) and isinstance(self.mdpActionStrategy, MDPUniformActionStrategy) and self.mdpActionAdvice.allowsAllActions
+
+	def _runBatchSimulations(self, numBatch: int, timeI: int) -> Tuple[Any, Any, Any, Any, Any, Any, Any]:
+		"""!
+		Simulates numBatch runs in lockstep until the horizon, from the end state of the execution engine.
+		@return arrays of the end states, path rewards, discount factors, terminal flags and decision lengths of the runs, and the actions, successors and rewards of each step (one row per step, -1 for finished runs)
+		"""
+		mdpOperations = self.mdpExecutionEngine.mdpOperations
+		explicitModel = mdpOperations.explicitModel
+		rng = np.random.default_rng(random.getrandbits(64))
+		states = np.full(numBatch, self.mdpExecutionEngine.mdpEndState().index, dtype=np.int64)
+		pathRewards = np.full(numBatch, self.mdpExecutionEngine.mdpPathReward(), dtype=np.float64)
+		discountFactors = np.full(numBatch, self.mdpExecutionEngine.mdpExecution.discountFactor, dtype=np.float64)
+		isTerminal = np.zeros(numBatch, dtype=bool)
+		depths = np.full(numBatch, timeI, dtype=np.int64)
+		decisions = np.zeros(numBatch, dtype=np.int64)
+		stepActions: List[Any] = []
+		stepSuccessors: List[Any] = []
+		stepRewards: List[Any] = []
+		active = np.arange(numBatch)
+		while len(active) > 0:
+			activeStates = states[active]
+			numActions = explicitModel.stateActionStart[activeStates+1] - explicitModel.stateActionStart[activeStates]
+			if np.any(numActions == 0):
+				raise NoMoveException("could not get an action")
+			nonDecisionAction = (numActions <= 1) if self.ignoreNonDecisionStates else np.zeros(len(active), dtype=bool)
+			aborted = (depths[active] == self.horizon) & ~nonDecisionAction
+			active = active[~aborted]
+			activeStates = activeStates[~aborted]
+			numActions = numActions[~aborted]
+			nonDecisionAction = nonDecisionAction[~aborted]
+			if len(active) == 0:
+				break
+			actionIndices = np.minimum((rng.random(len(active)) * numActions).astype(np.int64), numActions-1)
+			rows = explicitModel.stateActionRows[explicitModel.stateActionStart[activeStates] + actionIndices]
+			successors, rewards = explicitModel.drawSuccessors(rows, rng.random(len(active)))
+			discountFactors[active] *= mdpOperations.discountFactor
+			pathRewards[active] += rewards * discountFactors[active]
+			depths[active] += ~nonDecisionAction
+			decisions[active] += ~nonDecisionAction
+			states[active] = successors
+			isTerminal[active] = explicitModel.isDone[successors]
+			stepAction = np.full(numBatch, -1, dtype=np.int64)
+			stepAction[active] = explicitModel.choiceActionIds[rows]
+			stepActions.append(stepAction)
+			stepSuccessor = np.full(numBatch, -1, dtype=np.int64)
+			stepSuccessor[active] = successors
+			stepSuccessors.append(stepSuccessor)
+			stepReward = np.zeros(numBatch, dtype=np.float64)
+			stepReward[active] = rewards
+			stepRewards.append(stepReward)
+			active = active[~isTerminal[active] & (depths[active] <= self.horizon)]
+		return states, pathRewards, discountFactors, isTerminal, decisions, np.array(stepActions).reshape(-1, numBatch), np.array(stepSuccessors).reshape(-1, numBatch), np.array(stepRewards).reshape(-1, numBatch)
+
+	def getSimulationReward(self, numSims: int) -> Optional[float]:
+		"""!
+		Draws numSims simulations until horizon depth
+		and returns the average mdpReward obtained.
+		"""
+		if numSims<=0:
+			raise Exception("zero simulations is not enough")
+		timeI=self.mdpExecutionEngine.length(ignoreNonDecisionStates = self.ignoreNonDecisionStates)
+		if not self.isBatchable() or self.mdpExecutionEngine.isTerminal() or timeI>self.horizon:
+			return MDPSimulationEngine.getSimulationReward(self, numSims)
+		if not self.quiet: print("running",numSims,"batch simulations for depth",timeI,"to",self.horizon,"from",self.mdpExecutionEngine.stateConsoleStr())
+		mdpOperations = self.mdpExecutionEngine.mdpOperations
+		mdpPrefixPath = self.mdpExecutionEngine.mdpPath().transitionsCopy()
+		nonDecisionLength = self.mdpExecutionEngine.nonDecisionLength
+		mdpRewardEstimates = 0.0
+		numSelect = 0
+		numTries = 0
+		while numSelect < numSims and numTries < numSims * self.rejectFactor:
+			numBatch = min(numSims, numSims * self.rejectFactor - numTries) # as many runs as needed if all of them are valid
+			numTries += numBatch
+			states, pathRewards, discountFactors, isTerminal, decisions, stepActions, stepSuccessors, stepRewards = self._runBatchSimulations(numBatch, timeI)
+			for i in range(numBatch):
+				steps = stepActions[:,i] >= 0
+				mdpExecution = MDPExplicitBatchExecution(mdpOperations, mdpPrefixPath, stepActions[steps,i].tolist(), stepSuccessors[steps,i].tolist(), stepRewards[steps,i].tolist(), MDPExplicitState(int(states[i])), float(pathRewards[i]), bool(isTerminal[i]), float(discountFactors[i]))
+				mdpExecutionEngine = MDPExecutionEngine(mdpOperations, mdpExecution, nonDecisionLength + int(decisions[i]))
+				if self.mdpPathAdvice.isValidPath(mdpExecutionEngine):
+					mdpPathReward = mdpExecution.mdpPathReward
+					stateScore = self.mdpStateScore.getScore(mdpExecutionEngine)
+					mdpRewardEstimates += (1-self.alpha)*mdpPathReward + self.alpha*stateScore
+					numSelect += 1
+					if numSelect >= numSims:
+						break
+		if not self.quiet: print("ran",numTries,"batch simulations")
+		if numSelect!=numSims:
+			if not self.quiet: print("found",numSelect,"valid simulations out of",numSims)
+			return None
+		return mdpRewardEstimates / numSelect
+
+def runResults(engineList: List[MDPExecutionEngine[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]], cursesDelay:float = 0.0, quiet: bool = True, prettyConsole: bool = False, statistics: Optional[Dict[str, Any]] = None) -> Any:
 	"""! Given a prism file and two formula, gives the conditional distance
 
 	@param engineList list of saved executions
 	@param cursesDelay a float that adds delay between printing states (looks cool if prettyConsole is True)
 	@param quiet if True, does not print debugging info
 	@param prettyConsole if True, print state using predefined function instead of str (using MDPOperations.stateStrFunction)
+	@param statistics if not None, its entry 'simulator' is updated with the calls to the simulators made by the replays (see runGamesWithMCTS)
 	"""
 	print("[== running replay engines")
 	n = 0
@@ -332,6 +1310,8 @@ def runResults(engineList: List[MDPExecutionEngine[MDPPredicate, MDPState, MDPAc
 		print(f"Length\t\t{mdpExecutionEngine.length(ignoreNonDecisionStates=True)}")
 		print('---------')
 	print("==] done\n")
+	if not statistics is None and len(engineList) > 0 and isinstance(engineList[0].mdpOperations, MDPOperations) and not engineList[0].mdpOperations.profile is None:
+		statistics['simulator'] = engineList[0].mdpOperations.simulatorProfile()
 
 
 def runGamesWithMCTS(stateStrFunction,prismFile,**kwargs):
@@ -340,17 +1320,43 @@ def runGamesWithMCTS(stateStrFunction,prismFile,**kwargs):
 	@param stateStrFunction custom defined function to print states (using MDPOperations.stateStrFunction)
 	@param prismFile location to a prism file
 	@param **kwargs arguments for MCTS (See simulationClasses.MDPMCTSTraceEngine.runMCTSTrace())
+	If kwargs['statistics'] is a dict, it receives the statistics of the run:
+	with kwargs['profileSimulator'] set to True, its entry 'simulator' gives the calls to the simulators (see MDPSimulatorProfile.statistics),
+	and its entry 'mcts' gives the search statistics of each decision (see MCTSEngine.getSearchStatistics)
 	"""
 	discount = kwargs['discount']
 	kwargs.pop('discount')
-	prismSimulator = prismToSimulator(prismFile)
-	mdp = MDPOperations(prismSimulator,prismFile,stateStrFunction,discount)
-	bitVector = prismSimulator._get_current_state()
-	initState = MDPState(bitVector)
-	labels = prismSimulator._report_labels()
-	initPredicates = [MDPPredicate(label) for label in labels]
-	traceEngine: MDPMCTSTraceEngine[MDPPredicate, MDPState, MDPAction, MDPStochasticAction] = MDPMCTSTraceEngine()
+	stateCacheSize = kwargs.pop('stateCacheSize', MDPOperations.DEFAULT_CACHE_SIZE)
+	mdpBackend = kwargs.pop('mdpBackend', 'simulator')
+	explicitMaxStates = kwargs.pop('explicitMaxStates', MDPExplicitModel.DEFAULT_MAX_STATES)
+	pinConsumers = kwargs.pop('simulatorPool', True)
+	statistics = kwargs.pop('statistics', None)
+	simulatorProfile = (MDPSimulatorProfile() if kwargs.pop('profileSimulator', False) else None)
+	simulatorPool: Optional[MDPSimulatorPool] = None
+	if mdpBackend == 'simulator':
+		simulatorPool = MDPSimulatorPool(prismFile, pinConsumers)
+		prismSimulator = simulatorPool.getSimulator(CONSUMER_GAME)
+		mdp = MDPOperations(prismSimulator,prismFile,stateStrFunction,discount,cacheSize=stateCacheSize,simulatorPool=simulatorPool,profile=simulatorProfile)
+		bitVector = prismSimulator._get_current_state()
+		initState = MDPState(bitVector)
+		labels = prismSimulator._report_labels()
+		initPredicates = [MDPPredicate(label) for label in labels]
+	elif mdpBackend == 'explicit':
+		mdp = MDPExplicitOperations.fromPrismFile(prismFile,stateStrFunction,discount,explicitMaxStates)
+		initState = mdp.initialState()
+		initPredicates = mdp.getPredicates(initState)
+	else:
+		raise Exception("unknown mdp backend: "+str(mdpBackend))
+	mdp.getPredicateTable().getMask(mdp.getAllPredicates()) # interns the labels of the model before the games, so that they get the lowest bits
+	traceEngine: MDPMCTSTraceEngine = MDPMCTSTraceEngine()
+	if not statistics is None:
+		statistics['mcts'] = []
+		kwargs['decisionStatistics'] = statistics['mcts']
 	results = traceEngine.runMCTSTrace(mdpState=initState, mdpPredicates=initPredicates, mdpOperations=mdp,**kwargs)
+	if not simulatorPool is None and not kwargs.get('quietTrace', False):
+		print("simulator restarts: "+str(simulatorPool.restartStatistics()))
+	if not statistics is None and not simulatorProfile is None:
+		statistics['simulator'] = simulatorProfile.statistics()
 
 	return(results)
 
@@ -387,15 +1393,15 @@ def runGamesWithMCTS(stateStrFunction,prismFile,**kwargs):
 ##
 # Parsers for simulation classes
 
-def MDPTransitionfromFileStr(s:str) -> MDPTransition[MDPAction,MDPStochasticAction]:
+def MDPTransitionfromFileStr(s:str, stochasticActionClass: Any = MDPStochasticAction) -> MDPTransition[MDPAction,MDPStochasticAction]:
 	splits=s.split(MDPTransition.FILE_SEPARATOR)
 	s1=splits[0]
 	s2=""
 	for i in range(1,len(splits)):
 		s2+=splits[i]
-	return MDPTransition(MDPAction.fromFileStr(s1),MDPStochasticAction.fromFileStr(s2))
+	return MDPTransition(MDPAction.fromFileStr(s1),stochasticActionClass.fromFileStr(s2))
 
-def MDPPathfromFileStr(s:str) -> MDPPath[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]:
+def MDPPathfromFileStr(s:str, stateClass: Any = MDPState, stochasticActionClass: Any = MDPStochasticAction) -> MDPPath[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]:
 	if MDPPath.FILE_PREFIX==s[:len(MDPPath.FILE_PREFIX)]:
 		s=s[len(MDPPath.FILE_PREFIX):]
 	else:
@@ -410,17 +1416,21 @@ def MDPPathfromFileStr(s:str) -> MDPPath[MDPPredicate, MDPState, MDPAction, MDPS
 		raise Exception("Parse error")
 	splits2=splits1[0].split(MDPPath.FILE_LIST_SEPARATOR)
 	splits3=splits1[1].split(MDPPath.FILE_LIST_SEPARATOR)
-	return MDPPath(MDPState.fromFileStr(s1),[MDPTransitionfromFileStr(ss) for ss in splits2],[[MDPPredicate.fromFileStr(sss) for sss in ss.split(" ")] for ss in splits3])
+	return MDPPath(stateClass.fromFileStr(s1),[MDPTransitionfromFileStr(ss, stochasticActionClass) for ss in splits2],[[MDPPredicate.fromFileStr(sss) for sss in ss.split(" ") if sss!=""] for ss in splits3]) # an empty list of predicates is written as an empty string
 
-def MDPExecutionfromFileStr(s:str) -> MDPExecution[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]:
+def MDPExecutionfromFileStr(s:str, stateClass: Any = MDPState, stochasticActionClass: Any = MDPStochasticAction) -> MDPExecution[MDPPredicate, MDPState, MDPAction, MDPStochasticAction]:
+	"""!
+	Parses an execution written by MDPExecution.fileStr, with states and stochastic actions of the given classes
+	(MDPExplicitState and MDPExplicitStochasticAction for an execution of MDPExplicitOperations)
+	"""
 	splits=s.split(MDPExecution.FILE_SEPARATOR1)
 	if len(splits) != 2:
 		raise Exception("Parse error")
-	mdpPath = MDPPathfromFileStr(splits[0])
+	mdpPath = MDPPathfromFileStr(splits[0], stateClass, stochasticActionClass)
 	splits=splits[1].split(MDPExecution.FILE_SEPARATOR2)
 	if len(splits) != 2:
 		raise Exception("Parse error")
-	mdpEndState = MDPState.fromFileStr(splits[0])
+	mdpEndState = stateClass.fromFileStr(splits[0])
 	splits=splits[1].split(MDPExecution.FILE_SEPARATOR3)
 	if len(splits) != 2:
 		raise Exception("Parse error")
@@ -446,7 +1456,16 @@ def readResults(file: Any, mdpOperations = None) -> List[MDPExecutionEngine[MDPP
 	else:
 		raise Exception("bad prefix in parsing path")
 	if mdpOperations == None: # I am adding this option so I can create one mdp and give it as input to read multiple results
-		mdpOperations = MDPOperations.fromFileStr(so) # type: Any
+		if MDPExplicitOperations.FILE_SEPARATOR in so:
+			mdpOperations = MDPExplicitOperations.fromFileStr(so) # type: Any
+		else:
+			mdpOperations = MDPOperations.fromFileStr(so)
+	if isinstance(mdpOperations, MDPExplicitOperations):
+		stateClass: Any = MDPExplicitState
+		stochasticActionClass: Any = MDPExplicitStochasticAction
+	else:
+		stateClass = MDPState
+		stochasticActionClass = MDPStochasticAction
 	st = s[1]
 	TRACE_SEPERATOR = '\nTrace:\n'
 	st = st.split(TRACE_SEPERATOR)
@@ -456,7 +1475,7 @@ def readResults(file: Any, mdpOperations = None) -> List[MDPExecutionEngine[MDPP
 		if len(st) != 2:
 			print(st)
 			raise Exception("parser errror")
-		mdpExecution = MDPExecutionfromFileStr(st[0])
+		mdpExecution = MDPExecutionfromFileStr(st[0], stateClass, stochasticActionClass)
 		numSim = int(st[1])
 		if numSim != 1:
 			raise Exception("numSim not 1")
@@ -480,6 +1499,7 @@ class MDPStateScore(MDPStateScoreInterface):
 		return 0
 
 class MDPSafeActionAdvice( MDPActionAdviceInterface):
+	allowsAllActions: bool = True
 
 	def getMDPActionAdvice(self, mdpState, mdpOperations, quietInfoStr: bool):
 		choices = mdpOperations.getLegalActions(mdpState)
@@ -494,12 +1514,13 @@ def zeroScoreFunction(**kwargs):
 	return 0
 
 class MDPNonLossPathAdvice(MDPPathAdviceInterface[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]):
+	def __init__(self) -> None:
+		self.lossMask: MDPPredicatesMask[MDPPredicate] = MDPPredicatesMask([MDPPredicate("Loss")])
+
 	def isValidPath(self, mdpExecutionEngine: MDPExecutionEngine[TMDPPredicate, TMDPState, TMDPAction, TMDPStochasticAction]) -> bool:
-		mdpPredicatesList = mdpExecutionEngine.mdpOperations.getPredicates(mdpExecutionEngine.mdpEndState())
-		for predicate in mdpPredicatesList:
-			if predicate.name == "Loss":
-				return False
-		return True
+		mdpOperations = mdpExecutionEngine.mdpOperations
+		mdpPredicatesMask = mdpOperations.getPredicatesMask(mdpExecutionEngine.mdpEndState())
+		return not (mdpPredicatesMask & self.lossMask.getMask(mdpOperations))
 
 if __name__ == "__main__":
 	pass
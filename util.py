@@ -3,6 +3,7 @@
 import sys,os
 import inspect
 import heapq, random
+import collections
 
 from typing import TypeVar, Type, Any, Optional, Sequence, List, Tuple, Dict, Union, Generic, NoReturn
 
@@ -232,6 +233,90 @@ class ConsoleStrFloatCounter(Counter[TMiniConsoleInterface]):
 		return '{' + ' '.join([k.miniConsoleStr()+":"+"{:.2f}".format(self[k]) for k in self.sortedKeys()]) + '}'
 
 
+K = TypeVar("K")
+V = TypeVar("V")
+class LRUCache(Generic[K, V]):
+	"""
+	A bounded map that evicts the least recently used key when full.
+	Counts the hits and misses of get(). A cache of maxSize 0 stores nothing.
+	"""
+	def __init__(self, maxSize: int) -> None:
+		self.maxSize = maxSize
+		self.hits = 0
+		self.misses = 0
+		self._data: "collections.OrderedDict[K, V]" = collections.OrderedDict()
+
+	def get(self, key: K) -> Optional[V]:
+		"""
+		Returns the value stored for key and marks it as recently used,
+		or None if key is not in the cache.
+		"""
+		value = self._data.get(key)
+		if value is None:
+			self.misses += 1
+			return None
+		self._data.move_to_end(key)
+		self.hits += 1
+		return value
+
+	def put(self, key: K, value: V) -> None:
+		if self.maxSize <= 0:
+			return
+		self._data[key] = value
+		self._data.move_to_end(key)
+		if len(self._data) > self.maxSize:
+			self._data.popitem(last=False)
+
+	def clear(self) -> None:
+		self._data.clear()
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def __contains__(self, key: object) -> bool:
+		return key in self._data
+
+	def statistics(self) -> Dict[str, int]:
+		return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxSize': self.maxSize}
+
+
+class AliasTable:
+	"""
+	Draws the index of a fixed distribution in constant time with Walker's alias method.
+	Building the table takes time linear in the size of the distribution.
+	"""
+	def __init__(self, probabilities: Sequence[float]) -> None:
+		size = len(probabilities)
+		total = float(sum(probabilities))
+		scaled = [p * size / total for p in probabilities]
+		self.size = size
+		self.thresholds = [1.0] * size # probability of keeping a drawn index
+		self.aliases = list(range(size)) # index returned instead of a drawn index that is not kept
+		small = [i for i in range(size) if scaled[i] < 1.0]
+		large = [i for i in range(size) if scaled[i] >= 1.0]
+		while small and large:
+			i = small.pop()
+			j = large.pop()
+			self.thresholds[i] = scaled[i]
+			self.aliases[i] = j
+			scaled[j] += scaled[i] - 1.0
+			if scaled[j] < 1.0:
+				small.append(j)
+			else:
+				large.append(j)
+		# the indices left in small or large only miss 1.0 because of rounding errors, they keep a threshold of 1.0
+
+	def sample(self) -> int:
+		choice = random.random() * self.size
+		i = int(choice)
+		if choice - i < self.thresholds[i]:
+			return i
+		return self.aliases[i]
+
+	def __len__(self) -> int:
+		return self.size
+
+
 def normalize(vector: List[float]) ->  List[float]:
 	"""
 	normalize a vector or counter by dividing each value by the sum of all values
@@ -241,18 +326,26 @@ def normalize(vector: List[float]) ->  List[float]:
 	return [el / s for el in vector]
 
 def sample(distribution: Counter[X]) -> X:
-	# items = sorted(distribution.items())
-	items = distribution.items()
-	distributionL = [i[1] for i in items]
-	values = [i[0] for i in items]
-	if sum(distributionL) != 1:
-		distributionL = normalize(distributionL)
-	choice = random.random()
-	i, total= 0, distributionL[0]
-	while choice > total:
-		i += 1
-		total += distributionL[i]
-	return values[i]
+	"""
+	Draws a key of distribution with a probability proportional to its value,
+	from the sum of the values and a scan that stops at the key drawn, without normalizing or copying the distribution.
+	Use an AliasTable to draw repeatedly from the same distribution.
+	Raises a ValueError if the distribution is empty or its values do not sum to a positive number.
+	"""
+	mass = sum(distribution.values())
+	if not mass > 0:
+		raise ValueError("cannot sample from a distribution of total weight "+str(mass))
+	choice = random.random() * mass
+	total = 0.0
+	lastValue: Any = None # last key of positive weight
+	for value, probability in distribution.items():
+		if probability <= 0:
+			continue
+		total += probability
+		if choice < total:
+			return value
+		lastValue = value
+	return lastValue # rounding errors
 
 def chooseFromDistribution(distribution: Counter[X]) -> X:
 	"Takes a counter and samples"